@@ -0,0 +1,106 @@
+import logging
+import os
+import threading
+import time
+
+from almacen import obtener_almacen
+from competiciones import descubrir_competiciones
+from config_loader import cargar_config
+from data_loader import (activar_segundo_plano, actualizar_fuente, desactivar_segundo_plano, es_url,
+                         fuentes_activas)
+from filtros import obtener_indice
+from historial import registrar_version
+from precalculo import obtener_tablas
+from snapshot import compilar_snapshot, ruta_snapshot, version_si_vigente
+
+# Actualizador en segundo plano: un hilo por proceso revisa periódicamente las fuentes
+# (descarga condicional para la URL, stat para los archivos de data/) y prepara la versión nueva
+# (tabla, snapshot, almacén, índice de filtros, tablas de percentiles e historial) fuera de las sesiones
+# Recién cuando todo está listo la versión nueva pasa a ser la activa; hasta entonces se sirve la anterior
+#
+# Se configura con RADAR_ACTUALIZACION (segundos entre revisiones; 0 lo desactiva y cada sesión revisa la fuente)
+
+INTERVALO_ACTUALIZACION = float(os.environ.get("RADAR_ACTUALIZACION", "60"))
+
+_logger = logging.getLogger("radar.actualizador")
+_hilo = None
+_detener = threading.Event()
+_lock = threading.Lock()
+_estado = {"revisiones": 0, "ultima_revision": None, "actualizaciones": [], "errores": 0, "ultimo_error": None}
+
+# Esta función deja en la caché todo lo derivado de una versión nueva antes de activarla
+# Si la tabla nueva no sirve (p. ej. faltan métricas de la configuración) se lanza el error y sigue la anterior
+
+def preparar_version(df, version, fuente):
+    cargar_config(df)
+    almacen = obtener_almacen(df, version)
+    obtener_indice(almacen, version)
+    registrar_version(fuente, df, version, obtener_tablas(df, version, fuente))
+
+# Los archivos de data/ que todavía no se usan solo se compilan a snapshot (para que su primera carga sea rápida)
+
+def _compilar_pendientes(activas):
+    for ruta in descubrir_competiciones().values():
+        if es_url(ruta) or ruta in activas:
+            continue
+        if version_si_vigente(ruta_snapshot(ruta), ruta) is None:
+            try:
+                compilar_snapshot(ruta)
+            except (ImportError, OSError):
+                pass
+
+# Esta función hace una pasada sobre todas las fuentes y devuelve las que cambiaron de versión
+
+def revisar_fuentes():
+    activas = fuentes_activas()
+    cambios = {}
+    for fuente in activas:
+        try:
+            version = actualizar_fuente(fuente, lambda df, v: preparar_version(df, v, fuente))
+        except Exception as error:
+            _estado["errores"] += 1
+            _estado["ultimo_error"] = f"{fuente}: {error}"
+            _logger.warning("No se pudo actualizar %s: %s", fuente, error)
+            continue
+        if version is not None:
+            cambios[fuente] = version
+            _estado["actualizaciones"] = (_estado["actualizaciones"] + [(time.time(), fuente, version)])[-10:]
+            _logger.info("Nueva versión activa de %s: %s", fuente, version)
+    _compilar_pendientes(set(activas))
+    _estado["revisiones"] += 1
+    _estado["ultima_revision"] = time.time()
+    return cambios
+
+
+def _bucle(intervalo):
+    while not _detener.wait(intervalo):
+        try:
+            revisar_fuentes()
+        except Exception as error:
+            _estado["errores"] += 1
+            _estado["ultimo_error"] = str(error)
+            _logger.warning("Fallo en la revisión de fuentes: %s", error)
+
+# Esta función arranca el hilo una sola vez por proceso (los reruns de Streamlit la pueden llamar siempre)
+# Devuelve True si el actualizador está corriendo
+
+def iniciar(intervalo=INTERVALO_ACTUALIZACION):
+    global _hilo
+    if intervalo <= 0:
+        return False
+    with _lock:
+        if _hilo is None or not _hilo.is_alive():
+            _detener.clear()
+            activar_segundo_plano()
+            _hilo = threading.Thread(target=_bucle, args=(intervalo,), name="radar-actualizador", daemon=True)
+            _hilo.start()
+    return True
+
+
+def detener():
+    _detener.set()
+    desactivar_segundo_plano()
+
+
+def estado():
+    return dict(_estado, activo=_hilo is not None and _hilo.is_alive())
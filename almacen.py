@@ -0,0 +1,22 @@
+from cache_compartida import CACHE
+
+# Almacén de jugadores: la tabla de datos indexada por UniqueID (búsqueda O(1) por jugador)
+# Club, país y posición principal se guardan como categóricos (códigos enteros)
+
+COLUMNAS_CATEGORICAS = ["Team", "Birth country", "Primary position"]
+
+# Esta función construye el almacén a partir de la tabla ya preparada por data_loader
+# Los UniqueID ya vienen sin repetir, así que el índice es único
+
+def construir_almacen(df, id_column="UniqueID"):
+    almacen = df.set_index(id_column, verify_integrity=True)
+    for columna in COLUMNAS_CATEGORICAS:
+        if columna in almacen.columns:
+            almacen[columna] = almacen[columna].astype("category")
+    almacen.attrs = dict(df.attrs)
+    return almacen
+
+# Esta función devuelve el almacén de una versión de datos (caché compartida)
+
+def obtener_almacen(df, version, id_column="UniqueID"):
+    return CACHE.obtener("almacen", version, lambda: construir_almacen(df, id_column), versiones=(version,))
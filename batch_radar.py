@@ -0,0 +1,235 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from competiciones import COLUMNA_COMPETICION
+from config_loader import etiquetas_categorias
+from dataset import cargar_dataset
+from exportar import huella_radar, imagen_png
+from metrics_config import roles_map
+from radar_utils import especificacion_json, especificacion_radar, figura_desde_especificacion
+from ranking import obtener_ranking
+from referencia import MODOS
+
+# Generación de radares y rankings sin Streamlit, para los reportes semanales
+#
+# Uso:
+#   python batch_radar.py --spec "rol=Forward,pais=Brazil,edad=18-25,minutos=300,top=5" --salida reportes/
+#   python batch_radar.py --specs specs.json --formatos png svg --procesos 4
+#
+# specs.json es una lista de objetos con las mismas claves: rol, pais, edad [min, max], minutos, top, idioma, nombre
+
+COLUMNAS_TABLA = ['Player', 'Team', 'Competition', 'Position', 'Age', 'Birth country', 'Minutes played',
+                  'Contract expires']
+IDIOMAS = {'es': 'Español', 'en': 'English'}
+
+_worker = {}
+
+# Esta función lee una especificación de texto "clave=valor,clave=valor"
+
+def leer_spec(texto):
+    spec = {}
+    for parte in texto.split(","):
+        clave, _, valor = parte.partition("=")
+        clave, valor = clave.strip(), valor.strip()
+        if clave == "edad":
+            minimo, _, maximo = valor.partition("-")
+            spec["edad"] = [int(minimo), int(maximo or minimo)]
+        elif clave in ("minutos", "top"):
+            spec[clave] = int(valor)
+        else:
+            spec[clave] = valor
+    return spec
+
+# Esta función completa una especificación con los mismos valores por defecto de la app
+
+def normalizar_spec(spec):
+    spec = dict(spec)
+    if spec.get("rol") not in roles_map:
+        raise ValueError(f"Rol desconocido: {spec.get('rol')!r} (opciones: {', '.join(roles_map)})")
+    if spec.get("pais") in (None, "", "Todos", "All"):
+        spec["pais"] = None
+    spec.setdefault("minutos", 100)
+    spec.setdefault("top", 3)
+    spec.setdefault("idioma", "es")
+    if spec["idioma"] not in IDIOMAS:
+        raise ValueError(f"Idioma desconocido: {spec['idioma']!r}")
+    if spec.get("edad"):
+        spec["edad"] = list(spec["edad"])
+    if not spec.get("nombre"):
+        partes = [spec["rol"], spec["pais"] or "todos", f"min{spec['minutos']}"]
+        if spec.get("edad"):
+            partes.append(f"edad{spec['edad'][0]}-{spec['edad'][1]}")
+        spec["nombre"] = re.sub(r"[^\w\-]+", "_", "_".join(partes))
+    return spec
+
+# Esta función evita que dos especificaciones escriban los mismos archivos
+# Los nombres por defecto no incluyen top ni idioma: si se repiten llevan el número de la especificación
+# Dos nombres elegidos iguales son un error (se pisarían los reportes)
+
+def nombres_unicos(specs, elegidos):
+    tomados = set()
+    for spec, elegido in zip(specs, elegidos):
+        if elegido:
+            if spec["nombre"] in tomados:
+                raise ValueError(f"Nombre repetido en el lote: {spec['nombre']!r}")
+            tomados.add(spec["nombre"])
+    for i, (spec, elegido) in enumerate(zip(specs, elegidos), 1):
+        if elegido:
+            continue
+        nombre, extra = spec["nombre"], 0
+        while nombre in tomados:
+            extra += 1
+            nombre = f"{spec['nombre']}_{i}" + (f"_{extra}" if extra > 1 else "")
+        spec["nombre"] = nombre
+        tomados.add(nombre)
+    return specs
+
+# Inicialización de cada proceso: carga los datos una vez y deja kaleido caliente con un render de prueba
+
+def _iniciar_worker(fuente, formatos, competiciones=None, agrupar_por=None, referencia="todos", base=None):
+    _worker["datos"] = cargar_dataset(fuente, competiciones, agrupar_por, referencia, base)
+    _worker["formatos"] = formatos
+    _worker["kaleido"] = None
+    if formatos:
+        try:
+            figura = figura_desde_especificacion({"titulo": "", "categorias": ["a", "b", "c"], "jugadores": []})
+            imagen_png(figura, "calentamiento", formatos[0])
+            _worker["kaleido"] = True
+        except Exception as error:
+            detalle = next((linea.strip() for linea in str(error).splitlines() if linea.strip()), "")
+            _worker["kaleido"] = f"{type(error).__name__}: {detalle}"
+
+# Esta función procesa una especificación: filtra, ordena, escribe el CSV y exporta el radar
+
+def procesar_spec(spec, salida):
+    datos = _worker["datos"]
+    tiempos = {}
+    inicio = time.perf_counter()
+
+    idioma = spec["idioma"]
+    df_percentiles, categorias_ids = datos["tablas"][spec["rol"]]
+    etiquetas = etiquetas_categorias(categorias_ids, idioma)
+    mascara = datos["indice"].mascara(spec["rol"], spec["pais"], spec["minutos"], spec.get("edad"))
+    ranking = obtener_ranking(datos["tablas"], datos["version_tablas"], spec["rol"])
+    tiempos["filtro"] = time.perf_counter() - inicio
+
+    marca = time.perf_counter()
+    ids = ranking.ids[ranking.ordenar(mascara)]
+    tabla = df_percentiles.loc[ids, categorias_ids + ["ELO"]].rename(columns=dict(zip(categorias_ids, etiquetas)))
+    columnas = [c for c in COLUMNAS_TABLA if c in datos["almacen"].columns]
+    tabla = datos["almacen"].loc[ids, columnas].join(tabla)
+    ruta_csv = Path(salida) / f"{spec['nombre']}.csv"
+    tabla.to_csv(ruta_csv, float_format="%.1f")
+    archivos = [str(ruta_csv)]
+    tiempos["ranking"] = time.perf_counter() - marca
+
+    marca = time.perf_counter()
+    top_players = ranking.jugadores_radar(ranking.top(mascara, spec["top"]), etiquetas)
+    rol_traducido = roles_map[spec["rol"]][idioma]
+    especificacion = especificacion_radar(top_players, datos["almacen"], etiquetas, rol_traducido,
+                                          spec["top"], IDIOMAS[idioma], id_column="UniqueID")
+    figura = figura_desde_especificacion(especificacion)
+    tiempos["figura"] = time.perf_counter() - marca
+
+    marca = time.perf_counter()
+    error = None
+    if _worker["kaleido"] is True:
+        huella = huella_radar(spec["rol"], IDIOMAS[idioma], spec["top"], top_players)
+        for formato in _worker["formatos"]:
+            ruta = Path(salida) / f"{spec['nombre']}.{formato}"
+            ruta.write_bytes(imagen_png(figura, huella, formato))
+            archivos.append(str(ruta))
+    else:
+        # Sin kaleido se deja la especificación del radar para renderizarla en otro lado
+        ruta = Path(salida) / f"{spec['nombre']}.radar.json"
+        ruta.write_text(especificacion_json(especificacion), encoding="utf-8")
+        archivos.append(str(ruta))
+        error = _worker["kaleido"]
+    tiempos["exportar"] = time.perf_counter() - marca
+    tiempos["total"] = time.perf_counter() - inicio
+
+    return {"nombre": spec["nombre"], "jugadores": int(mascara.sum()), "archivos": archivos,
+            "tiempos": tiempos, "pid": os.getpid(), "error": error}
+
+# Esta función reparte las especificaciones en un pool de procesos y devuelve el reporte con tiempos
+
+def ejecutar_lote(specs, salida, fuente=None, formatos=("png",), procesos=None, competiciones=None,
+                  agrupar_por=None, referencia="todos", base=None):
+    Path(salida).mkdir(parents=True, exist_ok=True)
+    specs = nombres_unicos([normalizar_spec(s) for s in specs], [bool(s.get("nombre")) for s in specs])
+    procesos = procesos or min(len(specs), os.cpu_count() or 1) or 1
+
+    inicio = time.perf_counter()
+    resultados = []
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_worker,
+                             initargs=(fuente, list(formatos), competiciones, agrupar_por, referencia, base)) as pool:
+        futuros = [pool.submit(procesar_spec, spec, str(salida)) for spec in specs]
+        for futuro in as_completed(futuros):
+            resultados.append(futuro.result())
+    duracion = time.perf_counter() - inicio
+
+    resultados.sort(key=lambda r: r["nombre"])
+    return {
+        "trabajos": len(resultados),
+        "procesos": procesos,
+        "segundos": duracion,
+        "trabajos_por_segundo": len(resultados) / duracion if duracion else None,
+        "resultados": resultados,
+    }
+
+
+def imprimir_reporte(reporte):
+    print(f"{'trabajo':<40} {'jug.':>5} {'filtro':>8} {'ranking':>8} {'figura':>8} {'export':>8} {'total':>8}  (ms)")
+    for r in reporte["resultados"]:
+        t = {k: v * 1000 for k, v in r["tiempos"].items()}
+        print(f"{r['nombre']:<40} {r['jugadores']:>5} {t['filtro']:>8.1f} {t['ranking']:>8.1f} "
+              f"{t['figura']:>8.1f} {t['exportar']:>8.1f} {t['total']:>8.1f}")
+    print(f"\n{reporte['trabajos']} trabajos en {reporte['segundos']:.2f} s con {reporte['procesos']} procesos "
+          f"({reporte['trabajos_por_segundo']:.1f} trabajos/s, incluye el arranque de los procesos)")
+    errores = {r["error"] for r in reporte["resultados"] if r["error"]}
+    for error in errores:
+        print(f"Aviso: no se exportaron imágenes ({error}); se guardó la especificación .radar.json")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Radares y rankings por rol sin Streamlit")
+    parser.add_argument("--datos", help="Archivo Excel o URL (por defecto, el de data_loader)")
+    parser.add_argument("--competiciones", nargs="+", help="Competiciones de data/ a usar (varias = unión)")
+    parser.add_argument("--por-competicion", action="store_true",
+                        help="Con varias competiciones, percentiles dentro de cada una")
+    parser.add_argument("--referencia", default="todos", choices=MODOS, help="Población de los percentiles")
+    parser.add_argument("--base", help="Competición de data/ usada como población de referencia")
+    parser.add_argument("--spec", action="append", default=[], help="rol=...,pais=...,edad=min-max,minutos=...,top=...")
+    parser.add_argument("--specs", help="Archivo JSON con una lista de especificaciones")
+    parser.add_argument("--todos", action="store_true", help="Agrega una especificación por rol con valores por defecto")
+    parser.add_argument("--salida", default="reportes", help="Carpeta de salida")
+    parser.add_argument("--formatos", nargs="*", default=["png"], choices=["png", "svg"], help="Formatos de imagen")
+    parser.add_argument("--procesos", type=int, help="Cantidad de procesos (por defecto, uno por CPU)")
+    parser.add_argument("--reporte", help="Guardar el reporte de tiempos en JSON")
+    args = parser.parse_args(argv)
+
+    specs = [leer_spec(texto) for texto in args.spec]
+    if args.specs:
+        specs += json.loads(Path(args.specs).read_text(encoding="utf-8"))
+    if args.todos:
+        specs += [{"rol": rol} for rol in roles_map]
+    if not specs:
+        parser.error("indica al menos una especificación (--spec, --specs o --todos)")
+
+    agrupar_por = COLUMNA_COMPETICION if args.por_competicion else None
+    reporte = ejecutar_lote(specs, args.salida, args.datos, args.formatos, args.procesos, args.competiciones,
+                            agrupar_por, args.referencia, args.base)
+    imprimir_reporte(reporte)
+    if args.reporte:
+        Path(args.reporte).write_text(json.dumps(reporte, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from almacen import construir_almacen
+from data_loader import RUTA_DATOS, preparar_tabla
+from escenarios import EscenarioPesos, MatrizRol
+from filtros import IndiceFiltros
+from metrics_config import positions_by_role, role_metrics
+from radar_utils import calcular_percentiles, generar_radar
+from ranking import RankingRol
+from similares import IndiceSimilitud
+from tabla_ranking import construir_tabla
+
+# Benchmarks de las etapas de la app con tablas sintéticas de distintos tamaños
+#
+# Uso:
+#   python benchmark.py --tamanos 1000 10000 100000 --salida bench.json
+#   python benchmark.py --comparar bench.json --umbral 0.25     (falla si alguna etapa empeora más de 25 %)
+#   python benchmark.py --arranque 5                             (además, arranque en frío de la app: 5 procesos)
+
+PAISES = ["Argentina", "Brazil", "Colombia", "Uruguay", "Chile", "Paraguay", "Peru", "Ecuador", "Venezuela", "Bolivia"]
+METRICAS = sorted({m for pesos_rol in role_metrics.values() for pesos in pesos_rol.values() for m in pesos})
+
+# Esta función genera una tabla de jugadores con las columnas reales de metrics_config
+# Las métricas se muestrean del archivo incluido (con ruido) para mantener distribuciones y vacíos realistas
+
+def generar_jugadores(n, semilla=0, ruta_base=RUTA_DATOS):
+    rng = np.random.default_rng(semilla)
+    base = pd.read_excel(ruta_base) if Path(ruta_base).exists() else None
+    posiciones = [p for lista in positions_by_role.values() for p in lista]
+
+    datos = {
+        "Player": [f"Jugador {i}" for i in range(n)],
+        "Team": [f"Club {i}" for i in rng.integers(0, max(n // 25, 1), n)],
+        "Position": rng.choice(posiciones, n),
+        "Age": rng.integers(17, 40, n),
+        "Birth country": rng.choice(PAISES, n),
+        "Minutes played": rng.integers(0, 1500, n),
+        "Contract expires": rng.choice(["2025-06-30", "2026-12-31", "2027-06-30"], n),
+    }
+    for metrica in METRICAS:
+        if base is not None and metrica in base.columns:
+            valores = base[metrica].to_numpy(dtype=float)
+            muestra = rng.choice(valores, n)
+            ruido = rng.normal(1.0, 0.05, n)
+            datos[metrica] = np.round(np.where(np.isnan(muestra), np.nan, muestra * ruido), 2)
+        else:
+            datos[metrica] = np.round(rng.gamma(2.0, 2.0, n), 2)
+    return preparar_tabla(pd.DataFrame(datos))
+
+# Mide una función varias veces y devuelve estadísticas en milisegundos
+# La primera llamada no se mide: importaciones diferidas y cachés de primer uso quedarían en min_ms
+
+def medir(funcion, repeticiones):
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return {"mediana_ms": statistics.median(tiempos), "min_ms": min(tiempos), "repeticiones": repeticiones}
+
+# Esta función mide cada etapa por separado para una tabla de n jugadores
+
+def medir_tamano(n, repeticiones=5, rol="Forward", semilla=0):
+    df = generar_jugadores(n, semilla)
+    pesos = role_metrics[rol]
+    categorias = list(pesos)
+    etapas = {}
+
+    etapas["percentiles"] = medir(lambda: calcular_percentiles(df, pesos, unique_col="UniqueID"), repeticiones)
+    etapas["percentiles_todos_roles"] = medir(
+        lambda: [calcular_percentiles(df, p, unique_col="UniqueID") for p in role_metrics.values()],
+        max(1, repeticiones // 2))
+
+    df_percentiles = calcular_percentiles(df, pesos, unique_col="UniqueID")[0]
+    df_percentiles = df_percentiles.rename(columns={"Promedio": "ELO"}).set_index("UniqueID")
+
+    etapas["almacen"] = medir(lambda: construir_almacen(df), repeticiones)
+    almacen = construir_almacen(df)
+    etapas["indice_filtros"] = medir(lambda: IndiceFiltros(almacen), repeticiones)
+    indice = IndiceFiltros(almacen)
+    etapas["filtro"] = medir(lambda: indice.mascara(rol, "Brazil", 300, (18, 30)), repeticiones * 20)
+    mascara = indice.mascara(rol, None, 100, (17, 40))
+
+    etapas["ranking"] = medir(lambda: RankingRol(df_percentiles, categorias), repeticiones)
+    ranking = RankingRol(df_percentiles, categorias)
+    etapas["top_n"] = medir(lambda: ranking.jugadores_radar(ranking.top(mascara, 5), categorias), repeticiones * 20)
+    etapas["tabla"] = medir(lambda: construir_tabla(almacen, ranking, ranking.ordenar(mascara), "Español"), repeticiones)
+    tabla = construir_tabla(almacen, ranking, ranking.ordenar(mascara), "Español")
+    etapas["csv"] = medir(lambda: tabla.to_csv(index=False), repeticiones)
+
+    etapas["indice_similitud"] = medir(lambda: IndiceSimilitud(df_percentiles, categorias), repeticiones)
+    similitud = IndiceSimilitud(df_percentiles, categorias)
+    referencia = similitud.ids[0]
+    for metrica in ("coseno", "euclidea"):
+        etapas[f"similares_{metrica}"] = medir(lambda: similitud.similares(referencia, 10, mascara, metrica),
+                                               repeticiones * 20)
+
+    # Modo "qué pasa si": cambiar un peso recalcula una categoría y el ELO
+    escenario = EscenarioPesos(MatrizRol(df, pesos, rol), pesos)
+    categoria = next(iter(pesos))
+    variantes = [dict(pesos, **{categoria: {m: p * factor for m, p in pesos[categoria].items()}}) for factor in (0.5, 1.0)]
+    etapas["escenario_peso"] = medir(lambda: [escenario.actualizar(v) for v in variantes], repeticiones)
+
+    top_players = ranking.jugadores_radar(ranking.top(mascara, 5), categorias)
+    etapas["radar"] = medir(
+        lambda: generar_radar(top_players, almacen, categorias, rol, 5, "Español", id_column="UniqueID"),
+        repeticiones)
+
+    return {"filas": n, "etapas": etapas}
+
+
+# Arranque en frío: un proceso nuevo ejecuta el script de la app una vez (como la primera visita a un contenedor)
+# e imprime los hitos de instrumentacion.arranque() (streamlit.testing.v1 está desde streamlit 1.28)
+CODIGO_ARRANQUE = """
+import json
+from streamlit.testing.v1 import AppTest
+AppTest.from_file("streamlit_app.py", default_timeout=300).run()
+from instrumentacion import arranque
+print(json.dumps(arranque()))
+"""
+
+
+def medir_arranque(repeticiones=3):
+    muestras = {}
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", CODIGO_ARRANQUE], capture_output=True, text=True, check=True,
+                                cwd=Path(__file__).resolve().parent)
+        for hito, ms in json.loads(salida.stdout.strip().splitlines()[-1]).items():
+            if ms is not None:
+                muestras.setdefault(hito, []).append(ms)
+    etapas = {hito: {"mediana_ms": statistics.median(tiempos), "min_ms": min(tiempos), "repeticiones": len(tiempos)}
+              for hito, tiempos in muestras.items()}
+    return {"filas": 0, "etapas": etapas}
+
+
+def ejecutar(tamanos, repeticiones=5, arranque=0):
+    resultados = {str(n): medir_tamano(n, repeticiones) for n in tamanos}
+    if arranque:
+        resultados["arranque"] = medir_arranque(arranque)
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "maquina": platform.platform(),
+        "resultados": resultados,
+    }
+
+# Nombre de un grupo de resultados: cantidad de filas o 'arranque'
+
+def titulo_grupo(filas):
+    return f"{int(filas):,} filas" if filas.isdigit() else filas
+
+# Esta función compara con un resultado anterior y devuelve las etapas que empeoraron más que el umbral
+
+def comparar(actual, anterior, umbral):
+    regresiones = []
+    for filas, resultado in actual["resultados"].items():
+        previo = anterior.get("resultados", {}).get(filas)
+        if previo is None:
+            continue
+        for etapa, medicion in resultado["etapas"].items():
+            if etapa not in previo["etapas"]:
+                continue
+            antes = previo["etapas"][etapa]["mediana_ms"]
+            ahora = medicion["mediana_ms"]
+            if antes > 0 and ahora / antes - 1 > umbral:
+                regresiones.append({"filas": filas, "etapa": etapa, "antes_ms": antes, "ahora_ms": ahora,
+                                    "cambio": ahora / antes - 1})
+    return regresiones
+
+
+def imprimir(resultado):
+    for filas, datos in resultado["resultados"].items():
+        print(f"\n{titulo_grupo(filas)}")
+        for etapa, medicion in datos["etapas"].items():
+            print(f"  {etapa:<26} {medicion['mediana_ms']:>10.3f} ms  (min {medicion['min_ms']:.3f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de puntaje, filtros, top-N y radar")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--salida", help="Guardar los resultados en JSON")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior para detectar regresiones")
+    parser.add_argument("--arranque", type=int, default=0, metavar="N",
+                        help="Medir también el arranque en frío de la app con N procesos nuevos")
+    parser.add_argument("--umbral", type=float, default=0.25, help="Empeoramiento relativo permitido (0.25 = 25 %%)")
+    args = parser.parse_args(argv)
+
+    resultado = ejecutar(args.tamanos, args.repeticiones, args.arranque)
+    imprimir(resultado)
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(resultado, indent=2), encoding="utf-8")
+
+    if args.comparar:
+        anterior = json.loads(Path(args.comparar).read_text(encoding="utf-8"))
+        regresiones = comparar(resultado, anterior, args.umbral)
+        for r in regresiones:
+            print(f"REGRESIÓN {titulo_grupo(r['filas'])} / {r['etapa']}: {r['antes_ms']:.3f} -> {r['ahora_ms']:.3f} ms "
+                  f"(+{r['cambio']:.0%})")
+        if regresiones:
+            return 1
+        print(f"\nSin regresiones sobre {args.comparar} (umbral {args.umbral:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from metrics_config import role_metrics
+from radar_utils import calcular_puntajes
+
+# Bocetos de cuantiles KLL (Karnin, Lang y Liberty) para percentiles aproximados sobre exports muy grandes
+# Cada boceto guarda niveles de valores ordenables; un valor en el nivel h representa 2^h valores originales.
+# Cuando un nivel se pasa de su capacidad se ordena y se sube uno de cada dos (con un desfase al azar),
+# así la memoria queda acotada (como máximo ~3k valores) y el error de rango es aditivo: del orden
+# de 3.3/k del total con alta probabilidad (k=200 -> ~1.7 puntos de percentil)
+# Dos bocetos se fusionan uniendo sus niveles: cada bloque (o cada proceso) arma los suyos y después se combinan
+#
+# Con los mismos valores que rankdata(method='average') el percentil es (menores + (iguales + 1) / 2) / n * 100
+
+K_BOCETO = 200
+FACTOR_CAPACIDAD = 2 / 3
+
+# Cota orientativa del error en puntos de percentil para un k (3.3/k del total, ver arriba)
+
+def cota_error(k):
+    return 330 / k
+
+
+class BocetoKLL:
+
+    def __init__(self, k=K_BOCETO, semilla=0):
+        self.k = k
+        self.n = 0
+        self.niveles = [np.empty(0)]
+        self._azar = np.random.default_rng(semilla)
+        self._congelado = None
+
+    # Capacidad del nivel h: el más alto guarda k valores y cada nivel de abajo 2/3 del de arriba
+
+    def capacidad(self, h):
+        return max(2, int(math.ceil(self.k * FACTOR_CAPACIDAD ** (len(self.niveles) - 1 - h))))
+
+    def agregar(self, valores):
+        valores = np.asarray(valores, dtype=float).ravel()
+        valores = valores[~np.isnan(valores)]
+        if len(valores):
+            self.niveles[0] = np.concatenate([self.niveles[0], valores])
+            self.n += len(valores)
+            self._compactar()
+
+    # Sube la mitad de cada nivel lleno al siguiente hasta que todos entran en su capacidad
+    # (agregar un nivel achica la capacidad de los de abajo, por eso se repite)
+
+    def _compactar(self):
+        self._congelado = None
+        compactado = True
+        while compactado:
+            compactado = False
+            for h in range(len(self.niveles)):
+                nivel = self.niveles[h]
+                if len(nivel) <= self.capacidad(h):
+                    continue
+                if h + 1 == len(self.niveles):
+                    self.niveles.append(np.empty(0))
+                nivel = np.sort(nivel)
+                # Con una cantidad impar el último queda en el nivel; el peso total no cambia
+                pares = len(nivel) - len(nivel) % 2
+                self.niveles[h + 1] = np.concatenate([self.niveles[h + 1], nivel[self._azar.integers(2):pares:2]])
+                self.niveles[h] = nivel[pares:]
+                compactado = True
+                break
+
+    def fusionar(self, otro):
+        if otro.k != self.k:
+            raise ValueError(f"Solo se fusionan bocetos con el mismo k ({self.k} y {otro.k})")
+        while len(self.niveles) < len(otro.niveles):
+            self.niveles.append(np.empty(0))
+        for h, nivel in enumerate(otro.niveles):
+            self.niveles[h] = np.concatenate([self.niveles[h], nivel])
+        self.n += otro.n
+        self._compactar()
+        return self
+
+    # Valores guardados ordenados con sus pesos acumulados (se arma una vez por cada estado del boceto)
+
+    def _orden(self):
+        if self._congelado is None:
+            valores = np.concatenate(self.niveles)
+            pesos = np.concatenate([np.full(len(nivel), 2.0 ** h) for h, nivel in enumerate(self.niveles)])
+            orden = np.argsort(valores, kind="stable")
+            self._congelado = (valores[orden], np.concatenate([[0.0], np.cumsum(pesos[orden])]))
+        return self._congelado
+
+    # Esta función devuelve el percentil aproximado (0-100) de cada valor
+
+    def percentiles(self, valores):
+        valores = np.asarray(valores, dtype=float)
+        if self.n == 0:
+            return np.full(valores.shape, np.nan)
+        ordenados, acumulados = self._orden()
+        menores = acumulados[np.searchsorted(ordenados, valores, side="left")]
+        iguales = acumulados[np.searchsorted(ordenados, valores, side="right")] - menores
+        return np.clip((menores + (iguales + 1) / 2) / self.n * 100, 0.0, 100.0)
+
+    def cuantil(self, q):
+        ordenados, acumulados = self._orden()
+        return ordenados[min(np.searchsorted(acumulados[1:], q * self.n, side="left"), len(ordenados) - 1)]
+
+    def guardados(self):
+        return sum(len(nivel) for nivel in self.niveles)
+
+    def a_dict(self):
+        return {"k": self.k, "n": self.n, "niveles": [nivel.tolist() for nivel in self.niveles]}
+
+    @classmethod
+    def desde_dict(cls, datos, semilla=0):
+        boceto = cls(datos["k"], semilla)
+        boceto.n = datos["n"]
+        boceto.niveles = [np.asarray(nivel, dtype=float) for nivel in datos["niveles"]]
+        return boceto
+
+
+class BocetosPercentiles:
+
+    def __init__(self, k=K_BOCETO, config=None, semilla=0):
+        self.k = k
+        self.config = config or role_metrics
+        self.bocetos = {}
+        for i, (rol, pesos_rol) in enumerate(self.config.items()):
+            for j, categoria in enumerate(pesos_rol):
+                self.bocetos[(rol, categoria)] = BocetoKLL(k, semilla * 1000 + i * 100 + j)
+
+    @property
+    def n(self):
+        return max((boceto.n for boceto in self.bocetos.values()), default=0)
+
+    # Esta función agrega un bloque de jugadores: puntajes ponderados por categoría de cada rol
+    # (el puntaje de un jugador depende solo de su fila, así que el bloque se puntúa por separado)
+
+    def agregar_bloque(self, df):
+        for rol, pesos_rol in self.config.items():
+            puntajes, categorias = calcular_puntajes(df, pesos_rol)
+            for j, categoria in enumerate(categorias):
+                self.bocetos[(rol, categoria)].agregar(puntajes[:, j])
+        return self
+
+    def fusionar(self, otro):
+        for clave, boceto in otro.bocetos.items():
+            self.bocetos[clave].fusionar(boceto)
+        return self
+
+    # Esta función devuelve la misma tabla que calcular_percentiles (unique_col, categorías y 'Promedio')
+    # para los jugadores de df, con percentiles aproximados contra todos los jugadores ingeridos
+
+    def percentiles(self, df, rol, unique_col="UniqueID"):
+        puntajes, categorias = calcular_puntajes(df, self.config[rol])
+        df_resultados = pd.DataFrame({categoria: self.bocetos[(rol, categoria)].percentiles(puntajes[:, j])
+                                      for j, categoria in enumerate(categorias)})
+        df_resultados.insert(0, unique_col, df[unique_col].to_numpy())
+        df_resultados['Promedio'] = df_resultados[categorias].mean(axis=1)
+        return df_resultados, categorias
+
+    # Valores guardados y bytes de todos los bocetos (no crece con la cantidad de filas)
+
+    def memoria(self):
+        valores = sum(boceto.guardados() for boceto in self.bocetos.values())
+        return {"bocetos": len(self.bocetos), "valores": valores, "bytes": valores * 8}
+
+    def guardar(self, ruta):
+        datos = {"k": self.k, "bocetos": [{"rol": rol, "categoria": categoria, **boceto.a_dict()}
+                                          for (rol, categoria), boceto in self.bocetos.items()]}
+        with open(ruta, "w", encoding="utf-8") as archivo:
+            json.dump(datos, archivo, ensure_ascii=False)
+
+    @classmethod
+    def cargar(cls, ruta, config=None):
+        with open(ruta, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        bocetos = cls(datos["k"], config)
+        for guardado in datos["bocetos"]:
+            clave = (guardado["rol"], guardado["categoria"])
+            if clave in bocetos.bocetos:
+                bocetos.bocetos[clave] = BocetoKLL.desde_dict(guardado)
+        return bocetos
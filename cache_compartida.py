@@ -0,0 +1,222 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from instrumentacion import registrar_cache
+
+# Caché de proceso compartida por todas las sesiones de Streamlit para los artefactos caros
+# (datos, tablas de percentiles, índices, tablas de ranking, figuras e imágenes)
+#
+# - Un solo LRU global con presupuesto de memoria (RADAR_CACHE_MB); al pasarse se expulsan las entradas
+#   usadas hace más tiempo, de cualquier espacio
+# - Cada espacio puede tener además un máximo de entradas y un TTL en segundos
+# - Cada entrada declara de qué versiones de datos depende; cuando una fuente cambia de versión se invalidan
+#   sus entradas y, en cadena, las que dependen de las versiones que esas entradas producían
+# - Contadores de aciertos, fallos, expulsiones y vencidos por espacio
+
+PRESUPUESTO_MB = float(os.environ.get("RADAR_CACHE_MB", "512"))
+
+# Vida de los artefactos de cada interacción (tablas filtradas, CSV, figuras, imágenes), en segundos
+TTL_INTERACCION = int(os.environ.get("RADAR_CACHE_TTL", "1800"))
+
+
+class Entrada:
+
+    __slots__ = ("valor", "tamano", "versiones", "produce", "vence")
+
+    def __init__(self, valor, tamano, versiones, produce, vence):
+        self.valor = valor
+        self.tamano = tamano
+        self.versiones = frozenset(versiones)
+        self.produce = produce
+        self.vence = vence
+
+# Bytes fijos por figura de Plotly (layout, nombres de trazas y estructura) además de sus arreglos
+BYTES_FIGURA = 16 * 1024
+
+# Esta función estima los bytes de una figura de Plotly sin serializarla: los arreglos de cada traza
+# (también dentro de marker, line...) más las imágenes embebidas del layout y un fijo por figura
+
+def tamano_figura(figura):
+    tamano = BYTES_FIGURA
+    for traza in figura.data:
+        propiedades = list(traza.to_plotly_json().values())
+        while propiedades:
+            valor = propiedades.pop()
+            if isinstance(valor, dict):
+                propiedades.extend(valor.values())
+            elif isinstance(valor, (list, tuple, np.ndarray)):
+                tamano += int(np.asarray(valor).nbytes)
+    for imagen in figura.layout.images:
+        if isinstance(imagen.source, str):
+            tamano += len(imagen.source)
+    return tamano
+
+# Esta función estima los bytes de un valor guardado (DataFrame, arreglos, bytes y objetos que los contienen)
+# Los objetos que comparten memoria se cuentan dos veces: la estimación es conservadora
+
+def tamano_objeto(valor, vistos=None):
+    vistos = set() if vistos is None else vistos
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True, index=True).sum())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if hasattr(valor, "to_plotly_json"):
+        return tamano_figura(valor)
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (bytes, bytearray, str)):
+        return sys.getsizeof(valor)
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamano_objeto(k, vistos) + tamano_objeto(v, vistos) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(tamano_objeto(v, vistos) for v in valor)
+    if hasattr(valor, "__dict__"):
+        return sys.getsizeof(valor) + tamano_objeto(vars(valor), vistos)
+    return sys.getsizeof(valor)
+
+
+class CacheCompartida:
+
+    def __init__(self, presupuesto_bytes):
+        self.presupuesto = presupuesto_bytes
+        self._entradas = OrderedDict()   # (espacio, clave) -> Entrada, de la menos a la más usada
+        self._limites = {}               # espacio -> (max_entradas, ttl)
+        self._contadores = {}            # espacio -> {'aciertos', 'fallos', 'expulsiones', 'vencidos'}
+        self._construyendo = {}          # (espacio, clave) -> Lock, para no construir dos veces lo mismo
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def configurar_espacio(self, espacio, max_entradas=None, ttl=None):
+        self._limites[espacio] = (max_entradas, ttl)
+
+    def _contar(self, espacio, contador):
+        contadores = self._contadores.setdefault(
+            espacio, {"aciertos": 0, "fallos": 0, "expulsiones": 0, "vencidos": 0})
+        contadores[contador] += 1
+
+    def _quitar(self, llave):
+        entrada = self._entradas.pop(llave)
+        self._bytes -= entrada.tamano
+        return entrada
+
+    # Busca sin construir (con el lock tomado); las entradas vencidas se descartan aquí
+
+    def _buscar(self, llave):
+        entrada = self._entradas.get(llave)
+        if entrada is None:
+            return None
+        if entrada.vence is not None and time.monotonic() > entrada.vence:
+            self._quitar(llave)
+            self._contar(llave[0], "vencidos")
+            return None
+        self._entradas.move_to_end(llave)
+        return entrada
+
+    # Expulsa por límite de entradas del espacio y por presupuesto global (nunca la entrada recién guardada)
+
+    def _expulsar(self, llave_nueva):
+        espacio = llave_nueva[0]
+        max_entradas = self._limites.get(espacio, (None, None))[0]
+        if max_entradas is not None:
+            del_espacio = [k for k in self._entradas if k[0] == espacio]
+            for llave in del_espacio[:max(len(del_espacio) - max_entradas, 0)]:
+                self._quitar(llave)
+                self._contar(espacio, "expulsiones")
+        for llave in list(self._entradas):
+            if self._bytes <= self.presupuesto:
+                break
+            if llave != llave_nueva:
+                self._quitar(llave)
+                self._contar(llave[0], "expulsiones")
+
+    def buscar(self, espacio, clave):
+        with self._lock:
+            entrada = self._buscar((espacio, clave))
+            self._contar(espacio, "aciertos" if entrada is not None else "fallos")
+        registrar_cache(entrada is not None)
+        return None if entrada is None else entrada.valor
+
+    def guardar(self, espacio, clave, valor, versiones=(), produce=None, ttl=None):
+        llave = (espacio, clave)
+        ttl = ttl if ttl is not None else self._limites.get(espacio, (None, None))[1]
+        entrada = Entrada(valor, tamano_objeto(valor), versiones, produce,
+                          time.monotonic() + ttl if ttl else None)
+        with self._lock:
+            if llave in self._entradas:
+                self._quitar(llave)
+            self._entradas[llave] = entrada
+            self._bytes += entrada.tamano
+            self._expulsar(llave)
+        return valor
+
+    # Esta función devuelve el valor de la clave o lo construye una sola vez aunque lo pidan varias sesiones
+    # versiones: versiones de datos de las que depende; produce: versión que define (p. ej. una unión)
+
+    def obtener(self, espacio, clave, construir, versiones=(), produce=None, ttl=None):
+        llave = (espacio, clave)
+        with self._lock:
+            entrada = self._buscar(llave)
+            if entrada is not None:
+                self._contar(espacio, "aciertos")
+            else:
+                self._contar(espacio, "fallos")
+                candado = self._construyendo.setdefault(llave, threading.Lock())
+        registrar_cache(entrada is not None)
+        if entrada is not None:
+            return entrada.valor
+
+        with candado:
+            with self._lock:
+                entrada = self._buscar(llave)
+            if entrada is not None:
+                return entrada.valor
+            try:
+                return self.guardar(espacio, clave, construir(), versiones, produce, ttl)
+            finally:
+                with self._lock:
+                    self._construyendo.pop(llave, None)
+
+    # Esta función invalida las entradas que dependen de las versiones dadas (y de lo que ellas producían)
+
+    def invalidar_versiones(self, *versiones):
+        pendientes = set(versiones)
+        vistas = set()
+        with self._lock:
+            while pendientes:
+                vistas |= pendientes
+                afectadas = [k for k, e in self._entradas.items() if e.versiones & pendientes]
+                pendientes = set()
+                for llave in afectadas:
+                    entrada = self._quitar(llave)
+                    if entrada.produce is not None and entrada.produce not in vistas:
+                        pendientes.add(entrada.produce)
+
+    # Contadores y ocupación por espacio, más el total
+
+    def estadisticas(self):
+        with self._lock:
+            espacios = {}
+            for (espacio, _), entrada in self._entradas.items():
+                datos = espacios.setdefault(espacio, {"entradas": 0, "bytes": 0})
+                datos["entradas"] += 1
+                datos["bytes"] += entrada.tamano
+            for espacio, contadores in self._contadores.items():
+                espacios.setdefault(espacio, {"entradas": 0, "bytes": 0}).update(contadores)
+            return {
+                "presupuesto_bytes": self.presupuesto,
+                "bytes": self._bytes,
+                "entradas": len(self._entradas),
+                "espacios": espacios,
+            }
+
+
+CACHE = CacheCompartida(int(PRESUPUESTO_MB * 1024 * 1024))
@@ -0,0 +1,201 @@
+import argparse
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.client import HTTPConnection
+from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+
+# Generador de carga local para servicio.py: varios hilos con conexiones persistentes repiten una mezcla
+# de consultas (ranking, percentiles por lote, radar y lotes) y se reportan solicitudes/s y latencias por ruta
+#
+# Uso:
+#   python carga_servicio.py --hilos 8 --segundos 10                 (levanta el servicio en un proceso aparte)
+#   python carga_servicio.py --url http://127.0.0.1:8502 --etag      (servicio ya corriendo; revalida con If-None-Match)
+#   python carga_servicio.py --salida carga.json
+
+MEZCLA = {"ranking": 4, "percentiles": 3, "radar": 1, "lote": 2}
+
+# Esta función levanta el servicio en otro proceso (puerto libre) y devuelve (proceso, url)
+
+def levantar_servicio(datos=None):
+    comando = [sys.executable, str(Path(__file__).resolve().parent / "servicio.py"), "--puerto", "0"]
+    if datos:
+        comando += ["--datos", datos]
+    proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True)
+    linea = proceso.stdout.readline()
+    coincidencia = re.search(r"http://\S+", linea)
+    if coincidencia is None:
+        proceso.kill()
+        raise RuntimeError(f"El servicio no arrancó: {linea!r}")
+    return proceso, coincidencia.group(0)
+
+
+def pedir(conexion, metodo, ruta, cuerpo=None, encabezados=None):
+    encabezados = dict(encabezados or {})
+    datos = None
+    if cuerpo is not None:
+        datos = json.dumps(cuerpo).encode("utf-8")
+        encabezados["Content-Type"] = "application/json"
+    conexion.request(metodo, ruta, body=datos, headers=encabezados)
+    respuesta = conexion.getresponse()
+    return respuesta.status, respuesta.getheader("ETag"), respuesta.read()
+
+# Esta función arma el conjunto de consultas a partir de lo que publica el servicio (roles, países, jugadores)
+
+def preparar_consultas(conexion, cantidad=200, semilla=0):
+    azar = random.Random(semilla)
+    _, _, cuerpo = pedir(conexion, "GET", "/salud")
+    salud = json.loads(cuerpo)
+    ids = {}
+    for rol in salud["roles"]:
+        _, _, cuerpo = pedir(conexion, "GET", "/ranking?" + urlencode({"rol": rol, "minutos": 0, "limite": 500}))
+        ids[rol] = [j["UniqueID"] for j in json.loads(cuerpo)["jugadores"]]
+
+    def filtros():
+        parametros = {"rol": azar.choice(salud["roles"]), "minutos": azar.choice([0, 100, 270, 500]),
+                      "idioma": azar.choice(["es", "en"])}
+        if azar.random() < 0.5:
+            parametros["pais"] = azar.choice(salud["paises"])
+        if azar.random() < 0.3:
+            edad = azar.randint(16, 30)
+            parametros["edad"] = f"{edad}-{edad + azar.randint(2, 10)}"
+        return parametros
+
+    consultas = []
+    tipos = [tipo for tipo, peso in MEZCLA.items() for _ in range(peso)]
+    for _ in range(cantidad):
+        tipo = azar.choice(tipos)
+        parametros = filtros()
+        if tipo == "ranking":
+            parametros["limite"] = azar.choice([10, 50, 100])
+            consultas.append((tipo, "GET", "/ranking?" + urlencode(parametros), None))
+        elif tipo == "percentiles":
+            disponibles = ids[parametros["rol"]]
+            parametros["ids"] = azar.sample(disponibles, min(len(disponibles), azar.choice([5, 25, 100])))
+            consultas.append((tipo, "POST", "/percentiles", parametros))
+        elif tipo == "radar":
+            parametros["formato"] = "especificacion"
+            consultas.append((tipo, "GET", "/radar?" + urlencode(parametros), None))
+        else:
+            lote = [{"ruta": "/ranking", "parametros": dict(filtros(), limite=10)} for _ in range(5)]
+            consultas.append((tipo, "POST", "/lote", {"consultas": lote}))
+    return consultas
+
+# Esta función repite las consultas desde varios hilos durante segundos y devuelve el reporte
+# Con etag=True cada hilo recuerda el ETag de cada consulta y lo manda en If-None-Match (clientes que revalidan)
+
+def ejecutar_carga(url, consultas, hilos=8, segundos=10.0, etag=False):
+    partes = urlsplit(url)
+    muestras = []
+    lock = threading.Lock()
+    fin = time.perf_counter() + segundos
+
+    def trabajador(numero):
+        conexion = HTTPConnection(partes.hostname, partes.port, timeout=60)
+        etags = {}
+        propias = []
+        i = numero
+        while time.perf_counter() < fin:
+            j = i % len(consultas)
+            i += hilos
+            tipo, metodo, ruta, cuerpo = consultas[j]
+            encabezados = {"If-None-Match": etags[j]} if etag and j in etags else {}
+            inicio = time.perf_counter()
+            estado, etiqueta, datos = pedir(conexion, metodo, ruta, cuerpo, encabezados)
+            propias.append((tipo, estado, time.perf_counter() - inicio, len(datos)))
+            if etiqueta and metodo == "GET":
+                etags[j] = etiqueta
+        conexion.close()
+        with lock:
+            muestras.extend(propias)
+
+    inicio = time.perf_counter()
+    trabajadores = [threading.Thread(target=trabajador, args=(n,)) for n in range(hilos)]
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    duracion = time.perf_counter() - inicio
+    return reporte_carga(muestras, duracion, hilos)
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))]
+
+
+def reporte_carga(muestras, duracion, hilos):
+    rutas = {}
+    for tipo in sorted({m[0] for m in muestras}):
+        tiempos = [m[2] * 1000 for m in muestras if m[0] == tipo]
+        estados = {}
+        for m in muestras:
+            if m[0] == tipo:
+                estados[str(m[1])] = estados.get(str(m[1]), 0) + 1
+        rutas[tipo] = {"solicitudes": len(tiempos), "mediana_ms": statistics.median(tiempos),
+                       "p95_ms": _percentil(tiempos, 95), "p99_ms": _percentil(tiempos, 99), "estados": estados,
+                       "bytes_promedio": statistics.mean(m[3] for m in muestras if m[0] == tipo)}
+    tiempos = [m[2] * 1000 for m in muestras]
+    return {
+        "hilos": hilos,
+        "segundos": duracion,
+        "solicitudes": len(muestras),
+        "solicitudes_por_segundo": len(muestras) / duracion if duracion else None,
+        "errores": sum(1 for m in muestras if m[1] >= 400),
+        "mediana_ms": statistics.median(tiempos) if tiempos else None,
+        "p95_ms": _percentil(tiempos, 95) if tiempos else None,
+        "rutas": rutas,
+    }
+
+
+def imprimir_reporte(reporte):
+    print(f"{'ruta':<12} {'solic.':>8} {'mediana':>9} {'p95':>9} {'p99':>9} {'bytes':>9}  estados")
+    for tipo, r in reporte["rutas"].items():
+        print(f"{tipo:<12} {r['solicitudes']:>8} {r['mediana_ms']:>8.2f}  {r['p95_ms']:>8.2f}  {r['p99_ms']:>8.2f}  "
+              f"{r['bytes_promedio']:>8.0f}  {r['estados']}")
+    print(f"\n{reporte['solicitudes']} solicitudes en {reporte['segundos']:.1f} s con {reporte['hilos']} hilos: "
+          f"{reporte['solicitudes_por_segundo']:.0f} solicitudes/s, mediana {reporte['mediana_ms']:.2f} ms, "
+          f"p95 {reporte['p95_ms']:.2f} ms, {reporte['errores']} errores")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga local del servicio JSON")
+    parser.add_argument("--url", help="Servicio ya corriendo (por defecto se levanta uno en un proceso aparte)")
+    parser.add_argument("--datos", help="Archivo Excel o URL para el servicio que se levanta")
+    parser.add_argument("--hilos", type=int, default=8)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--consultas", type=int, default=200, help="Consultas distintas de la mezcla")
+    parser.add_argument("--etag", action="store_true", help="Revalidar con If-None-Match (respuestas 304)")
+    parser.add_argument("--salida", help="Guardar el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    proceso = None
+    url = args.url
+    if url is None:
+        proceso, url = levantar_servicio(args.datos)
+    try:
+        partes = urlsplit(url)
+        conexion = HTTPConnection(partes.hostname, partes.port, timeout=120)
+        consultas = preparar_consultas(conexion, args.consultas)
+        conexion.close()
+        # Una pasada de calentamiento: la carga mide el estado estable (tablas y respuestas en memoria)
+        ejecutar_carga(url, consultas, hilos=1, segundos=min(args.segundos, 2.0))
+        reporte = ejecutar_carga(url, consultas, args.hilos, args.segundos, args.etag)
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait()
+    imprimir_reporte(reporte)
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(reporte, indent=2), encoding="utf-8")
+    return 1 if reporte["errores"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import hashlib
+from pathlib import Path
+from urllib.parse import unquote
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from cache_compartida import CACHE
+from data_loader import FUENTE_DATOS, RUTA_DATOS, cargar_datos, uso_memoria
+
+# Registro de competiciones: cada export de Wyscout en data/ es una competición (nombre = nombre del archivo)
+# Cada competición se carga recién cuando se selecciona, con la caché por versión de data_loader
+# La unión de varias competiciones guarda club, país y posiciones como categóricos compartidos (códigos enteros)
+
+DIRECTORIO_DATOS = RUTA_DATOS.parent
+# Solo .xlsx: el lector es openpyxl (los .xls necesitarían xlrd)
+EXTENSIONES = (".xlsx",)
+COLUMNA_COMPETICION = "Competition"
+COLUMNAS_CATEGORICAS = ["Team", "Birth country", "Position", "Primary position"]
+
+
+def nombre_competicion(fuente):
+    return unquote(Path(str(fuente)).stem)
+
+# Esta función descubre las competiciones disponibles: nombre -> ruta
+# La fuente configurada (RADAR_DATOS, puede ser una URL) reemplaza al archivo local del mismo nombre
+
+def descubrir_competiciones(directorio=DIRECTORIO_DATOS):
+    registro = {}
+    for ruta in sorted(Path(directorio).iterdir()):
+        if ruta.suffix.lower() in EXTENSIONES and not ruta.name.startswith("~$"):
+            registro[nombre_competicion(ruta)] = str(ruta)
+    registro[nombre_competicion(FUENTE_DATOS)] = str(FUENTE_DATOS)
+    return registro
+
+# Esta función une las tablas de varias competiciones sin repetir los textos de cada fila
+# Los UniqueID que aparecen en más de una competición se desambiguan con el nombre de la competición
+# Una columna Competition que ya traiga el export se reemplaza por la de la unión (nombre de cada archivo)
+
+def unir_competiciones(tablas, id_column="UniqueID"):
+    nombres = list(tablas)
+    partes = [tablas[n] for n in nombres]
+    categoricas = [c for c in partes[0].columns if all(c in p.columns for p in partes) and c != COLUMNA_COMPETICION
+                   and (c in COLUMNAS_CATEGORICAS or all(isinstance(p[c].dtype, pd.CategoricalDtype) for p in partes))]
+
+    union = pd.concat([p.drop(columns=categoricas + [COLUMNA_COMPETICION], errors="ignore") for p in partes],
+                      ignore_index=True)
+    codigos = np.repeat(np.arange(len(partes), dtype=np.int16), [len(p) for p in partes])
+    extra = {c: union_categoricals([p[c].astype("category") for p in partes]) for c in categoricas}
+    extra[COLUMNA_COMPETICION] = pd.Categorical.from_codes(codigos, categories=nombres)
+    union = pd.concat([union, pd.DataFrame(extra)], axis=1)
+    orden = [c for c in partes[0].columns if c in union.columns]
+    union = union[orden + [c for c in union.columns if c not in orden]]
+
+    repetidos = union[id_column].duplicated(keep=False)
+    if repetidos.any():
+        union.loc[repetidos, id_column] = (union.loc[repetidos, id_column] + " · "
+                                           + union.loc[repetidos, COLUMNA_COMPETICION].astype(str))
+
+    union.attrs = {}
+    if all(parte.attrs.get("memoria") for parte in partes):
+        union.attrs["memoria"] = {"bytes_excel": sum(p.attrs["memoria"]["bytes_excel"] for p in partes),
+                                  "columnas_excel": max(p.attrs["memoria"]["columnas_excel"] for p in partes),
+                                  "bytes": uso_memoria(union), "columnas": len(union.columns)}
+    return union
+
+# Esta función devuelve (df, version, fuente) de la selección de competiciones
+# Con una sola competición es su tabla tal cual; con varias, la unión (caché compartida por versión)
+# La unión depende de las versiones de sus competiciones: si alguna cambia, se invalida con todo lo derivado
+
+def cargar_seleccion(nombres, registro=None):
+    registro = registro or descubrir_competiciones()
+    cargadas = {nombre: cargar_datos(registro[nombre]) for nombre in nombres}
+    if len(cargadas) == 1:
+        nombre, (df, version) = next(iter(cargadas.items()))
+        return df, version, registro[nombre]
+
+    clave = "+".join(f"{nombre}:{version}" for nombre, (_, version) in cargadas.items())
+    version = hashlib.sha256(clave.encode("utf-8")).hexdigest()[:12]
+    union = CACHE.obtener("union", version,
+                          lambda: unir_competiciones({nombre: df for nombre, (df, _) in cargadas.items()}),
+                          versiones=[v for _, v in cargadas.values()], produce=version)
+    return union, version, "union-" + "+".join(sorted(nombres))
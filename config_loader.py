@@ -0,0 +1,107 @@
+import ast
+import math
+import numbers
+from functools import lru_cache
+from pathlib import Path
+
+import metrics_config
+
+IDIOMAS = ('es', 'en')
+
+# Error de configuración de métricas: se lanza al arrancar, antes de calcular nada
+
+class ConfigError(ValueError):
+    pass
+
+# Esta función busca claves repetidas en los diccionarios literales de un archivo de configuración
+# Python se queda en silencio con la última, así que se revisa el código fuente
+
+def claves_duplicadas(ruta):
+    arbol = ast.parse(Path(ruta).read_text(encoding="utf-8"))
+    duplicadas = []
+    for nodo in ast.walk(arbol):
+        if not isinstance(nodo, ast.Dict):
+            continue
+        vistas = set()
+        for clave in nodo.keys:
+            if isinstance(clave, ast.Constant):
+                if clave.value in vistas:
+                    duplicadas.append((clave.lineno, clave.value))
+                vistas.add(clave.value)
+    return duplicadas
+
+# Esta función valida el modelo canónico: etiquetas completas y únicas, pesos numéricos, finitos y distintos de 0,
+# posiciones asignadas a un solo rol y, si se entregan las columnas del archivo, que todas las métricas existan
+# numericas: columnas numéricas del archivo; una métrica que llega como texto no se puede puntuar
+
+def validar_config(role_metrics, category_labels, columnas=None, positions_by_role=None, numericas=None):
+    errores = []
+
+    if positions_by_role is not None:
+        vistas = {}
+        for rol, posiciones in positions_by_role.items():
+            if rol not in role_metrics:
+                errores.append(f"posiciones para un rol sin métricas: '{rol}'")
+            for posicion in posiciones:
+                if posicion in vistas:
+                    errores.append(f"la posición '{posicion}' está en {vistas[posicion]} y en {rol}")
+                vistas[posicion] = rol
+
+    for idioma in IDIOMAS:
+        etiquetas = [e.get(idioma) for e in category_labels.values()]
+        if None in etiquetas:
+            errores.append(f"hay categorías sin etiqueta en '{idioma}'")
+        repetidas = sorted({e for e in etiquetas if e is not None and etiquetas.count(e) > 1})
+        if repetidas:
+            errores.append(f"etiquetas repetidas en '{idioma}': {repetidas}")
+
+    columnas = set(columnas) if columnas is not None else None
+    numericas = set(numericas) if numericas is not None else None
+    for rol, categorias in role_metrics.items():
+        if not categorias:
+            errores.append(f"{rol}: sin categorías")
+        for categoria, pesos in categorias.items():
+            if categoria not in category_labels:
+                errores.append(f"{rol}: categoría desconocida '{categoria}'")
+            if not pesos:
+                errores.append(f"{rol} / {categoria}: sin métricas")
+            for metrica, peso in pesos.items():
+                if not isinstance(peso, numbers.Real) or isinstance(peso, bool):
+                    errores.append(f"{rol} / {categoria} / {metrica}: peso no numérico {peso!r}")
+                elif not math.isfinite(peso) or peso == 0:
+                    errores.append(f"{rol} / {categoria} / {metrica}: peso no finito o 0 ({peso!r})")
+                if columnas is not None and metrica not in columnas:
+                    errores.append(f"{rol} / {categoria}: columna desconocida '{metrica}'")
+                elif numericas is not None and metrica not in numericas:
+                    errores.append(f"{rol} / {categoria}: la columna '{metrica}' no es numérica")
+
+    if errores:
+        raise ConfigError("Configuración de métricas inválida:\n- " + "\n- ".join(errores))
+
+# Esta función carga y valida metrics_config al arrancar la app
+# Con un dataframe se validan también sus columnas: nombres y tipo numérico de cada métrica
+# Devuelve el modelo canónico (role_metrics, category_labels); la validación se hace una vez por esquema
+
+def cargar_config(df=None):
+    if df is None:
+        return _cargar_config(None, None)
+    return _cargar_config(tuple(df.columns), tuple(df.select_dtypes("number").columns))
+
+
+@lru_cache(maxsize=8)
+def _cargar_config(columnas, numericas):
+    duplicadas = claves_duplicadas(metrics_config.__file__)
+    if duplicadas:
+        detalle = ", ".join(f"'{clave}' (línea {linea})" for linea, clave in duplicadas)
+        raise ConfigError(f"Claves repetidas en metrics_config.py: {detalle}")
+
+    role_metrics = metrics_config.role_metrics
+    category_labels = metrics_config.category_labels
+    validar_config(role_metrics, category_labels, columnas, metrics_config.positions_by_role, numericas)
+    return role_metrics, category_labels
+
+# Etiquetas de las categorías de un rol en el idioma pedido
+
+def etiquetas_categorias(categorias, idioma, category_labels=None):
+    category_labels = category_labels or metrics_config.category_labels
+    return [category_labels[categoria][idioma] for categoria in categorias]
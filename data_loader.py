@@ -0,0 +1,319 @@
+import hashlib
+import os
+import threading
+import time
+from io import BytesIO
+from pathlib import Path
+
+import pandas as pd
+
+from cache_compartida import CACHE
+from instrumentacion import medido
+
+# Archivo incluido en el repositorio y URL pública del mismo archivo
+RUTA_DATOS = Path(__file__).resolve().parent / "data" / "CONMEBOL QUALI.xlsx"
+URL_GITHUB_EXCEL = "https://raw.githubusercontent.com/felipeorma/RADAR-dashboard/main/data/CONMEBOL%20QUALI.xlsx"
+
+# La fuente se puede cambiar con la variable de entorno RADAR_DATOS (ruta local o URL)
+FUENTE_DATOS = os.environ.get("RADAR_DATOS", str(RUTA_DATOS))
+
+# Segundos entre revisiones de una fuente remota (la revisión local es solo un stat)
+INTERVALO_REVISION_URL = 60
+
+# Fuentes (competiciones) que se mantienen en memoria a la vez; las menos usadas se liberan
+MAX_FUENTES = int(os.environ.get("RADAR_MAX_COMPETICIONES", "4"))
+
+# Columnas que usa la app además de las métricas de metrics_config (tablas, filtros y poblaciones)
+# El resto de las columnas del Excel no se cargan en memoria
+COLUMNAS_INTERFAZ = ["Player", "Team", "Position", "Age", "Birth country", "Minutes played", "Contract expires",
+                     "Competition"]
+
+# Un texto se guarda como categórico si tiene a lo sumo esta proporción de valores distintos
+PROPORCION_CATEGORICA = 0.5
+
+# Estado de cada fuente; las tablas procesadas van a la caché compartida (espacio "datos")
+_fuentes = {}      # fuente -> {'firma', 'version', 'revisado', 'usado'}
+_activas = {}      # fuente -> versión que se sirve a las sesiones
+_segundo_plano = threading.Event()
+_lock = threading.Lock()
+
+
+def es_url(fuente):
+    return str(fuente).startswith(("http://", "https://"))
+
+# Esta función crea el identificador único por jugador + club
+# Los jugadores sin club quedan como "Jugador (-)" para no perder su identificador
+
+def crear_unique_id(df):
+    df["UniqueID"] = df["Player"] + " (" + df["Team"].fillna("-") + ")"
+    return df
+
+# Esta función obtiene la posición principal (la primera listada en caso de múltiples)
+
+def crear_posicion_principal(df):
+    df["Primary position"] = df["Position"].str.partition(",")[0].str.strip()
+    return df
+
+# Esta función normaliza los tipos de las métricas: enteros al tipo más chico
+# Los decimales quedan en float64 (el valor exacto del Excel, sin depender de metadatos de la tabla)
+
+def normalizar_tipos(df):
+    for columna in df.columns:
+        serie = df[columna]
+        if pd.api.types.is_integer_dtype(serie):
+            df[columna] = pd.to_numeric(serie, downcast="integer")
+    return df
+
+# Esta función convierte a categóricos los textos que se repiten (club, posición, país...)
+# Cada fila guarda un código entero en lugar del texto
+
+def categorizar_textos(df, proporcion=PROPORCION_CATEGORICA):
+    for columna in df.columns:
+        serie = df[columna]
+        if pd.api.types.is_object_dtype(serie) and serie.nunique() <= proporcion * len(serie):
+            df[columna] = serie.astype("category")
+    return df
+
+# Columnas que se cargan: las de la interfaz más todas las métricas que usa algún rol
+
+def columnas_usadas():
+    return COLUMNAS_INTERFAZ + columnas_metricas()
+
+
+def columnas_metricas():
+    from metrics_config import summarized_metrics
+
+    return sorted({metrica for idiomas in summarized_metrics.values()
+                   for pesos in idiomas["es"].values() for metrica in pesos})
+
+# Identificador de la proyección de columnas (cambia si metrics_config usa otras métricas)
+
+def firma_columnas():
+    return hashlib.sha256("\n".join(columnas_usadas()).encode("utf-8")).hexdigest()[:12]
+
+
+def uso_memoria(df):
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+# Esta función deja lista la tabla que usa la app a partir del Excel tal como viene
+# Compacta la tabla: solo las columnas usadas, enteros chicos y textos repetidos como categóricos
+# El ahorro queda en df.attrs['memoria'] (ver reporte_memoria)
+
+def preparar_tabla(df):
+    memoria_excel, columnas_excel = uso_memoria(df), len(df.columns)
+    usadas = set(columnas_usadas())
+    df = df[[c for c in df.columns if c in usadas]].copy()
+    crear_unique_id(df)
+    crear_posicion_principal(df)
+
+    # Los UniqueID repetidos se resuelven una sola vez aquí: se conserva la primera fila
+    df = df.drop_duplicates("UniqueID", keep="first").reset_index(drop=True)
+    df = categorizar_textos(normalizar_tipos(df))
+    df.attrs["memoria"] = {"bytes_excel": memoria_excel, "columnas_excel": columnas_excel,
+                           "bytes": uso_memoria(df), "columnas": len(df.columns)}
+    return df
+
+# Texto con el ahorro de memoria de la compactación (None si la tabla no lo tiene)
+
+def reporte_memoria(df):
+    memoria = df.attrs.get("memoria")
+    if not memoria:
+        return None
+    return (f"{memoria['columnas']}/{memoria['columnas_excel']} columnas · "
+            f"{memoria['bytes'] / 2**20:.2f} MB en lugar de {memoria['bytes_excel'] / 2**20:.2f} MB "
+            f"({memoria['bytes_excel'] / max(memoria['bytes'], 1):.1f}x menos)")
+
+# Esta función convierte el contenido del Excel en el dataframe que usa la app
+
+@medido("lectura_excel")
+def procesar_excel(contenido):
+    return preparar_tabla(pd.read_excel(BytesIO(contenido)))
+
+
+def _version(contenido):
+    return hashlib.sha256(contenido).hexdigest()[:12]
+
+# Firma barata de un archivo local: si no cambia, no se vuelve a leer el archivo
+
+def _firma_local(ruta):
+    info = os.stat(ruta)
+    return ("local", info.st_mtime_ns, info.st_size)
+
+# Descarga condicional: con ETag / Last-Modified el servidor responde 304 si no hubo cambios
+
+@medido("descarga")
+def _descargar(url, anterior):
+    import requests
+
+    encabezados = {}
+    if anterior and anterior.get("etag"):
+        encabezados["If-None-Match"] = anterior["etag"]
+    if anterior and anterior.get("modificado"):
+        encabezados["If-Modified-Since"] = anterior["modificado"]
+
+    respuesta = requests.get(url, headers=encabezados, timeout=10)
+    if respuesta.status_code == 304:
+        return None
+    respuesta.raise_for_status()
+    firma = {
+        "etag": respuesta.headers.get("ETag"),
+        "modificado": respuesta.headers.get("Last-Modified"),
+    }
+    return respuesta.content, firma
+
+# Esta función revisa la fuente y devuelve (version, cargador, estado)
+# El cargador es None si no hubo cambios; si no, es una función que produce el dataframe
+# estado es lo que queda registrado de la fuente en _fuentes (no se modifica el estado recibido,
+# así la revisión se puede hacer sin _lock)
+
+def _revisar_fuente(fuente, estado):
+    ahora = time.monotonic()
+
+    if es_url(fuente):
+        if estado and ahora - estado["revisado"] < INTERVALO_REVISION_URL:
+            return estado["version"], None, estado
+        try:
+            descarga = _descargar(fuente, estado["firma"] if estado else None)
+        except Exception:
+            # Sin conexión: se usa la última versión conocida o, si no hay, el archivo local
+            if estado:
+                return estado["version"], None, {**estado, "revisado": ahora}
+            version, cargador = _revisar_local(str(RUTA_DATOS), None)
+            return version, cargador, {"firma": None, "version": version, "revisado": ahora}
+        if descarga is None:
+            return estado["version"], None, {**estado, "revisado": ahora}
+        contenido, firma = descarga
+        version = _version(contenido)
+        return version, lambda: procesar_excel(contenido), {**(estado or {}), "firma": firma, "version": version,
+                                                           "revisado": ahora}
+
+    version, cargador = _revisar_local(fuente, estado)
+    if cargador is None:
+        return version, None, estado
+    return version, cargador, {**(estado or {}), "firma": _firma_local(fuente), "version": version, "revisado": ahora}
+
+# Para archivos locales se prefiere el snapshot columnar si fue compilado desde este mismo archivo
+# Si no, se procesa el Excel y se intenta dejar compilado el snapshot para el próximo arranque
+
+def _revisar_local(fuente, estado):
+    import snapshot
+
+    if estado and estado["firma"] == _firma_local(fuente):
+        return estado["version"], None
+
+    ruta_snapshot = snapshot.ruta_snapshot(fuente)
+    version = snapshot.version_si_vigente(ruta_snapshot, fuente)
+    if version is not None:
+        return version, lambda: snapshot.leer_snapshot(ruta_snapshot)
+
+    firma = snapshot.firma_fuente(fuente)
+    contenido = Path(fuente).read_bytes()
+    version = _version(contenido)
+
+    def cargador():
+        df = procesar_excel(contenido)
+        snapshot.intentar_guardar(df, ruta_snapshot, version, firma)
+        return df
+
+    return version, cargador
+
+# Versiones de datos que sigue usando alguna fuente (registrada o activa)
+
+def _versiones_en_uso():
+    return {estado["version"] for estado in _fuentes.values()} | set(_activas.values())
+
+# Esta función revisa la fuente y devuelve (version, df), con _lock tomado
+
+def _cargar(fuente):
+    version, cargador, estado = _revisar_fuente(fuente, _fuentes.get(fuente))
+    _fuentes[fuente] = estado
+    df = CACHE.buscar("datos", version)
+    if df is None:
+        if cargador is None:
+            # La versión es conocida pero su tabla ya no está en memoria
+            version, cargador, estado = _revisar_fuente(fuente, None)
+            _fuentes[fuente] = estado
+        df = CACHE.guardar("datos", version, cargador(), versiones=(version,))
+    return version, df
+
+# Esta función devuelve (df, version) para la fuente configurada
+# Los datos se procesan una sola vez por versión (hash del contenido), no en cada interacción
+# El dataframe es compartido entre sesiones: no se debe modificar en el lugar
+# Con el actualizador en segundo plano activo se sirve la versión activa sin revisar la fuente:
+# la revisión y el cambio de versión los hace actualizar_fuente fuera de las sesiones
+
+def cargar_datos(fuente=None):
+    fuente = str(fuente or FUENTE_DATOS)
+    if _segundo_plano.is_set() and fuente in _activas:
+        version = _activas[fuente]
+        df = CACHE.buscar("datos", version)
+        if df is not None:
+            _fuentes.get(fuente, {})["usado"] = time.monotonic()
+            return df, version
+
+    with _lock:
+        anteriores = _versiones_en_uso()
+        version, df = _cargar(fuente)
+        _activas[fuente] = version
+
+        # Solo quedan registradas las fuentes usadas más recientemente
+        _fuentes[fuente]["usado"] = time.monotonic()
+        for anterior in sorted(_fuentes, key=lambda f: _fuentes[f].get("usado", 0))[:-MAX_FUENTES]:
+            del _fuentes[anterior]
+            _activas.pop(anterior, None)
+
+        # Las versiones que ya no usa ninguna fuente se liberan junto con todo lo calculado a partir de ellas
+        CACHE.invalidar_versiones(*(anteriores - _versiones_en_uso()))
+        return df, version
+
+# Esta función revisa una fuente en segundo plano y, si cambió, deja activa la versión nueva
+# preparar(df, version) construye lo derivado (almacén, índices, percentiles) antes del cambio:
+# mientras tanto las sesiones siguen recibiendo la versión anterior completa
+# La revisión (stat o descarga) y el procesamiento del Excel se hacen sin _lock: mientras tanto las sesiones
+# pueden cargar otras fuentes; el lock se toma solo para registrar la versión y para el cambio
+# Devuelve la versión nueva o None si la fuente no cambió
+
+def actualizar_fuente(fuente, preparar=None):
+    with _lock:
+        activa = _activas.get(fuente)
+        estado = _fuentes.get(fuente)
+
+    version, cargador, estado = _revisar_fuente(fuente, estado)
+    df = CACHE.buscar("datos", version)
+    nuevo = df is None
+    if nuevo:
+        if cargador is None:
+            version, cargador, estado = _revisar_fuente(fuente, None)
+        df = cargador()
+
+    with _lock:
+        usado = _fuentes.get(fuente, {}).get("usado", time.monotonic())
+        _fuentes[fuente] = {**estado, "usado": usado}
+        if nuevo:
+            CACHE.guardar("datos", version, df, versiones=(version,))
+    if version == activa:
+        return None
+
+    if preparar is not None:
+        preparar(df, version)
+
+    with _lock:
+        anteriores = _versiones_en_uso()
+        _activas[fuente] = version
+        CACHE.invalidar_versiones(*(anteriores - _versiones_en_uso()))
+    return version
+
+# Fuentes que se están sirviendo (las que revisa el actualizador)
+
+def fuentes_activas():
+    with _lock:
+        return list(_activas)
+
+# Esta función hace que cargar_datos deje de revisar la fuente en cada llamada (lo hace el actualizador)
+
+def activar_segundo_plano():
+    _segundo_plano.set()
+
+
+def desactivar_segundo_plano():
+    _segundo_plano.clear()
@@ -0,0 +1,36 @@
+from almacen import obtener_almacen
+from competiciones import cargar_seleccion, descubrir_competiciones
+from config_loader import cargar_config
+from data_loader import cargar_datos
+from filtros import obtener_indice
+from precalculo import obtener_tablas, version_tablas
+from referencia import PoblacionReferencia
+
+# Esta función reúne todo lo que se necesita de una versión de datos fuera de Streamlit
+# (tabla, almacén indexado, índice de filtros y tablas de percentiles por rol)
+# Con competiciones se usa la selección del registro (una competición o la unión de varias)
+# referencia y base eligen la población de los percentiles (ver referencia.py); base es una competición de data/
+
+def cargar_dataset(fuente=None, competiciones=None, agrupar_por=None, referencia="todos", base=None):
+    if competiciones:
+        df, version, fuente = cargar_seleccion(competiciones)
+    else:
+        df, version = cargar_datos(fuente)
+    cargar_config(df)
+    almacen = obtener_almacen(df, version)
+
+    poblacion = None
+    if base:
+        df_base, version_base = cargar_datos(descubrir_competiciones()[base])
+        poblacion = PoblacionReferencia(referencia, base=df_base, version_base=version_base)
+    elif referencia != "todos":
+        poblacion = PoblacionReferencia(referencia)
+
+    return {
+        "version": version,
+        "version_tablas": version_tablas(version, agrupar_por, poblacion),
+        "df": df,
+        "almacen": almacen,
+        "indice": obtener_indice(almacen, version),
+        "tablas": obtener_tablas(df, version, fuente, agrupar_por=agrupar_por, poblacion=poblacion),
+    }
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+
+from cache_compartida import CACHE
+
+# Modo "qué pasa si": pesos editables por categoría con recálculo incremental
+# La matriz de métricas de cada rol se prepara una vez por versión de datos
+# y se comparte entre sesiones. Cada escenario guarda el percentil de cada categoría: al cambiar un peso
+# solo se recalculan esa categoría (suma y ranking) y el ELO
+#
+# Con los pesos de la configuración el resultado es idéntico a las tablas de precalculo.py
+# (misma suma en el orden declarado y mismo ranking), también por competición y con población de referencia
+# La población de una liga base externa no se admite: su distribución depende de los pesos de la otra tabla
+
+MAX_MATRICES = 32
+
+CACHE.configurar_espacio("matrices_rol", max_entradas=MAX_MATRICES)
+
+
+class MatrizRol:
+
+    def __init__(self, df, pesos_rol, rol=None, id_col="UniqueID", agrupar_por=None, poblacion=None):
+        self.ids = pd.Index(df[id_col])
+        self.metricas = list(dict.fromkeys(m for pesos in pesos_rol.values() for m in pesos))
+        self.posicion = {metrica: i for i, metrica in enumerate(self.metricas)}
+        valores = df.reindex(columns=self.metricas).to_numpy(dtype=float, copy=True)
+        self.presentes = ~np.isnan(valores)
+        self.valores = np.where(self.presentes, valores, 0.0)
+
+        # Segmentos que se rankean por separado: (filas, filas de la población); None = todas las filas del segmento
+        if agrupar_por:
+            grupos = df.groupby(agrupar_por, observed=True, sort=False).indices.values()
+        else:
+            grupos = [np.arange(len(df))]
+        self.segmentos = []
+        for filas in grupos:
+            poblacion_filas = None
+            if poblacion is not None:
+                poblacion_filas = filas[poblacion.mascara(df.iloc[filas], rol)]
+            self.segmentos.append((filas, poblacion_filas))
+
+    # Percentil de una columna de puntajes dentro de cada segmento
+    #   sin población -> rankdata(method='average') como calcular_percentiles
+    #   con población -> búsqueda en la distribución ordenada como DistribucionReferencia
+
+    def percentiles(self, puntaje):
+        from scipy.stats import rankdata
+
+        resultado = np.empty(len(puntaje))
+        for filas, poblacion_filas in self.segmentos:
+            valores = puntaje[filas]
+            if poblacion_filas is None:
+                resultado[filas] = rankdata(valores, method='average') / len(valores) * 100
+            else:
+                ordenados = np.sort(puntaje[poblacion_filas])
+                izquierda = np.searchsorted(ordenados, valores, side="left")
+                derecha = np.searchsorted(ordenados, valores, side="right")
+                resultado[filas] = np.minimum((izquierda + derecha + 1) / 2 / len(ordenados) * 100, 100.0)
+        return resultado
+
+
+class EscenarioPesos:
+
+    def __init__(self, matriz, pesos_rol):
+        self.matriz = matriz
+        self.categorias = list(pesos_rol)
+        self.pesos = {}
+        n = len(matriz.ids)
+        self.percentiles = np.zeros((n, len(self.categorias)), order="F")
+        self.actualizar(pesos_rol)
+
+    # Suma ponderada y peso total de una categoría, métrica por métrica en el orden declarado
+    # (mismas operaciones que calcular_puntajes, así los empates no cambian)
+
+    def _recalcular(self, j, pesos):
+        suma = np.zeros(len(self.matriz.ids))
+        total = np.zeros(len(self.matriz.ids))
+        for metrica, peso in pesos.items():
+            i = self.matriz.posicion[metrica]
+            usar = self.matriz.presentes[:, i]
+            suma += np.where(usar, self.matriz.valores[:, i] * peso, 0.0)
+            total += np.where(usar, abs(peso), 0.0)
+        puntaje = np.divide(suma, total, out=np.zeros_like(suma), where=total > 0)
+        self.percentiles[:, j] = self.matriz.percentiles(puntaje)
+        self.pesos[self.categorias[j]] = dict(pesos)
+
+    # Esta función aplica los pesos nuevos y devuelve las categorías que se recalcularon
+    # Solo se admiten las métricas que ya tiene el rol (la matriz es la misma)
+
+    def actualizar(self, pesos_rol):
+        cambiadas = [c for c in self.categorias if self.pesos.get(c) != pesos_rol[c]]
+        for categoria in cambiadas:
+            self._recalcular(self.categorias.index(categoria), pesos_rol[categoria])
+        if cambiadas:
+            # Promedio de las categorías sumadas en orden, como DataFrame.mean(axis=1) en calcular_percentiles
+            suma = self.percentiles[:, 0].copy()
+            for j in range(1, len(self.categorias)):
+                suma += self.percentiles[:, j]
+            self.elo = suma / len(self.categorias)
+        return cambiadas
+
+    # Tabla con la misma forma que las de precalculo.obtener_tablas (indexada por UniqueID, categorías y ELO)
+
+    def tabla(self):
+        tabla = pd.DataFrame(self.percentiles, index=self.matriz.ids, columns=self.categorias)
+        tabla["ELO"] = self.elo
+        return tabla
+
+# Esta función devuelve la matriz de un rol para una versión de datos (caché compartida)
+# Misma clave que las tablas de percentiles de las que parte el escenario
+
+def obtener_matriz(df, version_tablas, pesos_rol, rol, agrupar_por=None, poblacion=None, id_col="UniqueID"):
+    return CACHE.obtener("matrices_rol", (version_tablas, rol),
+                         lambda: MatrizRol(df, pesos_rol, rol, id_col, agrupar_por, poblacion),
+                         versiones=(version_tablas,))
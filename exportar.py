@@ -0,0 +1,70 @@
+import hashlib
+import json
+
+from cache_compartida import CACHE, TTL_INTERACCION
+from textos import URL_LOGO, logo_data_uri
+
+# Exportación PNG bajo demanda: las imágenes se guardan en la caché compartida según la huella del radar
+# (rol, idioma, top N, jugadores y sus valores), así la misma figura no se vuelve a renderizar
+
+MAX_IMAGENES = 32
+
+CACHE.configurar_espacio("imagenes", max_entradas=MAX_IMAGENES, ttl=TTL_INTERACCION)
+
+_kaleido_listo = False
+
+# Esta función calcula la huella de un radar a partir de lo que define su contenido
+
+def huella_radar(rol, idioma, top_n, jugadores_top):
+    contenido = {
+        "rol": rol,
+        "idioma": idioma,
+        "top_n": top_n,
+        "jugadores": [[str(uid), {c: round(float(v), 6) for c, v in valores.items()}] for uid, valores in jugadores_top],
+    }
+    return hashlib.sha256(json.dumps(contenido, sort_keys=True).encode("utf-8")).hexdigest()[:20]
+
+# Esta función deja un proceso de kaleido corriendo para reutilizarlo entre exportaciones
+# kaleido >= 1 usa un servidor persistente; con kaleido 0.2 plotly ya reutiliza su proceso tras el primer uso
+
+def iniciar_kaleido():
+    global _kaleido_listo
+    if _kaleido_listo:
+        return
+    import kaleido
+
+    iniciar = getattr(kaleido, "start_sync_server", None)
+    if iniciar is not None:
+        try:
+            iniciar(silence_warnings=True)
+        except RuntimeError:
+            pass   # ya estaba iniciado
+    _kaleido_listo = True
+
+
+def imagen_en_cache(huella, formato="png"):
+    return CACHE.buscar("imagenes", f"{huella}.{formato}")
+
+# Esta función devuelve una copia de la figura con el logo embebido (data URI) en lugar de su URL
+# Solo para renderizar la imagen: la figura interactiva queda liviana
+
+def con_logo_embebido(fig):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(fig)
+    fig.update_layout_images(selector=dict(source=URL_LOGO), source=logo_data_uri())
+    return fig
+
+# Esta función devuelve el PNG de la figura, renderizándolo solo si no está en caché
+# Si kaleido no está instalado se propaga la excepción para que la app muestre el aviso
+
+def imagen_png(fig, huella, formato="png"):
+    imagen = imagen_en_cache(huella, formato)
+    if imagen is not None:
+        return imagen
+
+    imagen = con_logo_embebido(fig).to_image(format=formato)
+    # Se deja kaleido corriendo solo después de un render exitoso: si falta Chrome el servidor
+    # persistente quedaría esperando para siempre en vez de fallar con un error claro
+    iniciar_kaleido()
+    return CACHE.guardar("imagenes", f"{huella}.{formato}", imagen)
@@ -0,0 +1,83 @@
+import logging
+
+import numpy as np
+
+from cache_compartida import CACHE
+from metrics_config import role_by_position
+
+# Índice de filtros sobre el almacén de jugadores, construido una vez por versión de datos
+# Rol y país quedan como máscaras booleanas precalculadas; minutos y edad como arreglos ordenados
+# Cada combinación de filtros se resuelve con unos pocos AND vectorizados
+# Las posiciones principales sin rol en metrics_config.positions_by_role quedan en sin_rol y se avisan en el log
+
+_logger = logging.getLogger("radar.filtros")
+
+
+class IndiceFiltros:
+
+    def __init__(self, almacen, roles_por_posicion=None):
+        roles_por_posicion = roles_por_posicion or role_by_position
+        self.ids = almacen.index
+        self.n = len(almacen)
+
+        # Rol por posición principal (coincidencia exacta del código, no por substring)
+        self.roles = {}
+        self.sin_rol = {}
+        if "Primary position" in almacen.columns:
+            posiciones = almacen["Primary position"].astype("category")
+            conteos = posiciones.value_counts(sort=False)
+            self.sin_rol = {p: int(conteos[p]) for p in posiciones.cat.categories
+                            if p not in roles_por_posicion and conteos[p]}
+            if self.sin_rol:
+                _logger.warning("Posiciones sin rol en positions_by_role (jugadores fuera de todos los roles): %s",
+                                ", ".join(f"{p} ({n})" for p, n in self.sin_rol.items()))
+            rol_por_codigo = np.array([roles_por_posicion.get(p) for p in posiciones.cat.categories] + [None],
+                                      dtype=object)
+            rol_por_fila = rol_por_codigo[posiciones.cat.codes.to_numpy()]   # código -1 (vacío) -> None
+            for rol in set(roles_por_posicion.values()):
+                self.roles[rol] = rol_por_fila == rol
+
+        self.paises = {}
+        if "Birth country" in almacen.columns:
+            paises = almacen["Birth country"].astype("category")
+            codigos = paises.cat.codes.to_numpy()
+            for codigo, pais in enumerate(paises.cat.categories):
+                self.paises[pais] = codigos == codigo
+
+        self.rangos = {}
+        for columna in ("Minutes played", "Age"):
+            if columna in almacen.columns:
+                valores = almacen[columna].to_numpy(dtype=float)
+                orden = np.argsort(valores, kind="stable")     # los NaN quedan al final
+                self.rangos[columna] = (orden, valores[orden], int(np.count_nonzero(~np.isnan(valores))))
+
+    def paises_disponibles(self):
+        return sorted(self.paises)
+
+    # Máscara de las filas con minimo <= valor <= maximo usando búsqueda binaria en el arreglo ordenado
+
+    def mascara_rango(self, columna, minimo=-np.inf, maximo=np.inf):
+        if columna not in self.rangos:
+            return np.ones(self.n, dtype=bool)
+        orden, ordenados, validos = self.rangos[columna]
+        desde = np.searchsorted(ordenados[:validos], minimo, side="left")
+        hasta = np.searchsorted(ordenados[:validos], maximo, side="right")
+        mascara = np.zeros(self.n, dtype=bool)
+        mascara[orden[desde:hasta]] = True
+        return mascara
+
+    # Esta función combina los filtros de la app; pais=None significa todos los países
+
+    def mascara(self, rol, pais=None, min_minutos=0, rango_edad=None):
+        mascara = self.roles.get(rol, np.zeros(self.n, dtype=bool)).copy()
+        if pais is not None and self.paises:
+            mascara &= self.paises.get(pais, np.zeros(self.n, dtype=bool))
+        mascara &= self.mascara_rango("Minutes played", min_minutos)
+        if rango_edad is not None:
+            mascara &= self.mascara_rango("Age", rango_edad[0], rango_edad[1])
+        return mascara
+
+# Esta función devuelve el índice de filtros de una versión de datos (caché compartida)
+
+def obtener_indice(almacen, version):
+    return CACHE.obtener("indice_filtros", version, lambda: IndiceFiltros(almacen), versiones=(version,))
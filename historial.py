@@ -0,0 +1,275 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from cache_compartida import CACHE, TTL_INTERACCION
+from competiciones import nombre_competicion
+from data_loader import RUTA_DATOS, _version, procesar_excel
+from metrics_config import role_metrics
+from precalculo import calcular_tabla_rol, obtener_tablas
+
+# Historial de jornadas: cada versión de datos de una competición se agrega a una base SQLite (solo se agrega,
+# nunca se reescribe) guardando solo las celdas que cambiaron respecto de la versión anterior
+# (jugadores nuevos completos, jugadores que ya no están como bajas) más los percentiles y el ELO
+# de cada rol en esa versión. Los índices por UniqueID permiten leer la trayectoria de un jugador
+# en todas las jornadas sin volver a cargar ningún Excel
+#
+# Uso (cargar jornadas anteriores, en orden):
+#   python historial.py --competicion "CONMEBOL QUALI" jornada1.xlsx jornada2.xlsx ...
+
+RUTA_HISTORIAL = Path(os.environ.get("RADAR_HISTORIAL", RUTA_DATOS.parent / "historial.sqlite"))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS versiones (
+    id INTEGER PRIMARY KEY,
+    competicion TEXT NOT NULL,
+    version TEXT NOT NULL,
+    fecha REAL NOT NULL,
+    filas INTEGER NOT NULL,
+    UNIQUE (competicion, version)
+);
+CREATE TABLE IF NOT EXISTS celdas (
+    version_id INTEGER NOT NULL,
+    uid TEXT NOT NULL,
+    columna TEXT NOT NULL,
+    valor
+);
+CREATE TABLE IF NOT EXISTS bajas (
+    version_id INTEGER NOT NULL,
+    uid TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS percentiles (
+    version_id INTEGER NOT NULL,
+    rol TEXT NOT NULL,
+    uid TEXT NOT NULL,
+    elo REAL,
+    categorias TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS celdas_uid ON celdas (uid, columna, version_id);
+CREATE INDEX IF NOT EXISTS bajas_uid ON bajas (uid, version_id);
+CREATE INDEX IF NOT EXISTS percentiles_uid ON percentiles (uid, rol, version_id);
+"""
+
+_FALTANTE = object()
+
+CACHE.configurar_espacio("historial", max_entradas=64, ttl=TTL_INTERACCION)
+
+# Esta función convierte una columna a valores de Python para SQLite (NaN -> None)
+
+def _valores_python(serie):
+    if pd.api.types.is_float_dtype(serie):
+        return [None if v != v else v for v in serie.to_numpy(dtype=float).tolist()]
+    if pd.api.types.is_integer_dtype(serie) or pd.api.types.is_bool_dtype(serie):
+        return serie.to_numpy().tolist()
+    return [None if pd.isna(v) else v if isinstance(v, (str, int, float)) else str(v)
+            for v in serie.astype(object).tolist()]
+
+
+class Historial:
+
+    def __init__(self, ruta=RUTA_HISTORIAL):
+        self.ruta = Path(ruta)
+        self._registradas = set()     # (competicion, version) ya guardadas, para no consultar la base en cada rerun
+        self._lock = threading.Lock()
+        self._esquema_listo = False
+
+    # Conexión por operación (las sesiones de Streamlit corren en hilos distintos); confirma al salir sin errores
+    # La carpeta y el esquema se crean con la primera conexión del proceso
+    # Sin permisos o con una ruta inválida lanza OSError o sqlite3.Error (ver las funciones de abajo)
+
+    @contextmanager
+    def _conectar(self):
+        if not self._esquema_listo:
+            self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        conexion = sqlite3.connect(self.ruta, timeout=30)
+        try:
+            if not self._esquema_listo:
+                conexion.executescript(ESQUEMA)
+                self._esquema_listo = True
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+    # Estado de una competición reconstruido desde las diferencias: ({columna: {uid: valor}}, uids presentes)
+    # hasta_id limita la reconstrucción a una versión anterior
+
+    def _estado(self, conexion, competicion, hasta_id=None):
+        hasta_id = hasta_id if hasta_id is not None else sys.maxsize
+        estado = {}
+        ultima_celda = {}
+        filas = conexion.execute(
+            "SELECT c.uid, c.columna, c.valor, MAX(c.version_id) FROM celdas c "
+            "JOIN versiones v ON v.id = c.version_id WHERE v.competicion = ? AND c.version_id <= ? "
+            "GROUP BY c.uid, c.columna", (competicion, hasta_id))
+        for uid, columna, valor, version_id in filas:
+            estado.setdefault(columna, {})[uid] = valor
+            ultima_celda[uid] = max(ultima_celda.get(uid, 0), version_id)
+        ultima_baja = dict(conexion.execute(
+            "SELECT b.uid, MAX(b.version_id) FROM bajas b JOIN versiones v ON v.id = b.version_id "
+            "WHERE v.competicion = ? AND b.version_id <= ? GROUP BY b.uid", (competicion, hasta_id)))
+        # Un jugador que vuelve se guarda completo, así que su última celda es posterior a su baja
+        presentes = {uid for uid, version_id in ultima_celda.items() if version_id > ultima_baja.get(uid, 0)}
+        return estado, presentes
+
+    def registrada(self, competicion, version):
+        if (competicion, version) in self._registradas:
+            return True
+        with self._conectar() as conexion:
+            fila = conexion.execute("SELECT 1 FROM versiones WHERE competicion = ? AND version = ?",
+                                    (competicion, version)).fetchone()
+        if fila:
+            self._registradas.add((competicion, version))
+        return fila is not None
+
+    # Esta función agrega una versión: diferencias de datos respecto de la anterior y percentiles por rol
+    # tablas: {rol: (tabla indexada por UniqueID, categorías)} como las de precalculo.obtener_tablas
+    # Devuelve el id de la versión o None si ya estaba registrada
+
+    def registrar(self, competicion, version, df, tablas, fecha=None, id_col="UniqueID"):
+        with self._lock, self._conectar() as conexion:
+            if conexion.execute("SELECT 1 FROM versiones WHERE competicion = ? AND version = ?",
+                                (competicion, version)).fetchone():
+                self._registradas.add((competicion, version))
+                return None
+            anterior, presentes = self._estado(conexion, competicion)
+            version_id = conexion.execute(
+                "INSERT INTO versiones (competicion, version, fecha, filas) VALUES (?, ?, ?, ?)",
+                (competicion, version, fecha or time.time(), len(df))).lastrowid
+
+            uids = df[id_col].astype(str).tolist()
+            celdas = []
+            for columna in df.columns:
+                if columna == id_col:
+                    continue
+                previos = anterior.get(columna, {})
+                for uid, valor in zip(uids, _valores_python(df[columna])):
+                    if uid not in presentes or previos.get(uid, _FALTANTE) != valor:
+                        celdas.append((version_id, uid, columna, valor))
+            conexion.executemany("INSERT INTO celdas VALUES (?, ?, ?, ?)", celdas)
+            conexion.executemany("INSERT INTO bajas VALUES (?, ?)",
+                                 [(version_id, uid) for uid in sorted(presentes - set(uids))])
+
+            for rol, (tabla, categorias) in tablas.items():
+                valores = tabla[list(categorias)].to_numpy(dtype=float).tolist()
+                conexion.executemany("INSERT INTO percentiles VALUES (?, ?, ?, ?, ?)", [
+                    (version_id, rol, str(uid), float(elo), json.dumps(dict(zip(categorias, fila))))
+                    for uid, elo, fila in zip(tabla.index, tabla["ELO"].to_numpy(dtype=float), valores)
+                ])
+        self._registradas.add((competicion, version))
+        return version_id
+
+    # Versiones registradas de una competición, de la más antigua a la más nueva
+
+    def versiones(self, competicion):
+        with self._conectar() as conexion:
+            versiones = pd.read_sql_query(
+                "SELECT id, version, fecha, filas FROM versiones WHERE competicion = ? ORDER BY id",
+                conexion, params=(competicion,))
+        versiones["fecha"] = pd.to_datetime(versiones["fecha"], unit="s")
+        return versiones
+
+    # Esta función devuelve los datos de una versión reconstruidos desde las diferencias (índice UniqueID)
+
+    def estado(self, competicion, version):
+        with self._conectar() as conexion:
+            fila = conexion.execute("SELECT id FROM versiones WHERE competicion = ? AND version = ?",
+                                    (competicion, version)).fetchone()
+            if fila is None:
+                raise KeyError(f"Versión no registrada: {competicion} {version}")
+            estado, presentes = self._estado(conexion, competicion, fila[0])
+        orden = sorted(presentes)
+        return pd.DataFrame({columna: [valores.get(uid) for uid in orden] for columna, valores in estado.items()},
+                            index=pd.Index(orden, name="UniqueID"))
+
+    # Esta función devuelve la evolución de ELO y percentiles por categoría de los jugadores en un rol
+    # Una fila por jugador y versión: UniqueID, version, fecha, ELO y una columna por categoría
+
+    def trayectorias(self, competicion, uids, rol):
+        uids = [str(uid) for uid in uids]
+        marcas = ", ".join("?" * len(uids))
+        with self._conectar() as conexion:
+            filas = conexion.execute(
+                f"SELECT p.uid, v.version, v.fecha, p.elo, p.categorias FROM percentiles p "
+                f"JOIN versiones v ON v.id = p.version_id "
+                f"WHERE v.competicion = ? AND p.rol = ? AND p.uid IN ({marcas}) ORDER BY v.id",
+                (competicion, rol, *uids)).fetchall()
+        if not filas:
+            return pd.DataFrame(columns=["UniqueID", "version", "fecha", "ELO"])
+        tabla = pd.DataFrame([{"UniqueID": uid, "version": version, "fecha": fecha, "ELO": elo, **json.loads(categorias)}
+                              for uid, version, fecha, elo, categorias in filas])
+        tabla["fecha"] = pd.to_datetime(tabla["fecha"], unit="s")
+        return tabla
+
+
+HISTORIAL = Historial()
+
+# Esta función registra la versión de una fuente si todavía no está en el historial
+# Usa las tablas de percentiles por defecto (todos los jugadores, sin agrupar) de la caché compartida
+# Guardar el historial es opcional: sin permisos de escritura (o con una ruta inválida) la app sigue igual
+
+def registrar_version(fuente, df, version, tablas=None, historial=HISTORIAL):
+    competicion = nombre_competicion(fuente)
+    try:
+        if historial.registrada(competicion, version):
+            return None
+        tablas = tablas if tablas is not None else obtener_tablas(df, version, fuente)
+        return historial.registrar(competicion, version, df, tablas)
+    except (OSError, sqlite3.Error):
+        return None
+
+# Lecturas para la app: se guardan en la caché compartida por versión de datos (no se consulta la base
+# en cada rerun) y, si la base no se puede abrir, devuelven un historial vacío
+
+def versiones_competicion(competicion, version, historial=HISTORIAL):
+    def construir():
+        try:
+            return historial.versiones(competicion)
+        except (OSError, sqlite3.Error):
+            return pd.DataFrame(columns=["id", "version", "fecha", "filas"])
+
+    return CACHE.obtener("historial", (str(historial.ruta), competicion, version), construir, versiones=(version,))
+
+
+def trayectorias_competicion(competicion, version, uids, rol, historial=HISTORIAL):
+    def construir():
+        try:
+            return historial.trayectorias(competicion, uids, rol)
+        except (OSError, sqlite3.Error):
+            return pd.DataFrame(columns=["UniqueID", "version", "fecha", "ELO"])
+
+    clave = (str(historial.ruta), competicion, version, rol, tuple(str(uid) for uid in uids))
+    return CACHE.obtener("historial", clave, construir, versiones=(version,))
+
+# Tablas de percentiles por defecto de una tabla suelta (para cargar jornadas anteriores)
+
+def tablas_por_defecto(df, id_col="UniqueID"):
+    tablas = {}
+    for rol, pesos_rol in role_metrics.items():
+        tabla, categorias = calcular_tabla_rol(df, pesos_rol, id_col)
+        tablas[rol] = (tabla.set_index(id_col), categorias)
+    return tablas
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Agrega jornadas al historial (en el orden dado)")
+    parser.add_argument("archivos", nargs="+", help="Exports de Wyscout de cada jornada")
+    parser.add_argument("--competicion", help="Nombre de la competición (por defecto, el nombre de cada archivo)")
+    argumentos = parser.parse_args()
+
+    for archivo in argumentos.archivos:
+        contenido = Path(archivo).read_bytes()
+        df = procesar_excel(contenido)
+        competicion = argumentos.competicion or nombre_competicion(archivo)
+        version_id = HISTORIAL.registrar(competicion, _version(contenido), df, tablas_por_defecto(df),
+                                         fecha=os.stat(archivo).st_mtime)
+        print(f"{archivo} -> {competicion}: " + ("ya registrada" if version_id is None else f"versión {version_id}"))
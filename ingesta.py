@@ -0,0 +1,254 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bocetos import K_BOCETO, BocetosPercentiles, cota_error
+from data_loader import crear_posicion_principal, crear_unique_id, uso_memoria
+from metrics_config import role_metrics
+from radar_utils import calcular_percentiles
+
+# Ingesta por bloques para exports que no entran cómodos en un solo DataFrame (varias temporadas y ligas)
+# Cada bloque se lee solo con las columnas necesarias, se puntúa por rol y categoría como en calcular_puntajes
+# y se agrega a los bocetos KLL (bocetos.py); las fuentes se pueden repartir entre procesos y fusionar al final
+# Los percentiles de cualquier jugador salen después de los bocetos, aproximados y con memoria acotada
+#
+# Uso:
+#   python ingesta.py exports/temporada_*.csv --filas 50000 --procesos 4 --salida bocetos.json
+#   python ingesta.py --reporte                        (error contra calcular_percentiles en los datos incluidos)
+#   python ingesta.py --reporte --sinteticos 200000    (lo mismo con datos sintéticos del benchmark)
+#
+# Formatos: CSV (también comprimido), Parquet, Arrow/Feather (como los snapshots) y Excel (openpyxl en modo lectura)
+# A diferencia de preparar_tabla no se quitan los UniqueID repetidos: en varias temporadas son filas distintas
+
+FILAS_BLOQUE = 50000
+COLUMNAS_IDENTIDAD = ["UniqueID", "Player", "Team", "Position", "Primary position", "Minutes played"]
+K_REPORTE = (50, 100, 200, 400)
+
+# Columnas que se leen de cada bloque: identidad del jugador y las métricas de algún rol
+# (UniqueID y la posición principal solo vienen en los snapshots; en los exports se crean por bloque)
+
+def columnas_ingesta(config=role_metrics):
+    metricas = {m for pesos_rol in config.values() for pesos in pesos_rol.values() for m in pesos}
+    return COLUMNAS_IDENTIDAD + sorted(metricas)
+
+
+def _preparar_bloque(df):
+    if "UniqueID" not in df.columns and {"Player", "Team"} <= set(df.columns):
+        crear_unique_id(df)
+    if "Primary position" not in df.columns and "Position" in df.columns:
+        crear_posicion_principal(df)
+    return df
+
+
+def _bloques_excel(ruta, filas, columnas):
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        hoja = libro.active
+        filas_hoja = hoja.iter_rows(values_only=True)
+        encabezado = next(filas_hoja, ())
+        # Con columnas repetidas vale la primera (read_excel renombra las demás a "nombre.1")
+        elegidas = []
+        for i, nombre in enumerate(encabezado):
+            if nombre in columnas and nombre not in {n for _, n in elegidas}:
+                elegidas.append((i, nombre))
+        bloque = []
+        for fila in filas_hoja:
+            # Las celdas vacías quedan como None (NaN), igual que en read_excel
+            bloque.append([fila[i] if i < len(fila) and fila[i] != "" else None for i, _ in elegidas])
+            if len(bloque) == filas:
+                yield pd.DataFrame(bloque, columns=[nombre for _, nombre in elegidas])
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=[nombre for _, nombre in elegidas])
+    finally:
+        libro.close()
+
+
+def _bloques_arrow(ruta, filas, columnas):
+    import pyarrow as pa
+
+    with pa.memory_map(str(ruta)) as fuente:
+        lector = pa.ipc.open_file(fuente)
+        elegidas = [c for c in lector.schema.names if c in columnas]
+        for i in range(lector.num_record_batches):
+            lote = lector.get_batch(i).select(elegidas)
+            for inicio in range(0, lote.num_rows, filas):
+                yield lote.slice(inicio, filas).to_pandas()
+
+# Esta función lee una fuente de a bloques de filas (solo las columnas de columnas_ingesta)
+
+def leer_en_bloques(ruta, filas=FILAS_BLOQUE, columnas=None):
+    columnas = set(columnas or columnas_ingesta())
+    ruta = Path(ruta)
+    nombre = ruta.name.lower()
+    if ".csv" in nombre:
+        for bloque in pd.read_csv(ruta, chunksize=filas, usecols=lambda c: c in columnas):
+            yield _preparar_bloque(bloque)
+    elif ruta.suffix.lower() == ".parquet":
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        elegidas = [c for c in archivo.schema_arrow.names if c in columnas]
+        for lote in archivo.iter_batches(batch_size=filas, columns=elegidas):
+            yield _preparar_bloque(lote.to_pandas())
+    elif ruta.suffix.lower() in (".arrow", ".feather"):
+        for bloque in _bloques_arrow(ruta, filas, columnas):
+            yield _preparar_bloque(bloque)
+    elif ruta.suffix.lower() in (".xlsx", ".xlsm"):
+        for bloque in _bloques_excel(ruta, filas, columnas):
+            yield _preparar_bloque(bloque)
+    else:
+        raise ValueError(f"Formato no soportado para la ingesta por bloques: {ruta.name}")
+
+# Bocetos de una sola fuente (lo que hace cada proceso)
+
+def _ingestar_fuente(ruta, filas, k, semilla):
+    bocetos = BocetosPercentiles(k, semilla=semilla)
+    estadisticas = {"filas": 0, "bloques": 0, "bytes_bloque_max": 0}
+    for bloque in leer_en_bloques(ruta, filas):
+        bocetos.agregar_bloque(bloque)
+        estadisticas["filas"] += len(bloque)
+        estadisticas["bloques"] += 1
+        estadisticas["bytes_bloque_max"] = max(estadisticas["bytes_bloque_max"], uso_memoria(bloque))
+    return bocetos, estadisticas
+
+# Esta función ingiere las fuentes (en paralelo si hay varias y más de un proceso) y fusiona los bocetos
+# Devuelve (bocetos, reporte con filas, bloques, tiempo y memoria)
+
+def ingestar(fuentes, filas=FILAS_BLOQUE, k=K_BOCETO, procesos=1):
+    inicio = time.perf_counter()
+    argumentos = [(str(ruta), filas, k, i) for i, ruta in enumerate(fuentes)]
+    if procesos > 1 and len(fuentes) > 1:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(fuentes))) as pool:
+            partes = list(pool.map(_ingestar_fuente, *zip(*argumentos)))
+    else:
+        partes = [_ingestar_fuente(*a) for a in argumentos]
+
+    bocetos = BocetosPercentiles(k)
+    for parte, _ in partes:
+        bocetos.fusionar(parte)
+    duracion = time.perf_counter() - inicio
+    filas_totales = sum(e["filas"] for _, e in partes)
+    return bocetos, {
+        "fuentes": len(fuentes),
+        "filas": filas_totales,
+        "bloques": sum(e["bloques"] for _, e in partes),
+        "segundos": duracion,
+        "filas_por_segundo": filas_totales / duracion if duracion else None,
+        "bytes_bloque_max": max((e["bytes_bloque_max"] for _, e in partes), default=0),
+        "bocetos": bocetos.memoria(),
+    }
+
+# Esta función compara los percentiles aproximados con los exactos de calcular_percentiles para cada k
+# La tabla se reparte en bloques, cada uno con sus bocetos, que después se fusionan (como en la ingesta)
+# Errores en puntos de percentil sobre todas las categorías de todos los roles; también el ELO y el top 10
+
+def reporte_error(df, ks=K_REPORTE, bloques=8, unique_col="UniqueID"):
+    # La primera llamada importa scipy: se hace antes de medir
+    calcular_percentiles(df.head(2), role_metrics[next(iter(role_metrics))], unique_col)
+    inicio = time.perf_counter()
+    exactos = {rol: calcular_percentiles(df, pesos_rol, unique_col) for rol, pesos_rol in role_metrics.items()}
+    segundos_exacto = time.perf_counter() - inicio
+    tamano = max(1, -(-len(df) // bloques))
+
+    resultados = []
+    for k in ks:
+        inicio = time.perf_counter()
+        bocetos = BocetosPercentiles(k)
+        for i, desde in enumerate(range(0, len(df), tamano)):
+            bocetos.fusionar(BocetosPercentiles(k, semilla=i + 1).agregar_bloque(df.iloc[desde:desde + tamano]))
+        segundos_ingesta = time.perf_counter() - inicio
+
+        errores, errores_elo, coincidencias = [], [], []
+        inicio = time.perf_counter()
+        for rol, (exacto, categorias) in exactos.items():
+            aproximado, _ = bocetos.percentiles(df, rol, unique_col)
+            errores.append(np.abs(aproximado[categorias].to_numpy() - exacto[categorias].to_numpy()).ravel())
+            errores_elo.append(np.abs(aproximado["Promedio"].to_numpy() - exacto["Promedio"].to_numpy()))
+            top_exacto = set(exacto.nlargest(10, "Promedio")[unique_col])
+            top_aproximado = set(aproximado.nlargest(10, "Promedio")[unique_col])
+            coincidencias.append(len(top_exacto & top_aproximado) / max(len(top_exacto), 1))
+        segundos_consulta = time.perf_counter() - inicio
+
+        errores = np.concatenate(errores)
+        resultados.append({
+            "k": k,
+            "cota_nominal": cota_error(k),
+            "error_max": float(errores.max()),
+            "error_medio": float(errores.mean()),
+            "error_p99": float(np.percentile(errores, 99)),
+            "error_elo_max": float(np.concatenate(errores_elo).max()),
+            "top10": float(np.mean(coincidencias)),
+            "memoria": bocetos.memoria(),
+            "segundos_ingesta": segundos_ingesta,
+            "segundos_consulta": segundos_consulta,
+        })
+    return {"filas": len(df), "bloques": bloques, "segundos_exacto": segundos_exacto, "resultados": resultados}
+
+
+def imprimir_reporte_error(reporte):
+    print(f"{reporte['filas']:,} filas en {reporte['bloques']} bloques; calcular_percentiles exacto (todos los roles): "
+          f"{reporte['segundos_exacto'] * 1000:.0f} ms")
+    print(f"{'k':>5} {'cota':>6} {'máx':>6} {'medio':>6} {'p99':>6} {'ELO máx':>8} {'top10':>6} "
+          f"{'valores':>8} {'KB':>7} {'ingesta':>8} {'consulta':>9}")
+    for r in reporte["resultados"]:
+        print(f"{r['k']:>5} {r['cota_nominal']:>6.2f} {r['error_max']:>6.2f} {r['error_medio']:>6.3f} "
+              f"{r['error_p99']:>6.2f} {r['error_elo_max']:>8.2f} {r['top10']:>6.0%} {r['memoria']['valores']:>8} "
+              f"{r['memoria']['bytes'] / 1024:>7.1f} {r['segundos_ingesta'] * 1000:>6.0f}ms "
+              f"{r['segundos_consulta'] * 1000:>7.0f}ms")
+    print("(errores en puntos de percentil; top10 = parte del top 10 exacto por ELO que está en el aproximado)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta por bloques con bocetos de percentiles")
+    parser.add_argument("fuentes", nargs="*", help="Exports a ingerir (CSV, Parquet, Arrow o Excel)")
+    parser.add_argument("--filas", type=int, default=FILAS_BLOQUE, help="Filas por bloque")
+    parser.add_argument("--k", type=int, default=K_BOCETO, help="Tamaño de los bocetos (más grande = menos error)")
+    parser.add_argument("--procesos", type=int, default=1, help="Procesos (uno por fuente)")
+    parser.add_argument("--salida", help="Guardar los bocetos en JSON")
+    parser.add_argument("--reporte", action="store_true",
+                        help="Comparar con calcular_percentiles en los datos incluidos")
+    parser.add_argument("--sinteticos", type=int, help="Con --reporte, usar N jugadores sintéticos del benchmark")
+    parser.add_argument("--json", help="Guardar el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    if not args.fuentes and not args.reporte:
+        parser.error("indica fuentes a ingerir o --reporte")
+
+    salida = {}
+    if args.fuentes:
+        bocetos, salida["ingesta"] = ingestar(args.fuentes, args.filas, args.k, args.procesos)
+        ingesta = salida["ingesta"]
+        print(f"{ingesta['filas']:,} filas de {ingesta['fuentes']} fuentes en {ingesta['bloques']} bloques: "
+              f"{ingesta['segundos']:.2f} s ({ingesta['filas_por_segundo']:,.0f} filas/s); bloque más grande "
+              f"{ingesta['bytes_bloque_max'] / 2**20:.1f} MB, bocetos {ingesta['bocetos']['bytes'] / 1024:.1f} KB")
+        if args.salida:
+            bocetos.guardar(args.salida)
+
+    if args.reporte:
+        if args.sinteticos:
+            from benchmark import generar_jugadores
+
+            df = generar_jugadores(args.sinteticos)
+        else:
+            from data_loader import cargar_datos
+
+            df, _ = cargar_datos()
+        salida["reporte"] = reporte_error(df)
+        imprimir_reporte_error(salida["reporte"])
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(salida, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
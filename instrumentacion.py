@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+# Instrumentación opcional de cada ejecución (rerun) de la app: tiempo, pico de memoria y caché por etapa
+# Se activa con la variable de entorno RADAR_INSTRUMENTACION=1; apagada, cada etapa cuesta un if
+# El pico de memoria usa tracemalloc, que es global al proceso: con varias sesiones a la vez es aproximado
+
+ACTIVA = os.environ.get("RADAR_INSTRUMENTACION", "") not in ("", "0")
+RUTA_LOG = Path(os.environ.get("RADAR_INSTRUMENTACION_LOG",
+                               Path(__file__).resolve().parent / "logs" / "instrumentacion.jsonl"))
+MAX_BYTES_LOG = 5 * 1024 * 1024
+ARCHIVOS_LOG = 5
+
+_local = threading.local()     # cada sesión de Streamlit ejecuta el script en su propio hilo
+_logger = None
+_lock = threading.Lock()
+
+
+def activa():
+    return ACTIVA
+
+# Arranque en frío: milisegundos desde que se importó este módulo (lo primero que importa la app)
+# hasta cada hito de la primera ejecución del script en el proceso
+# 'proceso_ms' es lo que el proceso ya llevaba vivo al llegar aquí (Python y servidor de Streamlit; solo Linux)
+
+def _edad_proceso_ms():
+    try:
+        with open("/proc/self/stat") as archivo:
+            inicio = int(archivo.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as archivo:
+            encendido = float(archivo.read().split()[0])
+        return round((encendido - inicio / os.sysconf("SC_CLK_TCK")) * 1000, 1)
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+_INICIO_MODULO = time.perf_counter()
+_arranque = {"proceso_ms": _edad_proceso_ms()}
+
+# Esta función anota un hito del arranque (solo la primera vez que se llega a él en el proceso)
+# Con final=True y la instrumentación activa, el arranque completo queda en el log
+
+def marcar_arranque(hito, final=False):
+    with _lock:
+        if hito in _arranque:
+            return
+        _arranque[hito] = round((time.perf_counter() - _INICIO_MODULO) * 1000, 1)
+    if final and ACTIVA:
+        _obtener_logger().info(json.dumps({"ts": time.time(), "arranque": arranque()}))
+
+
+def arranque():
+    with _lock:
+        return dict(_arranque)
+
+# Esta función abre el registro de una ejecución; las etapas siguientes del mismo hilo se acumulan ahí
+
+def iniciar_ejecucion(**contexto):
+    if not ACTIVA:
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.etapas = []
+    _local.pila = []
+    _local.contexto = contexto
+    _local.inicio = time.perf_counter()
+
+# Mide una etapa; se puede anidar (el pico de la etapa externa incluye el de las internas)
+
+@contextmanager
+def etapa(nombre):
+    if not ACTIVA or getattr(_local, "etapas", None) is None:
+        yield None
+        return
+
+    registro = {"etapa": nombre, "nivel": len(_local.pila), "cache": None}
+    actual, pico_previo = tracemalloc.get_traced_memory()
+    # reset_peak borra el pico que llevaba la etapa externa: se le guarda antes de reiniciarlo
+    if _local.pila:
+        _local.pila[-1]["pico"] = max(_local.pila[-1]["pico"], pico_previo)
+    marco = {"registro": registro, "base": actual, "pico": 0}
+    _local.pila.append(marco)
+    _local.etapas.append(registro)
+    tracemalloc.reset_peak()
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro["ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+        pico = max(tracemalloc.get_traced_memory()[1], marco["pico"])
+        registro["pico_kb"] = round(max(pico - marco["base"], 0) / 1024, 1)
+        _local.pila.pop()
+        if _local.pila:
+            _local.pila[-1]["pico"] = max(_local.pila[-1]["pico"], pico)
+
+# Decorador para medir una función completa como etapa
+
+def medido(nombre):
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not ACTIVA:
+                return funcion(*args, **kwargs)
+            with etapa(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+# Las cachés avisan si respondieron sin recalcular; queda anotado en la etapa en curso
+
+def registrar_cache(acierto):
+    if not ACTIVA:
+        return
+    pila = getattr(_local, "pila", None)
+    if pila:
+        pila[-1]["registro"]["cache"] = "hit" if acierto else "miss"
+
+
+def _obtener_logger():
+    global _logger
+    with _lock:
+        if _logger is None:
+            logger = logging.getLogger("radar.instrumentacion")
+            logger.propagate = False
+            logger.setLevel(logging.INFO)
+            try:
+                RUTA_LOG.parent.mkdir(parents=True, exist_ok=True)
+                manejador = RotatingFileHandler(RUTA_LOG, maxBytes=MAX_BYTES_LOG, backupCount=ARCHIVOS_LOG,
+                                                encoding="utf-8")
+                manejador.setFormatter(logging.Formatter("%(message)s"))
+                logger.addHandler(manejador)
+            except OSError:
+                logger.addHandler(logging.NullHandler())
+            _logger = logger
+        return _logger
+
+# Esta función cierra la ejecución, la agrega al log JSONL rotativo y la devuelve para el panel
+
+def cerrar_ejecucion():
+    if not ACTIVA or getattr(_local, "etapas", None) is None:
+        return None
+    registro = {
+        "ts": time.time(),
+        "total_ms": round((time.perf_counter() - _local.inicio) * 1000, 3),
+        "memoria_kb": round(tracemalloc.get_traced_memory()[0] / 1024, 1),
+        **_local.contexto,
+        "etapas": _local.etapas,
+    }
+    _local.etapas = None
+    _obtener_logger().info(json.dumps(registro, ensure_ascii=False, default=str))
+    return registro
@@ -1,297 +1,203 @@
-
 # metrics_config.py
 
-summarized_metrics = {
+# Etiquetas de cada categoría por idioma (solo se usan al mostrar resultados)
+category_labels = {
+    'prevention': {'es': 'Prevención', 'en': 'Prevention'},
+    'distribution': {'es': 'Distribución', 'en': 'Distribution'},
+    'ball_playing': {'es': 'Juego con Balón', 'en': 'Ball Playing'},
+    'movement': {'es': 'Movimiento', 'en': 'Movement'},
+    'positioning': {'es': 'Posicionamiento', 'en': 'Positioning'},
+    'attack': {'es': 'Ataque', 'en': 'Attack'},
+    'build_up': {'es': 'Construcción', 'en': 'Build-up'},
+    'progression': {'es': 'Progresión', 'en': 'Progression'},
+    'defense': {'es': 'Defensa', 'en': 'Defense'},
+    'creation': {'es': 'Creación', 'en': 'Creation'}
+}
+
+# Traducción de roles
+roles_map = {
+    'Goalkeeper': {'es': 'Portero', 'en': 'Goalkeeper'},
+    'Defender': {'es': 'Defensor', 'en': 'Defender'},
+    'Fullback': {'es': 'Lateral', 'en': 'Fullback'},
+    'Midfielder': {'es': 'Mediocampista', 'en': 'Midfielder'},
+    'Wingers': {'es': 'Extremo', 'en': 'Winger'},
+    'Forward': {'es': 'Delantero', 'en': 'Forward'}
+}
+
+# Palabras clave de posición por rol (coincidencia por substring en radar_utils.cumple_rol)
+keywords_by_role = {
+    'Goalkeeper': ['GK'],
+    'Defender': ['CB', 'RCB', 'LCB'],
+    'Fullback': ['LB', 'RB', 'LWB', 'RWB'],
+    'Midfielder': ['CMF', 'DMF', 'AMF', 'LMF', 'RMF'],
+    'Wingers': ['LW', 'LWF', 'RWF', 'RW', 'LAMF', 'RAMF'],
+    'Forward': ['CF', 'ST', 'SS']
+}
+
+# Códigos exactos de posición principal por rol, incluidas las variantes izquierda/derecha
+# y las de línea de tres/cinco de Wyscout (LCB3, LB5, LCMF3...)
+# Cada código pertenece a un solo rol (por ejemplo 'LWB' es lateral, no extremo)
+positions_by_role = {
+    'Goalkeeper': ['GK'],
+    'Defender': ['CB', 'RCB', 'LCB', 'RCB3', 'LCB3'],
+    'Fullback': ['LB', 'RB', 'LB5', 'RB5', 'LWB', 'RWB'],
+    'Midfielder': ['CMF', 'LCMF', 'RCMF', 'LCMF3', 'RCMF3', 'DMF', 'LDMF', 'RDMF', 'AMF', 'LMF', 'RMF'],
+    'Wingers': ['LW', 'LWF', 'RWF', 'RW', 'LAMF', 'RAMF'],
+    'Forward': ['CF', 'ST', 'SS']
+}
+
+# Tabla inversa: posición principal -> rol
+role_by_position = {posicion: rol for rol, posiciones in positions_by_role.items() for posicion in posiciones}
+
+# Pesos de las métricas por rol y categoría (independientes del idioma)
+role_metrics = {
     'Goalkeeper': {
-        'es': {
-            'Prevención': {
-                'Save rate, %': 0.4,
-                'Prevented goals per 90': 0.3,
-                'Conceded goals per 90': -0.3
-            },
-            'Distribución': {
-                'Accurate forward passes, %': 0.5,
-                'Accurate long passes, %': 0.5
-            },
-            'Juego con Balón': {
-                'Received passes per 90': 0.3,
-                'Accurate lateral passes, %': 0.3,
-                'Accurate forward passes, %': 0.4
-            },
-            'Movimiento': {
-                'Aerial duels per 90': 0.6,
-                'Exits per 90': 0.4
-            },
-            'Posicionamiento': {
-                'xG against per 90': -0.6,
-                'Exits per 90': 0.4
-            }
+        'prevention': {
+            'Save rate, %': 0.4,
+            'Prevented goals per 90': 0.3,
+            'Conceded goals per 90': -0.3
+        },
+        'distribution': {
+            'Accurate forward passes, %': 0.5,
+            'Accurate long passes, %': 0.5
+        },
+        'ball_playing': {
+            'Received passes per 90': 0.3,
+            'Accurate lateral passes, %': 0.3,
+            'Accurate forward passes, %': 0.4
         },
-        'en': {
-            'Prevention': {
-                'Save rate, %': 0.4,
-                'Prevented goals per 90': 0.3,
-                'Conceded goals per 90': -0.3
-            },
-            'Distribution': {
-                'Accurate forward passes, %': 0.5,
-                'Accurate long passes, %': 0.5
-            },
-            'Ball Playing': {
-                'Received passes per 90': 0.3,
-                'Accurate lateral passes, %': 0.3,
-                'Accurate forward passes, %': 0.4
-            },
-            'Movement': {
-                'Aerial duels per 90': 0.6,
-                'Exits per 90': 0.4
-            },
-            'Positioning': {
-                'xG against per 90': -0.6,
-                'Exits per 90': 0.4
-            }
+        'movement': {
+            'Aerial duels per 90': 0.6,
+            'Exits per 90': 0.4
+        },
+        'positioning': {
+            'xG against per 90': -0.6,
+            'Exits per 90': 0.4
         }
     },
     'Defender': {
-        'es': {
-            'Ataque': {
-                'Progressive runs per 90': 0.5,
-                'Accelerations per 90': 0.5
-            },
-            'Construcción': {
-                'Accurate passes, %': 0.6,
-                'Accurate long passes, %': 0.4
-            },
-            'Progresión': {
-                'Progressive runs per 90': 0.5,
-                'Accelerations per 90': 0.5
-            },
-            'Defensa': {
-                'Defensive duels won, %': 0.4,
-                'Sliding tackles per 90': 0.3,
-                'Interceptions per 90': 0.3
-            },
-            'Posicionamiento': {
-                'Interceptions per 90': 0.6,
-                'Defensive duels won, %': 0.4
-            }
+        'attack': {
+            'Progressive runs per 90': 0.5,
+            'Accelerations per 90': 0.5
+        },
+        'build_up': {
+            'Accurate passes, %': 0.6,
+            'Accurate long passes, %': 0.4
+        },
+        'progression': {
+            'Progressive runs per 90': 0.5,
+            'Accelerations per 90': 0.5
+        },
+        'defense': {
+            'Defensive duels won, %': 0.4,
+            'Sliding tackles per 90': 0.3,
+            'Interceptions per 90': 0.3
         },
-        'en': {
-            'Attack': {
-                'Progressive runs per 90': 0.5,
-                'Accelerations per 90': 0.5
-            },
-            'Build-up': {
-                'Accurate passes, %': 0.6,
-                'Accurate long passes, %': 0.4
-            },
-            'Progression': {
-                'Progressive runs per 90': 0.5,
-                'Accelerations per 90': 0.5
-            },
-            'Defense': {
-                'Defensive duels won, %': 0.4,
-                'Sliding tackles per 90': 0.3,
-                'Interceptions per 90': 0.3
-            },
-            'Positioning': {
-                'Interceptions per 90': 0.6,
-                'Defensive duels won, %': 0.4
-            }
+        'positioning': {
+            'Interceptions per 90': 0.6,
+            'Defensive duels won, %': 0.4
         }
     },
     'Fullback': {
-        'es': {
-            'Ataque': {
-                'Successful attacking actions per 90': 0.4,
-                'Crosses to goalie box per 90': 0.3,
-                'Offensive duels won, %': 0.3
-            },
-            'Construcción': {
-                'Accurate through passes, %': 0.4,
-                'Passes per 90': 0.3,
-                'Received passes per 90': 0.3
-            },
-            'Progresión': {
-                'xA per 90': 0.6,
-                'Accurate through passes, %': 0.4
-            },
-            'Movimiento': {
-                'Accelerations per 90': 0.5,
-                'Progressive runs per 90': 0.5
-            },
-            'Defensa': {
-                'Defensive duels won, %': 0.6,
-                'Interceptions per 90': 0.4
-            }
+        'attack': {
+            'Successful attacking actions per 90': 0.4,
+            'Crosses to goalie box per 90': 0.3,
+            'Offensive duels won, %': 0.3
         },
-        'en': {
-            'Attack': {
-                'Successful attacking actions per 90': 0.4,
-                'Crosses to goalie box per 90': 0.3,
-                'Offensive duels won, %': 0.3
-            },
-            'Build-up': {
-                'Accurate through passes, %': 0.4,
-                'Passes per 90': 0.3,
-                'Received passes per 90': 0.3
-            },
-            'Progression': {
-                'xA per 90': 0.6,
-                'Accurate through passes, %': 0.4
-            },
-            'Movement': {
-                'Accelerations per 90': 0.5,
-                'Progressive runs per 90': 0.5
-            },
-            'Defense': {
-                'Defensive duels won, %': 0.6,
-                'Interceptions per 90': 0.4
-            }
+        'build_up': {
+            'Accurate through passes, %': 0.4,
+            'Passes per 90': 0.3,
+            'Received passes per 90': 0.3
+        },
+        'progression': {
+            'xA per 90': 0.6,
+            'Accurate through passes, %': 0.4
+        },
+        'movement': {
+            'Accelerations per 90': 0.5,
+            'Progressive runs per 90': 0.5
+        },
+        'defense': {
+            'Defensive duels won, %': 0.6,
+            'Interceptions per 90': 0.4
         }
     },
     'Midfielder': {
-        'es': {
-            'Ataque': {
-                'xG per 90': 0.5,
-                'Goals per 90': 0.5
-            },
-            'Construcción': {
-                'Received passes per 90': 0.4,
-                'Accurate short / medium passes, %': 0.6
-            },
-            'Progresión': {
-                'Successful dribbles, %': 0.4,
-                'Accurate short / medium passes, %': 0.3,
-                'Accurate passes to final third, %': 0.3
-            },
-            'Creación': {
-                'Assists per 90': 0.5,
-                'xA per 90': 0.5
-            },
-            'Defensa': {
-                'Defensive duels won, %': 0.5,
-                'Interceptions per 90': 0.5
-            }
+        'attack': {
+            'xG per 90': 0.5,
+            'Goals per 90': 0.5
+        },
+        'build_up': {
+            'Received passes per 90': 0.4,
+            'Accurate short / medium passes, %': 0.6
         },
-        'en': {
-            'Attack': {
-                'xG per 90': 0.5,
-                'Goals per 90': 0.5
-            },
-            'Build-up': {
-                'Received passes per 90': 0.4,
-                'Accurate short / medium passes, %': 0.6
-            },
-            'Progression': {
-                'Successful dribbles, %': 0.4,
-                'Accurate short / medium passes, %': 0.3,
-                'Accurate passes to final third, %': 0.3
-            },
-            'Creation': {
-                'Assists per 90': 0.5,
-                'xA per 90': 0.5
-            },
-            'Defense': {
-                'Defensive duels won, %': 0.5,
-                'Interceptions per 90': 0.5
-            }
+        'progression': {
+            'Successful dribbles, %': 0.4,
+            'Accurate short / medium passes, %': 0.3,
+            'Accurate passes to final third, %': 0.3
+        },
+        'creation': {
+            'Assists per 90': 0.5,
+            'xA per 90': 0.5
+        },
+        'defense': {
+            'Defensive duels won, %': 0.5,
+            'Interceptions per 90': 0.5
         }
     },
     'Wingers': {
-        'es': {
-            'Ataque': {
-                'xG per 90': 0.4,
-                'Goals per 90': 0.4,
-                'Touches in box per 90': 0.2
-            },
-            'Construcción': {
-                'Accurate passes to final third, %': 1.0
-            },
-            'Progresión': {
-                'Offensive duels won, %': 0.5,
-                'Successful dribbles, %': 0.5
-            },
-            'Creación': {
-                'xA per 90': 0.4,
-                'Assists per 90': 0.4,
-                'Accurate passes to final third, %': 0.2
-            },
-            'Defensa': {
-                'Defensive duels won, %': 0.6,
-                'Interceptions per 90': 0.4
-            }
+        'attack': {
+            'xG per 90': 0.4,
+            'Goals per 90': 0.4,
+            'Touches in box per 90': 0.2
+        },
+        'build_up': {
+            'Accurate passes to final third, %': 1.0
+        },
+        'progression': {
+            'Offensive duels won, %': 0.5,
+            'Successful dribbles, %': 0.5
         },
-        'en': {
-            'Attack': {
-                'xG per 90': 0.4,
-                'Goals per 90': 0.4,
-                'Touches in box per 90': 0.2
-            },
-            'Build-up': {
-                'Accurate passes to final third, %': 1.0
-            },
-            'Progression': {
-                'Offensive duels won, %': 0.5,
-                'Successful dribbles, %': 0.5
-            },
-            'Creation': {
-                'xA per 90': 0.4,
-                'Assists per 90': 0.4,
-                'Accurate passes to final third, %': 0.2
-            },
-            'Defense': {
-                'Defensive duels won, %': 0.6,
-                'Interceptions per 90': 0.4
-            }
+        'creation': {
+            'xA per 90': 0.4,
+            'Assists per 90': 0.4,
+            'Accurate passes to final third, %': 0.2
+        },
+        'defense': {
+            'Defensive duels won, %': 0.6,
+            'Interceptions per 90': 0.4
         }
     },
     'Forward': {
-        'es': {
-            'Ataque': {
-                'xG per 90': 0.3,
-                'Goals per 90': 0.4,
-                'Non-penalty goals per 90': 0.3
-            },
-            'Construcción': {
-                'Passes to penalty area per 90': 0.5,
-                'Accurate passes to final third, %': 0.5
-            },
-            'Progresión': {
-                'Head goals per 90': 0.5,
-                'Aerial duels won, %': 0.5
-            },
-            'Creación': {
-                'xA per 90': 0.5,
-                'Assists per 90': 0.5
-            },
-            'Movimiento': {
-                'Touches in box per 90': 0.6,
-                'Passes to penalty area per 90': 0.4
-            }
+        'attack': {
+            'xG per 90': 0.3,
+            'Goals per 90': 0.4,
+            'Non-penalty goals per 90': 0.3
+        },
+        'build_up': {
+            'Passes to penalty area per 90': 0.5,
+            'Accurate passes to final third, %': 0.5
+        },
+        'progression': {
+            'Head goals per 90': 0.5,
+            'Aerial duels won, %': 0.5
+        },
+        'creation': {
+            'xA per 90': 0.5,
+            'Assists per 90': 0.5
         },
-        'en': {
-            'Attack': {
-                'xG per 90': 0.3,
-                'Goals per 90': 0.4,
-                'Non-penalty goals per 90': 0.3
-            },
-            'Build-up': {
-                'Passes to penalty area per 90': 0.5,
-                'Accurate passes to final third, %': 0.5
-            },
-            'Progression': {
-                'Head goals per 90': 0.5,
-                'Aerial duels won, %': 0.5
-            },
-            'Creation': {
-                'xA per 90': 0.5,
-                'Assists per 90': 0.5
-            },
-            'Movement': {
-                'Touches in box per 90': 0.6,
-                'Passes to penalty area per 90': 0.4
-            }
+        'movement': {
+            'Touches in box per 90': 0.6,
+            'Passes to penalty area per 90': 0.4
         }
     }
 }
+
+# Vista por idioma con la forma original: {rol: {'es': {etiqueta: pesos}, 'en': {etiqueta: pesos}}}
+summarized_metrics = {
+    rol: {
+        idioma: {category_labels[categoria][idioma]: pesos for categoria, pesos in categorias.items()}
+        for idioma in ('es', 'en')
+    }
+    for rol, categorias in role_metrics.items()
+}
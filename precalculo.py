@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from cache_compartida import CACHE
+from data_loader import FUENTE_DATOS, cargar_datos
+from metrics_config import role_metrics
+from radar_utils import calcular_percentiles
+from referencia import calcular_percentiles_referencia
+from snapshot import DIRECTORIO_SNAPSHOTS, clave_fuente
+
+# Tablas de percentiles + ELO por rol, calculadas para todos los roles en una pasada
+# Las columnas son los IDs de categoría de metrics_config: la misma tabla sirve para ambos idiomas
+# Se guardan junto al snapshot de datos: data/snapshots/<archivo>_percentiles/
+
+
+def directorio_tablas(fuente=None, agrupar_por=None, poblacion=None):
+    nombre = clave_fuente(fuente or FUENTE_DATOS)
+    if agrupar_por:
+        nombre += f"_por_{agrupar_por}"
+    if poblacion is not None:
+        nombre += f"_ref_{poblacion.clave}"
+    return DIRECTORIO_SNAPSHOTS / f"{nombre}_percentiles"
+
+# Clave de las tablas de una versión: los percentiles por grupo (p. ej. por competición)
+# o contra otra población de referencia son otras tablas
+
+def version_tablas(version, agrupar_por=None, poblacion=None):
+    if agrupar_por:
+        version = f"{version}-{agrupar_por}"
+    if poblacion is not None:
+        version = f"{version}-{poblacion.clave}"
+    return version
+
+# Métricas que usa un rol
+
+def columnas_rol(pesos_rol):
+    return sorted({m for pesos in pesos_rol.values() for m in pesos})
+
+# Huella de las entradas de un rol: sus columnas en todo el dataframe más su configuración de pesos
+# Si no cambia, las tablas guardadas del rol siguen siendo válidas
+
+def huella_rol(df, pesos_rol, id_col="UniqueID", agrupar_por=None, poblacion=None):
+    extra = [agrupar_por] if agrupar_por else []
+    if poblacion is not None:
+        extra += [c for c in ("Primary position", "Minutes played") if c in df.columns]
+    columnas = [id_col] + extra + [c for c in columnas_rol(pesos_rol) if c in df.columns]
+    h = hashlib.sha256(json.dumps(pesos_rol).encode("utf-8"))
+    if poblacion is not None:
+        h.update(poblacion.clave.encode("utf-8"))
+    h.update(json.dumps(columnas).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df[columnas], index=False).to_numpy().tobytes())
+    return h.hexdigest()[:16]
+
+
+def _ruta_tabla(directorio, rol):
+    return Path(directorio) / f"{rol}.arrow"
+
+
+def _leer_indice(directorio):
+    try:
+        return json.loads((Path(directorio) / "indice.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def _leer_tabla(ruta):
+    try:
+        return pd.read_feather(ruta)
+    except (ImportError, OSError, ValueError):
+        return None
+
+# Guardar es opcional: sin pyarrow o sin permisos las tablas quedan solo en memoria
+# Cada archivo se escribe en un temporal del mismo directorio y se reemplaza de una vez (os.replace),
+# y el índice va al final: un proceso que lee a la vez nunca ve una tabla a medias ni un índice
+# que apunte a tablas que todavía no están
+
+def _guardar(directorio, tablas_nuevas, indice):
+    try:
+        Path(directorio).mkdir(parents=True, exist_ok=True)
+        for rol, (tabla, _) in tablas_nuevas.items():
+            ruta = _ruta_tabla(directorio, rol)
+            temporal = ruta.with_suffix(".tmp")
+            tabla.to_feather(temporal)
+            os.replace(temporal, ruta)
+        temporal = Path(directorio) / "indice.json.tmp"
+        temporal.write_text(json.dumps(indice, indent=2), encoding="utf-8")
+        os.replace(temporal, Path(directorio) / "indice.json")
+    except (ImportError, OSError):
+        pass
+
+# Esta función calcula la tabla de un rol (ELO = promedio de percentiles)
+# Con agrupar_por, los percentiles se calculan dentro de cada grupo; las filas quedan en el orden de df
+# Con una población de referencia, cada jugador se compara contra esa población (ver referencia.py)
+
+def calcular_tabla_rol(df, pesos_rol, id_col="UniqueID", agrupar_por=None, rol=None, poblacion=None, version=None,
+                       grupo=None):
+    if agrupar_por and (poblacion is None or poblacion.base is None):
+        partes = [calcular_tabla_rol(parte, pesos_rol, id_col, None, rol, poblacion, version, nombre)[0]
+                  for nombre, parte in df.groupby(agrupar_por, observed=True, sort=False)]
+        return pd.concat(partes).set_index(id_col).loc[df[id_col]].reset_index(), list(pesos_rol.keys())
+    if poblacion is None:
+        df_percentiles, categorias = calcular_percentiles(df, pesos_rol, unique_col=id_col)
+    else:
+        df_percentiles, categorias = calcular_percentiles_referencia(df, version, pesos_rol, rol, poblacion, id_col,
+                                                                     grupo)
+    return df_percentiles.rename(columns={'Promedio': 'ELO'}), categorias
+
+# Esta función construye las tablas de todos los roles y solo recalcula los roles cuyas entradas cambiaron
+# Devuelve (tablas, roles_recalculados)
+
+def actualizar_tablas(df, version, directorio, config=None, id_col="UniqueID", agrupar_por=None, poblacion=None):
+    config = config or role_metrics
+    anterior = _leer_indice(directorio).get("huellas", {})
+    huellas = {}
+    tablas = {}
+    nuevas = {}
+
+    for rol, pesos_rol in config.items():
+        huellas[rol] = huella_rol(df, pesos_rol, id_col, agrupar_por, poblacion)
+        tabla = None
+        if anterior.get(rol) == huellas[rol]:
+            tabla = _leer_tabla(_ruta_tabla(directorio, rol))
+        if tabla is None:
+            nuevas[rol] = calcular_tabla_rol(df, pesos_rol, id_col, agrupar_por, rol, poblacion, version)
+            tablas[rol] = nuevas[rol]
+        else:
+            tablas[rol] = (tabla, list(pesos_rol.keys()))
+
+    if nuevas or anterior != huellas:
+        _guardar(directorio, nuevas, {"version": version, "huellas": huellas})
+    return tablas, list(nuevas)
+
+# Esta función devuelve las tablas de la versión de datos vigente (caché de proceso), indexadas por UniqueID
+# Cambiar de rol en la app pasa a ser una búsqueda en un diccionario
+
+def obtener_tablas(df, version, fuente=None, id_col="UniqueID", agrupar_por=None, poblacion=None):
+    clave = version_tablas(version, agrupar_por, poblacion)
+
+    def construir():
+        tablas, _ = actualizar_tablas(df, version, directorio_tablas(fuente, agrupar_por, poblacion),
+                                      id_col=id_col, agrupar_por=agrupar_por, poblacion=poblacion)
+        return {rol: (tabla.set_index(id_col), categorias) for rol, (tabla, categorias) in tablas.items()}
+
+    # Los rankings e índices de similitud se guardan con la clave de estas tablas: se invalidan con ellas
+    versiones = (version,) if poblacion is None or poblacion.base is None else (version, poblacion.version_base)
+    return CACHE.obtener("percentiles", clave, construir, versiones=versiones, produce=clave)
+
+
+if __name__ == "__main__":
+    # Uso: python precalculo.py  (precalcula las tablas para la fuente configurada)
+    df, version = cargar_datos()
+    _, recalculados = actualizar_tablas(df, version, directorio_tablas())
+    print(f"Versión {version}: roles recalculados {recalculados or 'ninguno'}")
@@ -1,6 +1,14 @@
-from scipy.stats import rankdata
+import json
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
+
+from instrumentacion import medido
+from textos import BANDERAS, URL_LOGO
+
+# scipy.stats y plotly se importan al usarlos por primera vez: el arranque de la app no los necesita
+# mientras las tablas de percentiles salgan del disco y el radar todavía no se haya dibujado
 
 # Esta función verifica si la posición del jugador coincide con el rol seleccionado
 # Considera solo la primera posición listada en caso de múltiples
@@ -11,78 +19,78 @@ def cumple_rol(posicion, rol, keywords_by_role):
     primera_pos = str(posicion).split(',')[0].strip()
     return any(keyword in primera_pos for keyword in keywords_by_role.get(rol, []))
 
+# Esta función compila el bloque de métricas de un rol en una matriz de pesos (métricas x categorías)
+# También devuelve, por categoría, el orden en que se declararon sus métricas (-1 = sin métrica)
+
+def compilar_pesos(resumen_metricas):
+    categorias = list(resumen_metricas.keys())
+    metricas = list(dict.fromkeys(m for pesos in resumen_metricas.values() for m in pesos))
+    posicion = {metrica: i for i, metrica in enumerate(metricas)}
+
+    max_metricas = max((len(pesos) for pesos in resumen_metricas.values()), default=0)
+    matriz_pesos = np.zeros((len(metricas), len(categorias)))
+    orden = np.full((max_metricas, len(categorias)), -1)
+    for j, pesos in enumerate(resumen_metricas.values()):
+        for k, (metrica, peso) in enumerate(pesos.items()):
+            matriz_pesos[posicion[metrica], j] = peso
+            orden[k, j] = posicion[metrica]
+    return metricas, categorias, matriz_pesos, orden
+
+# Esta función calcula el puntaje ponderado de cada categoría para todos los jugadores a la vez
+# Las métricas vacías (o ausentes del archivo) no suman al puntaje ni al peso total
+# La suma se acumula en el orden declarado para reproducir exactamente los empates del cálculo fila a fila
+
+def calcular_puntajes(df_completo, resumen_metricas):
+    metricas, categorias, matriz_pesos, orden = compilar_pesos(resumen_metricas)
+    valores = df_completo.reindex(columns=metricas).to_numpy(dtype=float, copy=True)
+    presentes = ~np.isnan(valores)
+
+    puntaje = np.zeros((len(valores), len(categorias)))
+    peso_total = np.zeros((len(valores), len(categorias)))
+    columnas = np.arange(len(categorias))
+    for fila_orden in orden:
+        idx = np.where(fila_orden >= 0, fila_orden, 0)
+        pesos = np.where(fila_orden >= 0, matriz_pesos[idx, columnas], 0.0)
+        usar = presentes[:, idx] & (fila_orden >= 0)
+        puntaje += np.where(usar, valores[:, idx] * pesos, 0.0)
+        peso_total += np.where(usar, np.abs(pesos), 0.0)
+
+    puntajes = np.divide(puntaje, peso_total, out=np.zeros_like(puntaje), where=peso_total > 0)
+    return puntajes, categorias
+
 # Esta función calcula los percentiles de los jugadores con base en las métricas resumidas
 # Se usa siempre el dataframe completo para evitar distorsión al aplicar filtros
 
+@medido("calcular_percentiles")
 def calcular_percentiles(df_completo, resumen_metricas, unique_col="Player"):
-    nombres_categorias = list(resumen_metricas.keys())
-    data = []
-
-    for _, fila in df_completo.iterrows():
-        jugador = fila[unique_col]
-        resultados = {unique_col: jugador}
-        for categoria, pesos in resumen_metricas.items():
-            puntaje = 0
-            peso_total = 0
-            for metrica, peso in pesos.items():
-                valor = fila.get(metrica)
-                if pd.notna(valor):
-                    puntaje += valor * peso
-                    peso_total += abs(peso)
-            resultados[categoria] = puntaje / peso_total if peso_total > 0 else 0
-        data.append(resultados)
-
-    df_resultados = pd.DataFrame(data)
-
-    for categoria in nombres_categorias:
-        valores = df_resultados[categoria].values
-        df_resultados[categoria] = rankdata(valores, method='average') / len(valores) * 100
+    from scipy.stats import rankdata
 
-    df_resultados['Promedio'] = df_resultados[nombres_categorias].mean(axis=1)
-    return df_resultados, nombres_categorias
+    puntajes, nombres_categorias = calcular_puntajes(df_completo, resumen_metricas)
 
-# Esta función genera un radar chart en Plotly para los jugadores seleccionados
-# Utiliza sus métricas resumidas y los muestra con colores modernos
+    percentiles = np.empty_like(puntajes)
+    if len(puntajes):
+        percentiles = rankdata(puntajes, method='average', axis=0) / len(puntajes) * 100
 
-def generar_radar(jugadores_top, df_original, categorias, rol, top_n, idioma, id_column="Player"):
-    fig = go.Figure()
+    df_resultados = pd.DataFrame(percentiles, columns=nombres_categorias)
+    df_resultados.insert(0, unique_col, df_completo[unique_col].to_numpy())
 
-    # Paleta de colores moderna y suave
-    colores = ['#30C5FF', '#FF6B6B', '#FFD93D', '#6BCB77', '#D3ADF7']
+    df_resultados['Promedio'] = df_resultados[nombres_categorias].mean(axis=1)
+    return df_resultados, nombres_categorias
 
-    # Diccionario para asignar banderas a países comunes
-    banderas = {
-        "Argentina": "🇦🇷", "Brazil": "🇧🇷", "Colombia": "🇨🇴", "Uruguay": "🇺🇾",
-        "Chile": "🇨🇱", "Paraguay": "🇵🇾", "Peru": "🇵🇪", "Ecuador": "🇪🇨",
-        "Venezuela": "🇻🇪", "Bolivia": "🇧🇴"
-    }
+# Paleta de colores moderna y suave
+COLORES_RADAR = ['#30C5FF', '#FF6B6B', '#FFD93D', '#6BCB77', '#D3ADF7']
 
-    for i, (uid, valores) in enumerate(jugadores_top):
-        fila = df_original[df_original[id_column] == uid]
-        if fila.empty:
-            continue
-        fila = fila.iloc[0]
-        pais = fila.get("Birth country", "")
-        bandera = banderas.get(pais, "")
-        nombre = fila["Player"]
-        etiqueta = f"{bandera} {nombre}" if bandera else nombre
+CREDITO_RADAR = "By: Felipe Ormazábal<br>Football Scout | Data Analyst"
 
-        r = [valores[c] for c in categorias] + [valores[categorias[0]]]
-        fig.add_trace(go.Scatterpolar(
-            r=r,
-            theta=categorias + [categorias[0]],
-            fill='toself',
-            name=etiqueta,
-            line=dict(color=colores[i % len(colores)], width=3),
-            opacity=0.85
-        ))
+# Esta función arma una sola vez el layout común a todos los radares (ejes, colores, fuentes, logo y crédito)
+# Cada figura solo agrega su título y sus trazas
 
-    # Título dinámico con salto de línea
-    titulo = f"Radar Scouting CONMEBOL<br>Top {top_n} {rol}s" if idioma == 'English' else f"Radar Scouting CONMEBOL<br>Top {top_n} {rol}s"
+@lru_cache(maxsize=1)
+def plantilla_radar():
+    import plotly.graph_objects as go
 
-    fig.update_layout(
+    return go.Layout(
         title=dict(
-            text=f"<b>{titulo}</b>",
             x=0.5,
             y=0.93,
             xanchor='center',
@@ -107,7 +115,119 @@ def generar_radar(jugadores_top, df_original, categorias, rol, top_n, idioma, id
         paper_bgcolor='#0d0d0d',
         plot_bgcolor='#0d0d0d',
         showlegend=True,
-        legend=dict(font=dict(color='white', size=12))
+        legend=dict(font=dict(color='white', size=12)),
+        images=[dict(
+            source=URL_LOGO,
+            xref="paper", yref="paper",
+            x=0, y=1.15,
+            sizex=0.3, sizey=0.3,
+            xanchor="left", yanchor="top",
+            opacity=0.8,
+            layer="above"
+        )],
+        annotations=[dict(
+            text=CREDITO_RADAR,
+            showarrow=False,
+            x=0.5,
+            y=-0.25,
+            xref="paper",
+            yref="paper",
+            font=dict(size=12, color="white"),
+            align="center"
+        )]
     )
 
+# Esta función arma la especificación compacta de un radar (solo datos, sin objetos de Plotly)
+# Se puede serializar a JSON para otros clientes o para caché
+# df_original puede ser el almacén indexado por id_column o la tabla plana
+
+def especificacion_radar(jugadores_top, df_original, categorias, rol, top_n, idioma, id_column="Player"):
+    # Con el almacén indexado por UniqueID cada jugador es una búsqueda directa
+    indexado = df_original.index.name == id_column
+
+    jugadores = []
+    for i, (uid, valores) in enumerate(jugadores_top):
+        if indexado:
+            if uid not in df_original.index:
+                continue
+            fila = df_original.loc[uid]
+        else:
+            fila = df_original[df_original[id_column] == uid]
+            if fila.empty:
+                continue
+            fila = fila.iloc[0]
+        pais = fila.get("Birth country", "")
+        bandera = BANDERAS.get(pais, "")
+        nombre = fila["Player"]
+        jugadores.append({
+            "id": uid,
+            "etiqueta": f"{bandera} {nombre}" if bandera else nombre,
+            "color": COLORES_RADAR[i % len(COLORES_RADAR)],
+            "valores": [round(float(valores[c]), 2) for c in categorias]
+        })
+
+    # Título dinámico con salto de línea
+    titulo = f"Radar Scouting CONMEBOL<br>Top {top_n} {rol}s"
+
+    return {"titulo": titulo, "idioma": idioma, "categorias": list(categorias), "jugadores": jugadores}
+
+
+def especificacion_json(especificacion):
+    return json.dumps(especificacion, ensure_ascii=False, separators=(",", ":"))
+
+# Esta función construye la figura de Plotly a partir de la especificación y la plantilla en caché
+
+def figura_desde_especificacion(especificacion):
+    import plotly.graph_objects as go
+
+    categorias = especificacion["categorias"]
+    fig = go.Figure(layout=plantilla_radar())
+    fig.layout.title.text = f"<b>{especificacion['titulo']}</b>"
+
+    fig.add_traces([
+        go.Scatterpolar(
+            r=jugador["valores"] + jugador["valores"][:1],
+            theta=categorias + categorias[:1],
+            fill='toself',
+            name=jugador["etiqueta"],
+            line=dict(color=jugador["color"], width=3),
+            opacity=0.85
+        )
+        for jugador in especificacion["jugadores"]
+    ])
+    return fig
+
+# Esta función genera un radar chart en Plotly para los jugadores seleccionados
+# Utiliza sus métricas resumidas y los muestra con colores modernos
+
+@medido("generar_radar")
+def generar_radar(jugadores_top, df_original, categorias, rol, top_n, idioma, id_column="Player"):
+    especificacion = especificacion_radar(jugadores_top, df_original, categorias, rol, top_n, idioma, id_column)
+    return figura_desde_especificacion(especificacion)
+
+# Esta función genera las líneas de evolución por jornada (ELO o una categoría) de los jugadores del radar
+# jugadores: [(UniqueID, nombre)] en el orden del radar, para usar los mismos colores
+
+def generar_tendencia(trayectorias, columna, jugadores, titulo):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for i, (uid, nombre) in enumerate(jugadores):
+        filas = trayectorias[trayectorias["UniqueID"] == uid]
+        fig.add_trace(go.Scatter(
+            x=filas["fecha"],
+            y=filas[columna],
+            mode='lines+markers',
+            name=nombre,
+            line=dict(color=COLORES_RADAR[i % len(COLORES_RADAR)], width=3)
+        ))
+    fig.update_layout(
+        title=dict(text=f"<b>{titulo}</b>", x=0.5, xanchor='center', font=dict(size=18, color='white')),
+        paper_bgcolor='#0d0d0d',
+        plot_bgcolor='#0d0d0d',
+        font=dict(color='white'),
+        xaxis=dict(gridcolor='rgba(255,255,255,0.1)'),
+        yaxis=dict(range=[0, 100], gridcolor='rgba(255,255,255,0.1)'),
+        legend=dict(orientation='h', y=-0.2)
+    )
     return fig
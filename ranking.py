@@ -0,0 +1,72 @@
+import numpy as np
+
+from cache_compartida import CACHE
+
+# Orden por ELO precalculado por rol: los top-N filtrados recorren el orden ya hecho con la máscara de filtros
+# Las filas están alineadas con el almacén de jugadores (mismo orden que la tabla de datos)
+
+TAMANO_BLOQUE = 256
+
+# Esta función elige los n mejores por ELO entre las filas de la máscara sin ordenar todo
+# Se usa cuando no hay orden precalculado (ELO de pesos "qué pasa si", que cambia en cada ajuste)
+
+def top_n_argpartition(elo, mascara, n):
+    candidatos = np.flatnonzero(mascara)
+    if n <= 0:
+        return candidatos[:0]
+    if len(candidatos) > n:
+        # Los empates con el n-ésimo se cortan por orden de la tabla, igual que el orden estable
+        valores = elo[candidatos]
+        umbral = -np.partition(-valores, n - 1)[n - 1]
+        mayores = candidatos[valores > umbral]
+        candidatos = np.concatenate([mayores, candidatos[valores == umbral][:n - len(mayores)]])
+    return candidatos[np.argsort(-elo[candidatos], kind="stable")]
+
+
+class RankingRol:
+
+    # ordenado=False no arma el orden completo: conviene para un ELO que se consulta una sola vez
+    # (pesos ajustados); top y ordenar usan entonces top_n_argpartition con el mismo desempate
+
+    def __init__(self, df_percentiles, categorias, ordenado=True):
+        self.ids = df_percentiles.index
+        self.categorias = list(categorias)
+        self.elo = df_percentiles["ELO"].to_numpy(dtype=float)
+        self.valores = df_percentiles[self.categorias].to_numpy(dtype=float)
+        # Mayor ELO primero; los empates conservan el orden de la tabla
+        self.orden = np.argsort(-self.elo, kind="stable") if ordenado else None
+
+    # Posiciones de los n mejores dentro de la máscara, recorriendo el orden por bloques
+
+    def top(self, mascara, n):
+        if self.orden is None:
+            return top_n_argpartition(self.elo, mascara, n)
+        elegidos = []
+        encontrados = 0
+        for inicio in range(0, len(self.orden), TAMANO_BLOQUE):
+            bloque = self.orden[inicio:inicio + TAMANO_BLOQUE]
+            bloque = bloque[mascara[bloque]]
+            elegidos.append(bloque)
+            encontrados += len(bloque)
+            if encontrados >= n:
+                break
+        if not elegidos:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(elegidos)[:n]
+
+    # Todas las filas de la máscara, de mayor a menor ELO (para la tabla)
+
+    def ordenar(self, mascara):
+        if self.orden is None:
+            return top_n_argpartition(self.elo, mascara, int(mascara.sum()))
+        return self.orden[mascara[self.orden]]
+
+    # Estructura (UniqueID, {etiqueta: percentil}) que usa generar_radar, armada desde los arreglos
+
+    def jugadores_radar(self, posiciones, etiquetas):
+        return [(self.ids[i], dict(zip(etiquetas, self.valores[i].tolist()))) for i in posiciones]
+
+# Esta función devuelve el ranking de un rol para una versión de las tablas de percentiles (caché compartida)
+
+def obtener_ranking(tablas, version, rol):
+    return CACHE.obtener("ranking", (version, rol), lambda: RankingRol(*tablas[rol]), versiones=(version,))
@@ -0,0 +1,104 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from cache_compartida import CACHE
+from metrics_config import role_by_position
+from radar_utils import calcular_puntajes
+
+# Poblaciones de referencia para los percentiles: contra quién se compara a cada jugador
+#   todos        -> todos los jugadores (comportamiento original)
+#   rol          -> solo los jugadores del mismo rol (los arqueros contra arqueros)
+#   rol_minutos  -> mismo rol y un mínimo de minutos jugados
+# La población puede salir de otra tabla (una liga base externa) en lugar de la tabla evaluada
+#
+# De cada población se guardan los puntajes por categoría ya ordenados: el percentil de un jugador
+# es una búsqueda binaria (O(log n)), así que se pueden evaluar jugadores nuevos o filtrados sin volver a rankear
+
+MODOS = ("todos", "rol", "rol_minutos")
+MINUTOS_REFERENCIA = 270     # tres partidos completos
+MAX_DISTRIBUCIONES = 64
+
+CACHE.configurar_espacio("distribuciones", max_entradas=MAX_DISTRIBUCIONES)
+
+
+class PoblacionReferencia:
+
+    def __init__(self, modo="todos", min_minutos=MINUTOS_REFERENCIA, base=None, version_base=None):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de referencia desconocido: {modo} (opciones: {', '.join(MODOS)})")
+        self.modo = modo
+        self.min_minutos = min_minutos if modo == "rol_minutos" else 0
+        self.base = base
+        self.version_base = version_base
+
+    # Texto corto que identifica la población (claves de caché y nombres de carpeta)
+
+    @property
+    def clave(self):
+        clave = self.modo + (str(self.min_minutos) if self.min_minutos else "")
+        if self.base is not None:
+            clave += f"@{self.version_base}"
+        return clave
+
+    # Filas de df que forman parte de la población para un rol
+
+    def mascara(self, df, rol):
+        mascara = np.ones(len(df), dtype=bool)
+        if self.modo != "todos" and "Primary position" in df.columns:
+            roles = df["Primary position"].astype(object).map(role_by_position)
+            mascara &= (roles == rol).to_numpy()
+        if self.min_minutos and "Minutes played" in df.columns:
+            mascara &= (df["Minutes played"].to_numpy(dtype=float) >= self.min_minutos)
+        if not mascara.any():
+            # Un rol sin jugadores en la población se compara contra todos
+            mascara[:] = True
+        return mascara
+
+
+class DistribucionReferencia:
+
+    def __init__(self, puntajes, categorias):
+        self.categorias = list(categorias)
+        self.ordenados = np.sort(puntajes, axis=0)
+        self.n = len(puntajes)
+
+    # Percentil con empates promediados: (menores + (iguales + 1) / 2) / n * 100
+    # Para un jugador que está en la población coincide exactamente con rankdata(method='average')
+    # Un jugador externo por encima de todos queda en 100
+
+    def percentiles(self, puntajes):
+        resultado = np.empty(puntajes.shape, dtype=float)
+        for j in range(puntajes.shape[1]):
+            izquierda = np.searchsorted(self.ordenados[:, j], puntajes[:, j], side="left")
+            derecha = np.searchsorted(self.ordenados[:, j], puntajes[:, j], side="right")
+            resultado[:, j] = (izquierda + derecha + 1) / 2
+        return np.minimum(resultado / self.n * 100, 100.0)
+
+# Esta función construye (o toma de la caché) la distribución de una población para un rol
+# grupo distingue las poblaciones de cada competición cuando los percentiles se calculan por competición
+
+def obtener_distribucion(df_base, version_base, pesos_rol, rol, poblacion, grupo=None):
+    clave = (version_base, grupo, rol, poblacion.clave, json.dumps(pesos_rol, sort_keys=True))
+
+    def construir():
+        puntajes, categorias = calcular_puntajes(df_base[poblacion.mascara(df_base, rol)], pesos_rol)
+        return DistribucionReferencia(puntajes, categorias)
+
+    return CACHE.obtener("distribuciones", clave, construir, versiones=(version_base,))
+
+# Esta función calcula los percentiles de df contra una población de referencia
+# Devuelve la misma tabla que radar_utils.calcular_percentiles (unique_col, categorías y 'Promedio')
+
+def calcular_percentiles_referencia(df, version, pesos_rol, rol, poblacion, unique_col="UniqueID", grupo=None):
+    if poblacion.base is not None:
+        distribucion = obtener_distribucion(poblacion.base, poblacion.version_base, pesos_rol, rol, poblacion)
+    else:
+        distribucion = obtener_distribucion(df, version, pesos_rol, rol, poblacion, grupo)
+
+    puntajes, categorias = calcular_puntajes(df, pesos_rol)
+    df_resultados = pd.DataFrame(distribucion.percentiles(puntajes), columns=categorias)
+    df_resultados.insert(0, unique_col, df[unique_col].to_numpy())
+    df_resultados['Promedio'] = df_resultados[categorias].mean(axis=1)
+    return df_resultados, categorias
@@ -0,0 +1,351 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import sys
+from datetime import date, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import actualizador
+from batch_radar import COLUMNAS_TABLA, IDIOMAS, normalizar_spec
+from cache_compartida import CACHE, TTL_INTERACCION
+from competiciones import COLUMNA_COMPETICION, descubrir_competiciones
+from config_loader import etiquetas_categorias
+from dataset import cargar_dataset
+from metrics_config import roles_map
+from radar_utils import especificacion_radar, figura_desde_especificacion
+from ranking import obtener_ranking
+from referencia import MODOS
+
+# Servicio HTTP local con las mismas tablas de la app, para otras herramientas (reportes, bots)
+# Los datos, las tablas de percentiles, los rankings y los índices de filtros quedan en la caché compartida
+# del proceso (y el actualizador cambia de versión en segundo plano); cada respuesta se serializa una sola vez
+# y lleva un ETag de la versión de las tablas + la consulta, así que If-None-Match responde 304 sin recalcular
+#
+# Uso:
+#   python servicio.py --puerto 8502
+#
+# Rutas (GET, parámetros en la query; /percentiles y /lote también por POST con cuerpo JSON):
+#   /salud                              versión de los datos, roles y países
+#   /ranking?rol=Forward&pais=Brazil&minutos=300&edad=18-25&limite=50&desde=0
+#   /percentiles?rol=Forward&ids=id1,id2,...
+#   /radar?rol=Forward&top=3&formato=figura|especificacion
+#   /lote   {"consultas": [{"ruta": "/ranking", "parametros": {...}}, ...]}
+# Todas aceptan además idioma (es/en), competiciones (separadas por coma), por_competicion, referencia y base
+
+PUERTO = 8502
+LIMITE_RANKING = 100
+MAX_LOTE = 100
+MAX_IDS = 5000
+
+CACHE.configurar_espacio("respuestas", max_entradas=256, ttl=TTL_INTERACCION)
+
+_logger = logging.getLogger("radar.servicio")
+
+
+class ErrorConsulta(ValueError):
+
+    def __init__(self, mensaje, estado=HTTPStatus.BAD_REQUEST):
+        super().__init__(mensaje)
+        self.estado = estado
+
+# Valores de pandas/numpy a JSON: NaN -> null, fechas en ISO, escalares de numpy a Python
+
+def _json_valor(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if hasattr(valor, "item"):
+        return valor.item()
+    return str(valor)
+
+
+def _limpiar(valor):
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    if isinstance(valor, dict):
+        return {k: _limpiar(v) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_limpiar(v) for v in valor]
+    return valor
+
+
+def a_json(valor):
+    return json.dumps(_limpiar(valor), ensure_ascii=False, separators=(",", ":"), default=_json_valor).encode("utf-8")
+
+# Filas del almacén como registros JSON (sin NaN)
+
+def _registros(tabla):
+    tabla = tabla.astype(object).where(tabla.notna(), None)
+    return tabla.reset_index().to_dict("records")
+
+
+def _lista(valor):
+    if valor is None or valor == "":
+        return []
+    if isinstance(valor, str):
+        return [parte.strip() for parte in valor.split(",") if parte.strip()]
+    if not isinstance(valor, list):
+        raise ErrorConsulta(f"Se esperaba una lista o texto separado por comas: {valor!r}")
+    return [str(v) for v in valor]
+
+
+def _entero(parametros, clave, defecto):
+    valor = parametros.get(clave, defecto)
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErrorConsulta(f"{clave} debe ser un entero: {valor!r}")
+
+
+def _booleano(valor):
+    return str(valor).lower() in ("1", "true", "si", "sí", "yes")
+
+# Filtros de la consulta con los mismos valores por defecto que la app y batch_radar
+
+def _spec(parametros):
+    spec = {clave: parametros[clave] for clave in ("rol", "pais", "idioma") if parametros.get(clave) is not None}
+    spec["minutos"] = _entero(parametros, "minutos", 100)
+    spec["top"] = _entero(parametros, "top", 3)
+    edad = parametros.get("edad")
+    if edad:
+        try:
+            spec["edad"] = [int(v) for v in (edad.split("-", 1) if isinstance(edad, str) else edad)]
+        except (TypeError, ValueError):
+            raise ErrorConsulta(f"edad debe ser min-max: {edad!r}")
+        if len(spec["edad"]) not in (1, 2):
+            raise ErrorConsulta(f"edad debe ser min-max: {edad!r}")
+        if len(spec["edad"]) == 1:
+            spec["edad"] *= 2
+    try:
+        return normalizar_spec(spec)
+    except ValueError as error:
+        raise ErrorConsulta(str(error))
+
+
+class ServicioRadar:
+
+    def __init__(self, fuente=None):
+        self.fuente = fuente
+
+    # Esta función devuelve los datos de la selección pedida (desde la caché compartida salvo la primera vez)
+    # Las competiciones se revisan contra el registro antes de cargar: un KeyError de adentro es un error del servicio
+
+    def datos(self, parametros):
+        referencia = parametros.get("referencia") or "todos"
+        if referencia not in MODOS:
+            raise ErrorConsulta(f"Referencia desconocida: {referencia} (opciones: {', '.join(MODOS)})")
+        agrupar_por = COLUMNA_COMPETICION if _booleano(parametros.get("por_competicion", "")) else None
+        competiciones = _lista(parametros.get("competiciones"))
+        base = parametros.get("base") or None
+        if competiciones or base:
+            registro = descubrir_competiciones()
+            desconocidas = [nombre for nombre in competiciones + ([base] if base else []) if nombre not in registro]
+            if desconocidas:
+                raise ErrorConsulta(f"Competición desconocida: {', '.join(map(str, desconocidas))}",
+                                    HTTPStatus.NOT_FOUND)
+        return cargar_dataset(self.fuente, competiciones or None, agrupar_por, referencia, base)
+
+    # Esta función responde una consulta: (cuerpo JSON en bytes, ETag)
+    # si_no_coincide es el If-None-Match del cliente; si coincide el cuerpo es None (304)
+
+    def responder(self, ruta, parametros, si_no_coincide=None):
+        manejador = RUTAS.get(ruta.rstrip("/") or "/")
+        if manejador is None:
+            raise ErrorConsulta(f"Ruta desconocida: {ruta}", HTTPStatus.NOT_FOUND)
+        datos = self.datos(parametros)
+        consulta = json.dumps([ruta, parametros], sort_keys=True, ensure_ascii=False, default=str)
+        etag = f'"{datos["version_tablas"]}-{hashlib.sha1(consulta.encode("utf-8")).hexdigest()[:16]}"'
+        if si_no_coincide and etag in (e.strip() for e in si_no_coincide.split(",")):
+            return None, etag
+        cuerpo = CACHE.obtener("respuestas", etag, lambda: a_json(manejador(self, datos, parametros)),
+                               versiones=(datos["version_tablas"],))
+        return cuerpo, etag
+
+    def salud(self, datos, parametros):
+        return {
+            "version": datos["version"],
+            "version_tablas": datos["version_tablas"],
+            "jugadores": len(datos["almacen"]),
+            "roles": list(datos["tablas"]),
+            "paises": datos["indice"].paises_disponibles(),
+        }
+
+    # Jugadores del rol que cumplen los filtros, de mayor a menor ELO, con sus percentiles por categoría
+
+    def ranking(self, datos, parametros):
+        spec = _spec(parametros)
+        desde = max(_entero(parametros, "desde", 0), 0)
+        limite = max(_entero(parametros, "limite", LIMITE_RANKING), 0)
+        ranking = obtener_ranking(datos["tablas"], datos["version_tablas"], spec["rol"])
+        etiquetas = etiquetas_categorias(ranking.categorias, spec["idioma"])
+        mascara = datos["indice"].mascara(spec["rol"], spec["pais"], spec["minutos"], spec.get("edad"))
+        posiciones = ranking.ordenar(mascara)
+        pagina = posiciones[desde:desde + limite]
+
+        columnas = [c for c in COLUMNAS_TABLA if c in datos["almacen"].columns]
+        jugadores = _registros(datos["almacen"].iloc[pagina][columnas])
+        for jugador, i in zip(jugadores, pagina):
+            jugador["ELO"] = float(ranking.elo[i])
+            jugador["percentiles"] = dict(zip(etiquetas, ranking.valores[i].tolist()))
+        return {"version": datos["version_tablas"], "rol": spec["rol"], "total": len(posiciones),
+                "desde": desde, "jugadores": jugadores}
+
+    # Percentiles por categoría y ELO de un lote de UniqueID en un rol (los que no están van en "faltantes")
+
+    def percentiles(self, datos, parametros):
+        spec = _spec(parametros)
+        ids = _lista(parametros.get("ids"))
+        if not ids:
+            raise ErrorConsulta("Falta ids (lista de UniqueID)")
+        if len(ids) > MAX_IDS:
+            raise ErrorConsulta(f"Como máximo {MAX_IDS} ids por consulta")
+        ranking = obtener_ranking(datos["tablas"], datos["version_tablas"], spec["rol"])
+        etiquetas = etiquetas_categorias(ranking.categorias, spec["idioma"])
+        posiciones = ranking.ids.get_indexer(ids)
+        jugadores = {uid: {"ELO": float(ranking.elo[i]),
+                           "percentiles": dict(zip(etiquetas, ranking.valores[i].tolist()))}
+                     for uid, i in zip(ids, posiciones) if i >= 0}
+        return {"version": datos["version_tablas"], "rol": spec["rol"], "categorias": etiquetas,
+                "jugadores": jugadores, "faltantes": [uid for uid, i in zip(ids, posiciones) if i < 0]}
+
+    # Radar de los mejores del rol: la figura de Plotly en JSON (o solo la especificación, más liviana)
+
+    def radar(self, datos, parametros):
+        spec = _spec(parametros)
+        formato = parametros.get("formato") or "figura"
+        if formato not in ("figura", "especificacion"):
+            raise ErrorConsulta(f"Formato desconocido: {formato} (opciones: figura, especificacion)")
+        ranking = obtener_ranking(datos["tablas"], datos["version_tablas"], spec["rol"])
+        etiquetas = etiquetas_categorias(ranking.categorias, spec["idioma"])
+        mascara = datos["indice"].mascara(spec["rol"], spec["pais"], spec["minutos"], spec.get("edad"))
+        top_players = ranking.jugadores_radar(ranking.top(mascara, spec["top"]), etiquetas)
+        especificacion = especificacion_radar(top_players, datos["almacen"], etiquetas,
+                                              roles_map[spec["rol"]][spec["idioma"]], spec["top"],
+                                              IDIOMAS[spec["idioma"]], id_column="UniqueID")
+        if formato == "especificacion":
+            return especificacion
+        return json.loads(figura_desde_especificacion(especificacion).to_json())
+
+    # Varias consultas en una sola solicitud; cada una con su estado, ETag y cuerpo
+    # Los parámetros del lote (p. ej. competiciones o idioma) valen para todas salvo que la consulta los cambie
+
+    def lote(self, datos, parametros):
+        consultas = parametros.get("consultas")
+        if not isinstance(consultas, list) or not consultas:
+            raise ErrorConsulta('Falta "consultas": [{"ruta": ..., "parametros": {...}}, ...]')
+        if len(consultas) > MAX_LOTE:
+            raise ErrorConsulta(f"Como máximo {MAX_LOTE} consultas por lote")
+        comunes = {k: v for k, v in parametros.items() if k != "consultas"}
+        resultados = []
+        for consulta in consultas:
+            try:
+                if not isinstance(consulta, dict) or not isinstance(consulta.get("ruta", ""), str):
+                    raise ErrorConsulta('Cada consulta debe ser {"ruta": ..., "parametros": {...}}')
+                propios = consulta.get("parametros", {})
+                if not isinstance(propios, dict):
+                    raise ErrorConsulta('"parametros" debe ser un objeto')
+                ruta = consulta.get("ruta", "")
+                if ruta.rstrip("/") == "/lote":
+                    raise ErrorConsulta("No se admiten lotes anidados")
+                cuerpo, etag = self.responder(ruta, {**comunes, **propios})
+                resultados.append({"estado": int(HTTPStatus.OK), "etag": etag, "cuerpo": json.loads(cuerpo)})
+            except ErrorConsulta as error:
+                resultados.append({"estado": int(error.estado), "error": str(error)})
+        return {"resultados": resultados}
+
+
+RUTAS = {
+    "/salud": ServicioRadar.salud,
+    "/ranking": ServicioRadar.ranking,
+    "/percentiles": ServicioRadar.percentiles,
+    "/radar": ServicioRadar.radar,
+    "/lote": ServicioRadar.lote,
+}
+
+
+class ManejadorRadar(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"      # conexiones persistentes para los clientes que hacen muchas consultas
+    disable_nagle_algorithm = True     # encabezados y cuerpo van por separado: sin esto cada respuesta espera un ACK
+    servicio = None
+
+    def _enviar(self, estado, cuerpo=b"", etag=None):
+        self.send_response(estado)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if estado != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        if estado != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(cuerpo)
+
+    def _atender(self, parametros):
+        ruta = urlsplit(self.path).path
+        try:
+            cuerpo, etag = self.servicio.responder(ruta, parametros, self.headers.get("If-None-Match"))
+        except ErrorConsulta as error:
+            self._enviar(error.estado, a_json({"error": str(error)}))
+        except Exception as error:
+            _logger.exception("Error en %s", self.path)
+            self._enviar(HTTPStatus.INTERNAL_SERVER_ERROR, a_json({"error": f"{type(error).__name__}: {error}"}))
+        else:
+            self._enviar(HTTPStatus.NOT_MODIFIED if cuerpo is None else HTTPStatus.OK, cuerpo or b"", etag)
+
+    def do_GET(self):
+        self._atender({clave: valores[-1] for clave, valores in parse_qs(urlsplit(self.path).query).items()})
+
+    # POST: cuerpo JSON con los parámetros (útil para lotes y listas largas de ids); la query se suma como base
+
+    def do_POST(self):
+        parametros = {clave: valores[-1] for clave, valores in parse_qs(urlsplit(self.path).query).items()}
+        try:
+            largo = int(self.headers.get("Content-Length") or 0)
+            cuerpo = json.loads(self.rfile.read(largo) or b"{}")
+            if not isinstance(cuerpo, dict):
+                raise ValueError("se esperaba un objeto")
+        except ValueError as error:
+            self._enviar(HTTPStatus.BAD_REQUEST, a_json({"error": f"JSON inválido: {error}"}))
+            return
+        self._atender({**parametros, **cuerpo})
+
+    def log_message(self, formato, *args):
+        _logger.debug("%s - %s", self.address_string(), formato % args)
+
+# Esta función crea el servidor (puerto 0 = uno libre) y deja cargados los datos por defecto
+
+def crear_servidor(host="127.0.0.1", puerto=PUERTO, fuente=None):
+    servicio = ServicioRadar(fuente)
+    servicio.datos({})
+    manejador = type("Manejador", (ManejadorRadar,), {"servicio": servicio})
+    return ThreadingHTTPServer((host, puerto), manejador)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio JSON de rankings, percentiles y radares")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO, help="Puerto (0 = uno libre)")
+    parser.add_argument("--datos", help="Archivo Excel o URL por defecto (como en batch_radar)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    actualizador.iniciar()
+    servidor = crear_servidor(args.host, args.puerto, args.datos)
+    host, puerto = servidor.server_address[:2]
+    print(f"Sirviendo en http://{host}:{puerto}", flush=True)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        actualizador.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
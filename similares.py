@@ -0,0 +1,50 @@
+import numpy as np
+
+from cache_compartida import CACHE
+from ranking import top_n_argpartition
+
+# Búsqueda de jugadores similares sobre los percentiles por categoría de un rol
+# La matriz se prepara una vez por tabla de percentiles: cada consulta es un producto matriz-vector (BLAS)
+# más un argpartition sobre las filas de la máscara de filtros
+#   coseno    -> perfiles centrados en el percentil 50 y normalizados (forma del radar)
+#   euclidea  -> distancia entre los percentiles (forma y nivel)
+
+METRICAS = ("coseno", "euclidea")
+
+
+class IndiceSimilitud:
+
+    def __init__(self, df_percentiles, categorias):
+        self.ids = df_percentiles.index
+        self.valores = np.ascontiguousarray(df_percentiles[list(categorias)].to_numpy(dtype=float))
+        self.cuadrados = np.einsum("ij,ij->i", self.valores, self.valores)
+        centrados = self.valores - 50.0
+        normas = np.linalg.norm(centrados, axis=1)
+        self.normalizados = centrados / np.where(normas > 0, normas, 1.0)[:, None]
+
+    # Puntaje de cada fila respecto de la fila dada: mayor es más parecido
+
+    def puntajes(self, posicion, metrica="coseno"):
+        if metrica == "coseno":
+            return self.normalizados @ self.normalizados[posicion]
+        distancias = self.cuadrados + self.cuadrados[posicion] - 2.0 * (self.valores @ self.valores[posicion])
+        return -np.sqrt(np.maximum(distancias, 0.0))
+
+    # Esta función devuelve (posiciones, similitud) de los k jugadores más parecidos dentro de la máscara
+    # La similitud es el coseno (1 = mismo perfil) o la distancia euclidiana (0 = mismos percentiles)
+
+    def similares(self, uid, k=5, mascara=None, metrica="coseno"):
+        if metrica not in METRICAS:
+            raise ValueError(f"Métrica desconocida: {metrica} (opciones: {', '.join(METRICAS)})")
+        posicion = self.ids.get_loc(uid)
+        puntaje = self.puntajes(posicion, metrica)
+        candidatos = np.ones(len(self.ids), dtype=bool) if mascara is None else mascara.copy()
+        candidatos[posicion] = False
+        elegidos = top_n_argpartition(puntaje, candidatos, k)
+        similitud = puntaje[elegidos] if metrica == "coseno" else -puntaje[elegidos]
+        return elegidos, similitud
+
+# Esta función devuelve el índice de similitud de un rol, con la misma clave que sus tablas de percentiles
+
+def obtener_similitud(tablas, version, rol):
+    return CACHE.obtener("similitud", (version, rol), lambda: IndiceSimilitud(*tablas[rol]), versiones=(version,))
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import pandas as pd
+
+from data_loader import RUTA_DATOS, _version, firma_columnas, procesar_excel, reporte_memoria
+
+# Los snapshots se guardan junto a los datos, en formato Arrow IPC (Feather v2) sin comprimir
+# para que se puedan leer con memory-map
+DIRECTORIO_SNAPSHOTS = RUTA_DATOS.parent / "snapshots"
+CLAVE_METADATOS = b"radar"
+
+# Se incrementa cuando cambia la forma de la tabla preparada, para invalidar snapshots anteriores
+FORMATO = 5
+
+# Clave de archivo de una fuente: su nombre completo (legible) más un hash de la ruta absoluta o la URL
+# Dos archivos con el mismo nombre en carpetas distintas no comparten snapshot ni tablas de percentiles
+
+def clave_fuente(fuente):
+    texto = str(fuente)
+    if not texto.startswith(("http://", "https://")) and Path(texto).exists():
+        texto = str(Path(texto).resolve())
+    nombre = re.sub(r"[^\w\-. ]+", "_", unquote(Path(urlsplit(texto).path).name)) or "fuente"
+    return f"{nombre}-{hashlib.sha256(texto.encode('utf-8')).hexdigest()[:10]}"
+
+
+def ruta_snapshot(ruta_fuente):
+    return DIRECTORIO_SNAPSHOTS / (clave_fuente(ruta_fuente) + ".arrow")
+
+# Identidad exacta del archivo de origen: el snapshot solo vale para esa ruta, tamaño y mtime
+
+def firma_fuente(ruta_fuente):
+    info = os.stat(ruta_fuente)
+    return {"ruta": str(Path(ruta_fuente).resolve()), "tamano": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+# Esta función escribe el dataframe ya preparado (UniqueID, posición principal, tipos normalizados)
+# La versión y la firma del Excel de origen, las columnas proyectadas
+# y el ahorro de memoria van en los metadatos
+# fuente es la firma_fuente tomada antes de leer el Excel (si el archivo cambió después, no coincide)
+
+def guardar_snapshot(df, ruta, version, fuente=None):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    extra = {"version": version, "formato": FORMATO, "columnas": firma_columnas(), "memoria": df.attrs.get("memoria"), "fuente": fuente}
+    metadatos = dict(tabla.schema.metadata or {})
+    metadatos[CLAVE_METADATOS] = json.dumps(extra).encode("utf-8")
+    tabla = tabla.replace_schema_metadata(metadatos)
+
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_suffix(".tmp")
+    feather.write_feather(tabla, temporal, compression="uncompressed")
+    os.replace(temporal, ruta)
+
+# Guardar el snapshot es opcional: sin pyarrow o sin permisos de escritura la app sigue con el Excel
+
+def intentar_guardar(df, ruta, version, fuente=None):
+    try:
+        guardar_snapshot(df, ruta, version, fuente)
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def _leer_metadatos(ruta):
+    import pyarrow as pa
+
+    with pa.memory_map(str(ruta)) as fuente:
+        esquema = pa.ipc.open_file(fuente).schema
+    return json.loads((esquema.metadata or {})[CLAVE_METADATOS])
+
+# Esta función devuelve la versión guardada en el snapshot si fue compilado desde este mismo archivo
+# (misma ruta absoluta, tamaño y mtime exactos; un reemplazo con mtime más viejo también lo invalida)
+# Solo lee el esquema, no los datos
+
+def version_si_vigente(ruta, ruta_fuente):
+    try:
+        metadatos = _leer_metadatos(ruta)
+        vigente = (metadatos.get("formato") == FORMATO and metadatos.get("columnas") == firma_columnas()
+                   and metadatos.get("fuente") == firma_fuente(ruta_fuente))
+        return metadatos["version"] if vigente else None
+    except (ImportError, OSError, KeyError, ValueError):
+        return None
+
+
+def leer_snapshot(ruta):
+    import pyarrow.feather as feather
+
+    tabla = feather.read_table(str(ruta), memory_map=True)
+    df = tabla.to_pandas(split_blocks=True)
+    metadatos = _leer_metadatos(ruta)
+    if metadatos.get("memoria"):
+        df.attrs["memoria"] = metadatos["memoria"]
+    return df
+
+# Esta función compila el snapshot a partir del Excel (paso de ingesta)
+
+def compilar_snapshot(ruta_excel=RUTA_DATOS, ruta_salida=None):
+    fuente = firma_fuente(ruta_excel)
+    contenido = Path(ruta_excel).read_bytes()
+    df = procesar_excel(contenido)
+    ruta_salida = ruta_salida or ruta_snapshot(ruta_excel)
+    guardar_snapshot(df, ruta_salida, _version(contenido), fuente)
+    return ruta_salida
+
+
+if __name__ == "__main__":
+    # Uso: python snapshot.py [archivo.xlsx ...]
+    archivos = sys.argv[1:] or [RUTA_DATOS]
+    for archivo in archivos:
+        salida = compilar_snapshot(archivo)
+        filas = len(pd.read_feather(salida, columns=["UniqueID"]))
+        print(f"{archivo} -> {salida} ({filas} filas)")
+        print("  " + reporte_memoria(leer_snapshot(salida)))
@@ -1,13 +1,36 @@
+# La instrumentación va primero: el tiempo de arranque se cuenta desde su importación
+from instrumentacion import activa, arranque, cerrar_ejecucion, etapa, iniciar_ejecucion, marcar_arranque
+
+import json
+
 import streamlit as st
-import pandas as pd
-import requests
-from io import BytesIO
-from metrics_config import summarized_metrics
-from radar_utils import cumple_rol, calcular_percentiles, generar_radar
+import actualizador
+from config_loader import ConfigError, cargar_config, etiquetas_categorias
+from almacen import obtener_almacen
+from cache_compartida import CACHE, TTL_INTERACCION
+from competiciones import COLUMNA_COMPETICION, cargar_seleccion, descubrir_competiciones, nombre_competicion
+from data_loader import FUENTE_DATOS, cargar_datos, reporte_memoria
+from escenarios import EscenarioPesos, obtener_matriz
+from exportar import huella_radar, imagen_en_cache, imagen_png
+from filtros import obtener_indice
+from historial import registrar_version, trayectorias_competicion, versiones_competicion
+from metrics_config import roles_map
+from precalculo import obtener_tablas, version_tablas
+from radar_utils import generar_radar, generar_tendencia
+from referencia import MINUTOS_REFERENCIA, MODOS, PoblacionReferencia
+from ranking import RankingRol, obtener_ranking
+from similares import METRICAS, IndiceSimilitud, obtener_similitud
+from tabla_ranking import construir_tabla, csv_tabla, obtener_tabla
+from textos import TEXTOS, logo
+
+marcar_arranque("importaciones_ms")
 
 # Configuración de página
 st.set_page_config(page_title="Radar Scouting CONMEBOL", layout="wide")
 
+# Las fuentes se revisan y las versiones nuevas se preparan en segundo plano (un hilo por proceso)
+actualizador.iniciar()
+
 # Estilos visuales
 st.markdown("""
     <style>
@@ -21,79 +44,60 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# Bandera + país
-
-def country_to_flag(country):
-    flags = {
-        "Argentina": "🇦🇷 Argentina", "Brazil": "🇧🇷 Brazil", "Colombia": "🇨🇴 Colombia", "Uruguay": "🇺🇾 Uruguay",
-        "Chile": "🇨🇱 Chile", "Paraguay": "🇵🇾 Paraguay", "Peru": "🇵🇪 Peru", "Ecuador": "🇪🇨 Ecuador",
-        "Venezuela": "🇻🇪 Venezuela", "Bolivia": "🇧🇴 Bolivia"
-    }
-    return flags.get(country, country)
-
 # Texto multilenguaje
 idioma = st.sidebar.radio("🌐 Idioma / Language", ['Español', 'English'])
+t = TEXTOS[idioma]
 
-textos = {
-    'Español': {
-        'titulo': "📊 Radar Scouting CONMEBOL - Resumido",
-        'rol': "🔎 Selecciona el rol",
-        'pais': "🌎 Filtrar por país",
-        'min': "⏱️ Minutos jugados mínimos",
-        'edad': "🎂 Edad (rango)",
-        'top': "🏅 Top jugadores a mostrar",
-        'no_data': "⚠️ No hay jugadores que cumplan los filtros.",
-        'tabla': "### 📋 Tabla de jugadores",
-        'csv': "⬇️ Descargar tabla en CSV",
-        'png': "🖼️ Descargar radar como imagen PNG"
-    },
-    'English': {
-        'titulo': "📊 Radar Scouting CONMEBOL - Summary Visualization",
-        'rol': "🔎 Select role",
-        'pais': "🌎 Filter by country",
-        'min': "⏱️ Minimum minutes played",
-        'edad': "🎂 Age range",
-        'top': "🏅 Top players to show",
-        'no_data': "⚠️ No players match the filters.",
-        'tabla': "### 📋 Player Table",
-        'csv': "⬇️ Download table as CSV",
-        'png': "🖼️ Download radar as PNG image"
-    }
-}
-t = textos[idioma]
+# Instrumentación opcional (RADAR_INSTRUMENTACION=1): tiempo, memoria y caché por etapa de cada ejecución
+iniciar_ejecucion(idioma=idioma)
 
 # Mostrar logo
-st.image("https://raw.githubusercontent.com/felipeorma/RADAR-dashboard/main/data/images/CONMEBOL_logo.png", width=100)
+st.image(logo(), width=100)
 
 st.title(t['titulo'])
-
-# Cargar archivo Excel desde GitHub
-url_github_excel = "https://raw.githubusercontent.com/felipeorma/RADAR-dashboard/main/data/CONMEBOL%20QUALI.xlsx"
-response = requests.get(url_github_excel)
-df = pd.read_excel(BytesIO(response.content))
-
-# Crear identificador único por jugador + club
-df["UniqueID"] = df["Player"] + " (" + df["Team"] + ")"
-
-# Diccionario de roles por keywords
-keywords_by_role = {
-    'Goalkeeper': ['GK'],
-    'Defender': ['CB', 'RCB', 'LCB'],
-    'Fullback': ['LB', 'RB', 'LWB', 'RWB'],
-    'Midfielder': ['CMF', 'DMF', 'AMF', 'LMF', 'RMF'],
-    'Wingers': ['LW', 'LWF', 'RWF', 'RW', 'LAMF', 'RAMF'],
-    'Forward': ['CF', 'ST', 'SS']
-}
-
-# Traducción de roles
-roles_map = {
-    'Goalkeeper': {'es': 'Portero', 'en': 'Goalkeeper'},
-    'Defender': {'es': 'Defensor', 'en': 'Defender'},
-    'Fullback': {'es': 'Lateral', 'en': 'Fullback'},
-    'Midfielder': {'es': 'Mediocampista', 'en': 'Midfielder'},
-    'Wingers': {'es': 'Extremo', 'en': 'Winger'},
-    'Forward': {'es': 'Delantero', 'en': 'Forward'}
-}
+marcar_arranque("primer_pintado_ms")
+
+# Competiciones disponibles en data/; solo se cargan las seleccionadas
+competiciones = descubrir_competiciones()
+seleccion = [nombre_competicion(FUENTE_DATOS)]
+agrupar_por = None
+if len(competiciones) > 1:
+    seleccion = st.sidebar.multiselect(t['competicion'], list(competiciones), default=seleccion) or seleccion
+    if len(seleccion) > 1 and st.sidebar.radio(t['ambito'], t['ambitos']) == t['ambitos'][0]:
+        agrupar_por = COLUMNA_COMPETICION
+
+# Cargar datos (caché compartida por versión de archivo; incluye el UniqueID jugador + club)
+with etapa("datos"):
+    df, version_datos, fuente_datos = cargar_seleccion(seleccion, competiciones)
+
+# Población de referencia de los percentiles; puede salir de otra competición (liga base)
+modo_referencia = st.sidebar.selectbox(t['referencia'], MODOS,
+                                       format_func=lambda m: t['referencias'][m].format(minutos=MINUTOS_REFERENCIA))
+nombre_base = None
+if len(competiciones) > 1:
+    nombre_base = st.sidebar.selectbox(t['base'], [None] + list(competiciones),
+                                       format_func=lambda n: n or t['base_misma'])
+poblacion = None
+if nombre_base is not None:
+    with etapa("datos_base"):
+        df_base, version_base = cargar_datos(competiciones[nombre_base])
+    poblacion = PoblacionReferencia(modo_referencia, base=df_base, version_base=version_base)
+elif modo_referencia != "todos":
+    poblacion = PoblacionReferencia(modo_referencia)
+
+# Validar la configuración de métricas contra las columnas del archivo
+try:
+    with etapa("config"):
+        config_roles, _ = cargar_config(df)
+except ConfigError as error:
+    st.error(str(error))
+    st.stop()
+
+# Almacén de jugadores indexado por UniqueID (club, país y posición como categóricos)
+with etapa("almacen"):
+    almacen = obtener_almacen(df, version_datos)
+with etapa("indice_filtros"):
+    indice_filtros = obtener_indice(almacen, version_datos)
 
 roles_display = [roles_map[role]['es'] if idioma == 'Español' else roles_map[role]['en'] for role in roles_map]
 rol_display = st.selectbox(t['rol'], roles_display)
@@ -106,7 +110,7 @@ for role_key, traducciones in roles_map.items():
 
 # Filtros
 if 'Birth country' in df.columns:
-    countries = ['Todos' if idioma == 'Español' else 'All'] + sorted(df['Birth country'].dropna().unique())
+    countries = ['Todos' if idioma == 'Español' else 'All'] + indice_filtros.paises_disponibles()
     selected_country = st.selectbox(t['pais'], countries)
 else:
     selected_country = 'Todos' if idioma == 'Español' else 'All'
@@ -122,99 +126,183 @@ else:
 
 top_n = st.slider(t['top'], 1, 5, 3)
 
-# Calcular percentiles sobre TODO el dataframe
-total_resumen = summarized_metrics[selected_role]['es' if idioma == 'Español' else 'en']
-df_percentiles, categorias = calcular_percentiles(df, total_resumen, unique_col="UniqueID")
-df_percentiles = df_percentiles.rename(columns={'Promedio': 'ELO'})
-
-# Aplicar filtros al df original solo para mostrar
-filtro_df = df[df['Position'].apply(lambda x: cumple_rol(str(x).split(',')[0].strip(), selected_role, keywords_by_role))]
-
-if selected_country not in ['Todos', 'All'] and 'Birth country' in filtro_df.columns:
-    filtro_df = filtro_df[filtro_df['Birth country'] == selected_country]
-
-filtro_df = filtro_df[
-    (filtro_df['Minutes played'] >= min_minutes) &
-    (filtro_df['Age'].between(rango_edad[0], rango_edad[1]))
-]
-
-if filtro_df.empty:
+# Percentiles sobre TODO el dataframe (o dentro de cada competición), precalculados para todos los roles
+# Las categorías vienen como IDs y se traducen solo para mostrarlas
+with etapa("percentiles"):
+    tablas_percentiles = obtener_tablas(df, version_datos, fuente_datos, agrupar_por=agrupar_por, poblacion=poblacion)
+df_percentiles, categorias_ids = tablas_percentiles[selected_role]
+categorias = etiquetas_categorias(categorias_ids, 'es' if idioma == 'Español' else 'en')
+clave_tablas = version_tablas(version_datos, agrupar_por, poblacion)
+
+# Historial de jornadas: cada versión nueva de una competición se guarda una vez (diferencias y percentiles)
+competicion_historial = seleccion[0] if len(seleccion) == 1 else None
+if competicion_historial is not None:
+    with etapa("historial"):
+        registrar_version(fuente_datos, df, version_datos, tablas_percentiles if poblacion is None else None)
+
+# Modo "qué pasa si": pesos editables del rol; cada cambio recalcula solo la categoría tocada y el ELO
+# La matriz de métricas se comparte entre sesiones y el escenario (percentiles por categoría) vive en la sesión
+escenario = None
+if st.sidebar.checkbox(t['ajustar_pesos']):
+    if poblacion is not None and poblacion.base is not None:
+        st.sidebar.info(t['pesos_base'])
+    else:
+        pesos_config = config_roles[selected_role]
+        with st.sidebar.expander(t['pesos'], expanded=True):
+            if st.button(t['restablecer']):
+                for llave in [k for k in st.session_state if str(k).startswith("peso|")]:
+                    del st.session_state[llave]
+            pesos = {}
+            for categoria, etiqueta in zip(categorias_ids, categorias):
+                st.markdown(f"**{etiqueta}**")
+                pesos[categoria] = {
+                    metrica: st.slider(metrica, -1.0, 1.0, float(peso), 0.05,
+                                       key=f"peso|{selected_role}|{categoria}|{metrica}")
+                    for metrica, peso in pesos_config[categoria].items()
+                }
+        if pesos != pesos_config:
+            with etapa("escenario"):
+                llave_escenario = (clave_tablas, selected_role)
+                if st.session_state.get("escenario_llave") != llave_escenario:
+                    matriz = obtener_matriz(df, clave_tablas, pesos_config, selected_role, agrupar_por, poblacion)
+                    st.session_state["escenario"] = EscenarioPesos(matriz, pesos_config)
+                    st.session_state["escenario_llave"] = llave_escenario
+                escenario = st.session_state["escenario"]
+                escenario.actualizar(pesos)
+                df_percentiles = escenario.tabla()
+
+# Aplicar filtros solo para mostrar: máscaras precalculadas por rol y país + rangos de minutos y edad
+pais_filtro = None if selected_country in ['Todos', 'All'] else selected_country
+with etapa("filtros"):
+    mascara_filtros = indice_filtros.mascara(selected_role, pais_filtro, min_minutes, rango_edad)
+
+if not mascara_filtros.any():
     st.warning(t['no_data'])
 else:
-    # Combinar ELO con jugadores filtrados
-    df_merged = df_percentiles.merge(df, on="UniqueID", how="left")
-    mostrar = df_merged[df_merged['UniqueID'].isin(filtro_df['UniqueID'])].drop_duplicates("UniqueID")
-
-    # Top jugadores para radar
-    top_df = mostrar.sort_values("ELO", ascending=False).head(top_n)
-    top_players = [(row['UniqueID'], {cat: row[cat] for cat in categorias}) for _, row in top_df.iterrows()]
-
-    fig = generar_radar(top_players, df, categorias, translated_role, top_n, idioma, id_column="UniqueID")
-
-    fig.update_layout(images=[dict(
-        source="https://raw.githubusercontent.com/felipeorma/RADAR-dashboard/main/data/images/CONMEBOL_logo.png",
-        xref="paper", yref="paper",
-        x=0, y=1.15,
-        sizex=0.3, sizey=0.3,
-        xanchor="left", yanchor="top",
-        opacity=0.8,
-        layer="above"
-    )],
-    annotations=[
-        dict(
-            text="By: Felipe Ormazábal<br>Football Scout | Data Analyst",
-            showarrow=False,
-            x=0.5,
-            y=-0.25,
-            xref="paper",
-            yref="paper",
-            font=dict(size=12, color="white"),
-            align="center"
-        )
-    ])
-
-    st.plotly_chart(fig, use_container_width=True)
-
-    try:
+    # Orden por ELO precalculado del rol: el top-N es un recorrido del orden con la máscara
+    with etapa("ranking"):
+        if escenario is None:
+            ranking = obtener_ranking(tablas_percentiles, clave_tablas, selected_role)
+        else:
+            # El ELO cambia con cada ajuste de pesos: top-N por argpartition sin ordenar toda la tabla
+            ranking = RankingRol(df_percentiles, categorias_ids, ordenado=False)
+            st.caption(t['pesos_ajustados'])
+        top_players = ranking.jugadores_radar(ranking.top(mascara_filtros, top_n), categorias)
+
+    # Tabla de los jugadores filtrados, ya ordenados por ELO (en caché mientras no cambien los filtros)
+    clave_pesos = None if escenario is None else json.dumps(escenario.pesos, sort_keys=True)
+    clave_tabla = (clave_tablas, selected_role, pais_filtro, min_minutes, tuple(rango_edad), idioma, clave_pesos)
+    with etapa("tabla_datos"):
+        mostrar = obtener_tabla(clave_tabla, lambda: construir_tabla(almacen, ranking,
+                                                                      ranking.ordenar(mascara_filtros), idioma),
+                                versiones=(clave_tablas,))
+
+    # La figura se comparte entre sesiones según la huella del radar (la misma que usa el PNG)
+    huella = huella_radar(selected_role, idioma, top_n, top_players)
+
+    # Con dos o más jornadas en el historial, la evolución de los mismos jugadores va al lado del radar
+    versiones_historial = versiones_competicion(competicion_historial, version_datos) if competicion_historial else []
+    if len(versiones_historial) > 1:
+        col_radar, col_tendencia = st.columns([3, 2])
+    else:
+        col_radar, col_tendencia = st.container(), None
+
+    with etapa("figura"), col_radar:
+        fig = CACHE.obtener("figuras", huella, lambda: generar_radar(top_players, almacen, categorias, translated_role,
+                                                                    top_n, idioma, id_column="UniqueID"),
+                            ttl=TTL_INTERACCION)
+        st.plotly_chart(fig, use_container_width=True)
+
+    if col_tendencia is not None:
+        with etapa("tendencia"), col_tendencia:
+            opciones = ['ELO'] + categorias_ids
+            etiquetas = dict(zip(categorias_ids, categorias), ELO='ELO')
+            columna = st.selectbox(t['evolucion_de'], opciones, format_func=etiquetas.get)
+            jugadores = [(uid, almacen.at[uid, 'Player']) for uid, _ in top_players]
+            trayectorias = trayectorias_competicion(competicion_historial, version_datos, [uid for uid, _ in jugadores],
+                                                    selected_role)
+            st.plotly_chart(generar_tendencia(trayectorias, columna, jugadores,
+                                              f"{t['evolucion']} · {etiquetas[columna]}"), use_container_width=True)
+
+    # El PNG se genera solo cuando se pide y queda en caché según la huella del radar
+    with etapa("png"):
+        imagen = imagen_en_cache(huella)
+        if imagen is None and st.button(t['png_generar']):
+            try:
+                imagen = imagen_png(fig, huella)
+            except Exception:
+                st.info("Para exportar imagen, instala `kaleido`: pip install kaleido")
+    if imagen is not None:
         st.download_button(
             label=t['png'],
-            data=fig.to_image(format="png"),
+            data=imagen,
             file_name="radar.png",
             mime="image/png"
         )
-    except Exception:
-        st.info("Para exportar imagen, instala `kaleido`: pip install kaleido")
 
     st.markdown(t['tabla'])
 
-    if 'Birth country' in mostrar.columns:
-        mostrar['Birth country'] = mostrar['Birth country'].apply(country_to_flag)
-
-    if idioma == 'Español':
-        mostrar = mostrar.rename(columns={
-            'Player': 'Jugador', 'Team': 'Club', 'Age': 'Edad',
-            'Birth country': 'País', 'Contract expires': 'Contrato'
-        })
-    else:
-        mostrar = mostrar.rename(columns={
-            'Birth country': 'Country'
-        })
-
-
-    columnas_final = ['Jugador' if idioma == 'Español' else 'Player',
-                      'Club' if idioma == 'Español' else 'Team',
-                      'Edad' if idioma == 'Español' else 'Age',
-                      'País' if idioma == 'Español' else 'Country',
-                      'Contrato' if idioma == 'Español' else 'Contract expires',
-                      'ELO']
-
-    mostrar = mostrar.sort_values("ELO", ascending=False)
-
-    styled = mostrar[columnas_final].style \
-        .format(precision=1) \
-        .applymap(lambda v: 'background-color: #DDEBFF; color: black; font-weight: bold;', subset=['ELO'])
-
-    st.dataframe(styled, use_container_width=True)
-
-    st.download_button(t['csv'], mostrar[columnas_final].to_csv(index=False).encode('utf-8'),
-                       file_name="ranking_elo.csv", mime="text/csv")
+    # Columnas tipadas con formato de Streamlit: sin generar HTML/CSS por celda
+    formato_tabla = {
+        'ELO': st.column_config.ProgressColumn('ELO', format="%.1f", min_value=0, max_value=100),
+    }
+    with etapa("tabla"):
+        st.dataframe(mostrar, column_config=formato_tabla, hide_index=True, use_container_width=True)
+
+    st.download_button(t['csv'], csv_tabla(clave_tabla, mostrar, (clave_tablas,)), file_name="ranking_elo.csv", mime="text/csv")
+
+    # Jugadores similares al elegido, entre los que cumplen los filtros
+    st.markdown(t['similares'])
+    col_jugador, col_metrica, col_cantidad = st.columns([3, 2, 1])
+    jugador_ref = col_jugador.selectbox(t['similar_a'], mostrar.index)
+    metrica = col_metrica.selectbox(t['metrica'], METRICAS, format_func=lambda m: t['metricas'][m])
+    cantidad = col_cantidad.number_input(t['cantidad'], 1, 20, 5)
+
+    with etapa("similares"):
+        if escenario is None:
+            similitud = obtener_similitud(tablas_percentiles, clave_tablas, selected_role)
+        else:
+            similitud = IndiceSimilitud(df_percentiles, categorias_ids)
+        posiciones, valores = similitud.similares(jugador_ref, cantidad, mascara_filtros, metrica)
+    columna_valor = t['similitud'] if metrica == 'coseno' else t['distancia']
+    parecidos = mostrar.loc[similitud.ids[posiciones]].assign(**{columna_valor: valores})
+    formato_tabla[columna_valor] = st.column_config.NumberColumn(columna_valor, format="%.2f")
+    st.dataframe(parecidos, column_config=formato_tabla, hide_index=True, use_container_width=True)
+
+marcar_arranque("primera_ejecucion_ms", final=True)
+
+# Panel de instrumentación: etapas de esta ejecución (también quedan en logs/instrumentacion.jsonl)
+if activa():
+    ejecucion = cerrar_ejecucion()
+    if ejecucion is not None:
+        with st.sidebar.expander("⏱️ Instrumentación"):
+            st.caption(f"Total: {ejecucion['total_ms']:.1f} ms · Memoria: {ejecucion['memoria_kb'] / 1024:.1f} MB")
+            st.caption("Arranque: " + " · ".join(f"{hito.removesuffix('_ms')} {ms:.0f} ms"
+                                                 for hito, ms in arranque().items() if ms is not None))
+            st.dataframe([
+                {"Etapa": "  " * e["nivel"] + e["etapa"], "ms": e["ms"], "Pico KB": e["pico_kb"],
+                 "Caché": e["cache"] or "-"}
+                for e in ejecucion["etapas"]
+            ], use_container_width=True)
+
+            # Tabla de datos compactada: columnas cargadas y memoria frente al Excel
+            if reporte_memoria(df):
+                st.caption(f"Datos: {reporte_memoria(df)}")
+
+            # Caché compartida: ocupación y contadores por espacio
+            cache = CACHE.estadisticas()
+            st.caption(f"Caché: {cache['bytes'] / 2**20:.1f} / {cache['presupuesto_bytes'] / 2**20:.0f} MB · "
+                       f"{cache['entradas']} entradas")
+            st.dataframe([
+                {"Espacio": espacio, "Entradas": datos["entradas"], "MB": round(datos["bytes"] / 2**20, 2),
+                 "Aciertos": datos.get("aciertos", 0), "Fallos": datos.get("fallos", 0),
+                 "Expulsiones": datos.get("expulsiones", 0), "Vencidos": datos.get("vencidos", 0)}
+                for espacio, datos in sorted(cache["espacios"].items())
+            ], use_container_width=True)
+
+            # Actualizador en segundo plano: revisiones y últimas versiones activadas
+            estado = actualizador.estado()
+            if estado["activo"]:
+                st.caption(f"Actualizador: {estado['revisiones']} revisiones · {estado['errores']} errores")
+                for _, fuente, version in estado["actualizaciones"][-3:]:
+                    st.caption(f"{nombre_competicion(fuente)} → {version}")
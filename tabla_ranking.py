@@ -0,0 +1,56 @@
+from cache_compartida import CACHE, TTL_INTERACCION
+from competiciones import COLUMNA_COMPETICION
+from textos import BANDERAS
+
+# Tabla de ranking lista para mostrar: columnas tipadas (sin Styler) con los nombres del idioma elegido
+# Se guarda en la caché compartida por (tablas, rol, filtros, idioma): los reruns que no cambian los filtros
+# la reutilizan y el CSV se serializa una sola vez por tabla
+
+MAX_TABLAS = 16
+
+# Columna de datos -> (nombre en español, nombre en inglés), en el orden de la tabla
+COLUMNAS = {
+    "Player": ("Jugador", "Player"),
+    "Team": ("Club", "Team"),
+    COLUMNA_COMPETICION: ("Competición", "Competition"),
+    "Age": ("Edad", "Age"),
+    "Birth country": ("País", "Country"),
+    "Contract expires": ("Contrato", "Contract expires"),
+    "ELO": ("ELO", "ELO"),
+}
+
+CACHE.configurar_espacio("tabla_ranking", max_entradas=MAX_TABLAS, ttl=TTL_INTERACCION)
+CACHE.configurar_espacio("csv", max_entradas=MAX_TABLAS, ttl=TTL_INTERACCION)
+
+
+def pais_con_bandera(pais):
+    return f"{BANDERAS[pais]} {pais}" if pais in BANDERAS else pais
+
+# Banderas vectorizadas: se renombran las categorías (una vez por país), no cada fila
+
+def paises_con_bandera(serie):
+    serie = serie.astype("category")
+    return serie.cat.rename_categories({p: pais_con_bandera(p) for p in serie.cat.categories})
+
+# Esta función arma la tabla de las posiciones pedidas (filas del almacén, ya ordenadas por ELO)
+# Solo se toman las columnas que se muestran, no toda la fila del jugador
+
+def construir_tabla(almacen, ranking, posiciones, idioma):
+    indice_idioma = 0 if idioma == 'Español' else 1
+    columnas = [c for c in COLUMNAS if c in almacen.columns]
+    tabla = almacen.iloc[posiciones][columnas]
+    tabla = tabla.assign(ELO=ranking.elo[posiciones])
+    if "Birth country" in tabla.columns:
+        tabla["Birth country"] = paises_con_bandera(tabla["Birth country"])
+    return tabla.rename(columns={c: COLUMNAS[c][indice_idioma] for c in tabla.columns})
+
+# Esta función devuelve la tabla de la clave (caché compartida); construir se llama solo si no está
+# versiones: claves de las tablas de percentiles de las que sale (se invalida con ellas)
+
+def obtener_tabla(clave, construir, versiones=()):
+    return CACHE.obtener("tabla_ranking", clave, construir, versiones=versiones)
+
+# CSV de la tabla, serializado una sola vez mientras siga en la caché
+
+def csv_tabla(clave, tabla, versiones=()):
+    return CACHE.obtener("csv", clave, lambda: tabla.to_csv(index=False).encode('utf-8'), versiones=versiones)
@@ -0,0 +1,25 @@
+import pytest
+
+from batch_radar import nombres_unicos, normalizar_spec
+
+
+def lote(*specs):
+    return nombres_unicos([normalizar_spec(s) for s in specs], [bool(s.get("nombre")) for s in specs])
+
+
+def test_nombres_por_defecto_repetidos():
+    specs = lote({"rol": "Forward", "top": 3}, {"rol": "Forward", "top": 5}, {"rol": "Forward", "idioma": "en"},
+                 {"rol": "Defender"})
+    nombres = [s["nombre"] for s in specs]
+    assert nombres == ["Forward_todos_min100", "Forward_todos_min100_2", "Forward_todos_min100_3",
+                       "Defender_todos_min100"]
+
+
+def test_nombre_elegido_tiene_prioridad():
+    specs = lote({"rol": "Forward"}, {"rol": "Forward", "nombre": "Forward_todos_min100"})
+    assert [s["nombre"] for s in specs] == ["Forward_todos_min100_1", "Forward_todos_min100"]
+
+
+def test_nombres_elegidos_repetidos():
+    with pytest.raises(ValueError, match="repetido"):
+        lote({"rol": "Forward", "nombre": "x"}, {"rol": "Defender", "nombre": "x"})
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from competiciones import COLUMNA_COMPETICION, unir_competiciones
+
+
+def tabla(jugadores, equipo, competicion=None):
+    df = pd.DataFrame({"UniqueID": [f"{j} ({equipo})" for j in jugadores], "Team": equipo,
+                       "Goals": range(len(jugadores))})
+    if competicion is not None:
+        df[COLUMNA_COMPETICION] = competicion
+    return df
+
+
+def test_union_sin_columna_previa():
+    union = unir_competiciones({"Liga A": tabla(["a", "b"], "X"), "Liga B": tabla(["c"], "Y")})
+    assert list(union[COLUMNA_COMPETICION].astype(str)) == ["Liga A", "Liga A", "Liga B"]
+    assert isinstance(union["Team"].dtype, pd.CategoricalDtype)
+
+
+def test_union_reemplaza_competition_del_export():
+    union = unir_competiciones({"Liga A": tabla(["a", "b"], "X", "Primera"),
+                                "Liga B": tabla(["c"], "Y", "Segunda")})
+    assert list(union.columns).count(COLUMNA_COMPETICION) == 1
+    assert list(union[COLUMNA_COMPETICION].astype(str)) == ["Liga A", "Liga A", "Liga B"]
+
+
+def test_union_desambigua_ids_repetidos():
+    union = unir_competiciones({"Liga A": tabla(["a"], "X"), "Liga B": tabla(["a"], "X")})
+    assert list(union["UniqueID"]) == ["a (X) · Liga A", "a (X) · Liga B"]
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+
+import metrics_config
+from config_loader import ConfigError, cargar_config, validar_config
+from data_loader import RUTA_DATOS, procesar_excel
+
+
+@pytest.fixture(scope="module")
+def df():
+    return procesar_excel(RUTA_DATOS.read_bytes())
+
+
+def test_config_valida_con_los_datos(df):
+    role_metrics, _ = cargar_config(df)
+    assert role_metrics is metrics_config.role_metrics
+
+
+def test_metrica_faltante(df):
+    metrica = next(iter(metrics_config.role_metrics["Forward"]["attack"]))
+    with pytest.raises(ConfigError, match="columna desconocida"):
+        cargar_config(df.drop(columns=[metrica]))
+
+
+def test_metrica_no_numerica(df):
+    metrica = next(iter(metrics_config.role_metrics["Forward"]["attack"]))
+    with pytest.raises(ConfigError, match="no es numérica"):
+        cargar_config(df.assign(**{metrica: df[metrica].astype(str)}))
+
+
+@pytest.mark.parametrize("peso", [0, float("nan"), float("inf"), "1", True])
+def test_pesos_invalidos(peso):
+    role_metrics = {"Forward": {"defensive": {"Goals": peso}}}
+    labels = {"defensive": {"es": "Defensa", "en": "Defense"}}
+    with pytest.raises(ConfigError):
+        validar_config(role_metrics, labels, columnas=pd.Index(["Goals"]))
+
+
+def test_pesos_negativos_validos():
+    labels = {"defensive": {"es": "Defensa", "en": "Defense"}}
+    validar_config({"Forward": {"defensive": {"Fouls per 90": -0.5}}}, labels)
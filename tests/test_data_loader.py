@@ -0,0 +1,43 @@
+import shutil
+import threading
+
+import data_loader
+import snapshot
+from data_loader import RUTA_DATOS
+
+
+def test_actualizar_fuente_procesa_sin_el_lock(tmp_path, monkeypatch):
+    fuente = str(tmp_path / "Liga.xlsx")
+    shutil.copy(RUTA_DATOS, fuente)
+    monkeypatch.setattr(snapshot, "intentar_guardar", lambda *args, **kwargs: False)
+    monkeypatch.setattr(data_loader, "_fuentes", {})
+    monkeypatch.setattr(data_loader, "_activas", {})
+
+    procesando = threading.Event()
+    seguir = threading.Event()
+    procesar = data_loader.procesar_excel
+
+    def procesar_lento(contenido):
+        procesando.set()
+        assert seguir.wait(10)
+        return procesar(contenido)
+
+    monkeypatch.setattr(data_loader, "procesar_excel", procesar_lento)
+    resultado = []
+    hilo = threading.Thread(target=lambda: resultado.append(data_loader.actualizar_fuente(fuente)))
+    hilo.start()
+    try:
+        assert procesando.wait(10)
+        # Mientras se procesa el Excel otras sesiones pueden tomar el lock (p. ej. para cargar otra fuente)
+        assert data_loader._lock.acquire(timeout=1)
+        data_loader._lock.release()
+    finally:
+        seguir.set()
+        hilo.join(10)
+
+    version = resultado[0]
+    assert version is not None
+    assert data_loader._activas[fuente] == version
+    assert data_loader.actualizar_fuente(fuente) is None
+    df, version_cargada = data_loader.cargar_datos(fuente)
+    assert version_cargada == version and len(df) == 413
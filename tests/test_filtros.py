@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from almacen import construir_almacen
+from data_loader import RUTA_DATOS, procesar_excel
+from filtros import IndiceFiltros
+from metrics_config import keywords_by_role, positions_by_role
+from radar_utils import cumple_rol
+
+# El índice de filtros contra el comportamiento anterior: cumple_rol (substring) por fila y filtros de pandas
+# Únicas diferencias documentadas: LAMF/RAMF ya no cuentan como Midfielder ni LWB/RWB como Wingers
+
+EXCLUSIONES = {"Midfielder": {"LAMF", "RAMF"}, "Wingers": {"LWB", "RWB"}}
+
+
+@pytest.fixture(scope="module")
+def almacen():
+    return construir_almacen(procesar_excel(RUTA_DATOS.read_bytes()))
+
+
+@pytest.fixture(scope="module")
+def indice(almacen):
+    return IndiceFiltros(almacen)
+
+
+def mascara_base(almacen, rol):
+    return almacen["Position"].map(lambda p: cumple_rol(p, rol, keywords_by_role)).to_numpy(dtype=bool)
+
+
+@pytest.mark.parametrize("rol", list(positions_by_role))
+def test_roles_como_cumple_rol(almacen, indice, rol):
+    base = mascara_base(almacen, rol)
+    excluidas = almacen["Primary position"].astype(object).isin(EXCLUSIONES.get(rol, set())).to_numpy()
+    np.testing.assert_array_equal(indice.mascara(rol), base & ~excluidas)
+
+
+def test_exclusiones_documentadas(almacen, indice):
+    for rol, posiciones in EXCLUSIONES.items():
+        primaria = almacen["Primary position"].astype(object)
+        diferencia = mascara_base(almacen, rol) & ~indice.mascara(rol)
+        assert set(primaria[diferencia]) <= posiciones
+
+
+def test_filtros_combinados_como_pandas(almacen, indice):
+    rng = np.random.default_rng(0)
+    paises = [None] + indice.paises_disponibles()
+    minutos = almacen["Minutes played"]
+    edad = almacen["Age"]
+    for _ in range(300):
+        rol = rng.choice(list(positions_by_role))
+        pais = paises[rng.integers(len(paises))]
+        min_minutos = int(rng.integers(0, 1000))
+        rango_edad = None
+        if rng.random() < 0.7:
+            desde = int(rng.integers(15, 40))
+            rango_edad = (desde, desde + int(rng.integers(0, 10)))
+
+        esperado = pd.Series(indice.mascara(rol), index=almacen.index) & (minutos >= min_minutos)
+        if pais is not None:
+            esperado &= almacen["Birth country"] == pais
+        if rango_edad is not None:
+            esperado &= edad.between(*rango_edad)
+        np.testing.assert_array_equal(indice.mascara(rol, pais, min_minutos, rango_edad), esperado.to_numpy())
+
+
+def test_codigos_de_linea_de_tres_y_carrileros(caplog):
+    posiciones = ["LCB3", "RCB3", "LB5", "RB5", "LWB", "RWB", "LCMF3", "RCMF3", "XYZ"]
+    almacen = pd.DataFrame({"Primary position": posiciones}, index=[f"J{i}" for i in range(len(posiciones))])
+    with caplog.at_level("WARNING", logger="radar.filtros"):
+        indice = IndiceFiltros(almacen)
+    for rol, esperadas in {"Defender": {"LCB3", "RCB3"}, "Fullback": {"LB5", "RB5", "LWB", "RWB"},
+                           "Midfielder": {"LCMF3", "RCMF3"}, "Wingers": set()}.items():
+        assert set(almacen["Primary position"][indice.mascara(rol)]) == esperadas
+        # Mismo rol que la coincidencia por substring de antes (salvo las exclusiones documentadas)
+        for posicion in esperadas:
+            assert cumple_rol(posicion, rol, keywords_by_role)
+    assert indice.sin_rol == {"XYZ": 1}
+    assert "XYZ" in caplog.text
+
+
+def test_datos_incluidos_sin_posiciones_sin_rol(indice):
+    assert indice.sin_rol == {}
@@ -0,0 +1,37 @@
+import tracemalloc
+
+import pytest
+
+import instrumentacion
+
+
+@pytest.fixture
+def activa(monkeypatch, tmp_path):
+    monkeypatch.setattr(instrumentacion, "ACTIVA", True)
+    monkeypatch.setattr(instrumentacion, "RUTA_LOG", tmp_path / "instrumentacion.jsonl")
+    ya_media = tracemalloc.is_tracing()
+    instrumentacion.iniciar_ejecucion()
+    yield
+    instrumentacion.cerrar_ejecucion()
+    if not ya_media:
+        tracemalloc.stop()
+
+
+def test_pico_de_etapa_externa_antes_de_anidada(activa):
+    with instrumentacion.etapa("externa") as externa:
+        bloque = bytearray(50 * 1024 * 1024)
+        del bloque
+        with instrumentacion.etapa("interna") as interna:
+            pass
+    assert externa["pico_kb"] >= 50 * 1024
+    assert interna["pico_kb"] < 1024
+
+
+def test_pico_de_etapa_anidada_llega_a_la_externa(activa):
+    with instrumentacion.etapa("externa") as externa:
+        with instrumentacion.etapa("interna") as interna:
+            bloque = bytearray(20 * 1024 * 1024)
+            del bloque
+    assert interna["pico_kb"] >= 20 * 1024
+    assert externa["pico_kb"] >= interna["pico_kb"]
+    assert (externa["nivel"], interna["nivel"]) == (0, 1)
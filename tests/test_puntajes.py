@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_loader import RUTA_DATOS, columnas_metricas, procesar_excel
+from metrics_config import role_metrics
+from radar_utils import calcular_percentiles, calcular_puntajes
+
+# Los puntajes no pueden depender de df.attrs: concat, merge y groupby los pierden
+
+
+@pytest.fixture(scope="module")
+def df():
+    return procesar_excel(RUTA_DATOS.read_bytes())
+
+
+def test_metricas_en_float64(df):
+    for metrica in columnas_metricas():
+        if metrica in df.columns and pd.api.types.is_float_dtype(df[metrica]):
+            assert df[metrica].dtype == np.float64, metrica
+
+
+@pytest.mark.parametrize("rol", list(role_metrics))
+def test_percentiles_sin_attrs(df, rol):
+    sin_attrs = pd.concat([df.iloc[:200], df.iloc[200:]]).reset_index(drop=True)
+    sin_attrs.attrs = {}
+    esperado, _ = calcular_percentiles(df, role_metrics[rol])
+    obtenido, _ = calcular_percentiles(sin_attrs, role_metrics[rol])
+    pd.testing.assert_frame_equal(obtenido, esperado)
+
+
+# Cálculo original fila a fila (iterrows), como referencia del cálculo vectorizado
+
+def puntajes_fila_a_fila(df_completo, resumen_metricas, unique_col):
+    from scipy.stats import rankdata
+
+    nombres_categorias = list(resumen_metricas.keys())
+    data = []
+    for _, fila in df_completo.iterrows():
+        resultados = {unique_col: fila[unique_col]}
+        for categoria, pesos in resumen_metricas.items():
+            puntaje = 0
+            peso_total = 0
+            for metrica, peso in pesos.items():
+                valor = fila.get(metrica)
+                if pd.notna(valor):
+                    puntaje += valor * peso
+                    peso_total += abs(peso)
+            resultados[categoria] = puntaje / peso_total if peso_total > 0 else 0
+        data.append(resultados)
+
+    df_puntajes = pd.DataFrame(data)
+    df_resultados = df_puntajes.copy()
+    for categoria in nombres_categorias:
+        valores = df_resultados[categoria].values
+        df_resultados[categoria] = rankdata(valores, method='average') / len(valores) * 100
+    df_resultados['Promedio'] = df_resultados[nombres_categorias].mean(axis=1)
+    return df_puntajes, df_resultados
+
+
+def comparar_con_fila_a_fila(df, pesos_rol, unique_col):
+    esperados, esperado = puntajes_fila_a_fila(df, pesos_rol, unique_col)
+    puntajes, categorias = calcular_puntajes(df, pesos_rol)
+    # Igualdad exacta (bit a bit), no aproximada
+    np.testing.assert_array_equal(puntajes, esperados[categorias].to_numpy(dtype=float))
+    obtenido, _ = calcular_percentiles(df, pesos_rol, unique_col)
+    pd.testing.assert_frame_equal(obtenido, esperado, check_exact=True)
+
+
+def test_tabla_chica_con_nan_y_metrica_ausente():
+    pesos_rol = {
+        "ataque": {"Goles": 0.5, "Tiros": 0.3, "No existe": 0.2},
+        "defensa": {"Faltas": -0.4, "Duelos": 0.6},
+        "vacia": {"No existe": 1.0},
+    }
+    df = pd.DataFrame({
+        "Player": ["a", "b", "c", "d", "e", "f"],
+        "Goles": [0.1, np.nan, 0.3, 0.1, np.nan, 0.7],
+        "Tiros": [1.25, 2.5, np.nan, 1.25, np.nan, 0.3],
+        "Faltas": [np.nan, 1.1, 0.9, np.nan, np.nan, 2.0],
+        "Duelos": [55.5, 48.2, np.nan, 55.5, np.nan, 61.0],
+    })
+    comparar_con_fila_a_fila(df, pesos_rol, "Player")
+
+
+@pytest.mark.parametrize("rol", list(role_metrics))
+def test_datos_incluidos_como_fila_a_fila(df, rol):
+    comparar_con_fila_a_fila(df, role_metrics[rol], "UniqueID")
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ranking import RankingRol
+
+# Sin orden precalculado (pesos ajustados) top y ordenar deben coincidir con el recorrido del orden
+
+
+@pytest.fixture(scope="module")
+def tabla():
+    rng = np.random.default_rng(0)
+    n = 1000
+    # ELO redondeado para que haya empates y se pruebe el desempate por orden de la tabla
+    return pd.DataFrame({"ELO": rng.normal(1500, 100, n).round(-1), "Ataque": rng.uniform(0, 100, n)},
+                        index=[f"J{i}" for i in range(n)])
+
+
+def test_sin_orden_igual_que_con_orden(tabla):
+    ordenado = RankingRol(tabla, ["Ataque"])
+    sin_orden = RankingRol(tabla, ["Ataque"], ordenado=False)
+    assert sin_orden.orden is None
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        mascara = rng.random(len(tabla)) < rng.uniform(0.01, 1)
+        for n in (1, 10, 300, len(tabla)):
+            np.testing.assert_array_equal(sin_orden.top(mascara, n), ordenado.top(mascara, n))
+        np.testing.assert_array_equal(sin_orden.ordenar(mascara), ordenado.ordenar(mascara))
+
+
+def test_mascara_vacia(tabla):
+    mascara = np.zeros(len(tabla), dtype=bool)
+    for ranking in (RankingRol(tabla, ["Ataque"]), RankingRol(tabla, ["Ataque"], ordenado=False)):
+        assert len(ranking.top(mascara, 10)) == 0
+        assert len(ranking.ordenar(mascara)) == 0
@@ -0,0 +1,49 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from servicio import ErrorConsulta, ServicioRadar
+
+# Las consultas mal formadas responden 400/404 con ErrorConsulta, nunca 500
+
+
+@pytest.fixture(scope="module")
+def servicio():
+    return ServicioRadar()
+
+
+def responder(servicio, ruta, parametros):
+    cuerpo, _ = servicio.responder(ruta, parametros)
+    return json.loads(cuerpo)
+
+
+def test_ranking(servicio):
+    respuesta = responder(servicio, "/ranking", {"rol": "Forward", "minutos": 0, "limite": 5, "edad": "18-30"})
+    assert len(respuesta["jugadores"]) == 5
+
+
+@pytest.mark.parametrize("edad", [[None], [1, 2, 3], {"min": 18}, 25, "a-b"])
+def test_edad_invalida(servicio, edad):
+    with pytest.raises(ErrorConsulta) as error:
+        servicio.responder("/ranking", {"rol": "Forward", "edad": edad})
+    assert error.value.estado == HTTPStatus.BAD_REQUEST
+
+
+def test_competicion_desconocida(servicio):
+    for parametros in ({"competiciones": "No existe"}, {"base": "No existe"}):
+        with pytest.raises(ErrorConsulta) as error:
+            servicio.responder("/salud", parametros)
+        assert error.value.estado == HTTPStatus.NOT_FOUND
+
+
+def test_lote_con_consultas_invalidas(servicio):
+    consultas = [
+        "texto",
+        {"ruta": 5},
+        {"ruta": "/ranking", "parametros": "rol=Forward"},
+        {"ruta": "/lote", "parametros": {}},
+        {"ruta": "/ranking", "parametros": {"rol": "Forward", "limite": 1}},
+    ]
+    estados = [r["estado"] for r in responder(servicio, "/lote", {"consultas": consultas})["resultados"]]
+    assert estados == [400, 400, 400, 400, 200]
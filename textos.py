@@ -0,0 +1,106 @@
+import base64
+from functools import lru_cache
+from pathlib import Path
+
+# Tablas estáticas de la interfaz: textos por idioma, banderas y logo
+# Se arman una sola vez al importar el módulo (no en cada rerun de Streamlit)
+# {minutos} en los textos de referencia se completa con referencia.MINUTOS_REFERENCIA
+
+# Diccionario para asignar banderas a países comunes
+BANDERAS = {
+    "Argentina": "🇦🇷", "Brazil": "🇧🇷", "Colombia": "🇨🇴", "Uruguay": "🇺🇾",
+    "Chile": "🇨🇱", "Paraguay": "🇵🇾", "Peru": "🇵🇪", "Ecuador": "🇪🇨",
+    "Venezuela": "🇻🇪", "Bolivia": "🇧🇴"
+}
+
+# El logo se sirve desde el repositorio (data/images); la URL queda solo si falta el archivo
+RUTA_LOGO = Path(__file__).resolve().parent / "data" / "images" / "CONMEBOL_logo.png"
+URL_LOGO = "https://raw.githubusercontent.com/felipeorma/RADAR-dashboard/main/data/images/CONMEBOL_logo.png"
+
+# Logo para st.image: ruta local o URL
+
+def logo():
+    return str(RUTA_LOGO) if RUTA_LOGO.exists() else URL_LOGO
+
+# Logo embebido para la exportación a PNG (kaleido no descarga nada); las figuras interactivas usan URL_LOGO
+# para no mandar ~400 KB de base64 con cada figura
+
+@lru_cache(maxsize=1)
+def logo_data_uri():
+    if not RUTA_LOGO.exists():
+        return URL_LOGO
+    return "data:image/png;base64," + base64.b64encode(RUTA_LOGO.read_bytes()).decode("ascii")
+
+
+TEXTOS = {
+    'Español': {
+        'titulo': "📊 Radar Scouting CONMEBOL - Resumido",
+        'rol': "🔎 Selecciona el rol",
+        'pais': "🌎 Filtrar por país",
+        'min': "⏱️ Minutos jugados mínimos",
+        'edad': "🎂 Edad (rango)",
+        'top': "🏅 Top jugadores a mostrar",
+        'no_data': "⚠️ No hay jugadores que cumplan los filtros.",
+        'tabla': "### 📋 Tabla de jugadores",
+        'csv': "⬇️ Descargar tabla en CSV",
+        'png': "🖼️ Descargar radar como imagen PNG",
+        'png_generar': "🖼️ Preparar radar como imagen PNG",
+        'competicion': "🏆 Competiciones",
+        'ambito': "📐 Percentiles",
+        'ambitos': ["Dentro de cada competición", "Todas las competiciones juntas"],
+        'referencia': "👥 Percentiles contra",
+        'referencias': {'todos': "Todos los jugadores", 'rol': "Jugadores del mismo rol",
+                        'rol_minutos': "Mismo rol con {minutos}+ minutos"},
+        'base': "🏟️ Liga de referencia",
+        'base_misma': "La misma selección",
+        'similares': "### 🔍 Jugadores similares",
+        'similar_a': "Jugador de referencia",
+        'metrica': "Medida",
+        'metricas': {'coseno': "Perfil (coseno)", 'euclidea': "Perfil y nivel (euclidiana)"},
+        'cantidad': "Cantidad",
+        'similitud': "Similitud",
+        'distancia': "Distancia",
+        'ajustar_pesos': "⚖️ Ajustar pesos (qué pasa si)",
+        'pesos': "Pesos de las métricas",
+        'restablecer': "Restablecer pesos",
+        'pesos_base': "Los pesos no se pueden ajustar con una liga de referencia externa.",
+        'pesos_ajustados': "⚖️ Ranking con pesos ajustados",
+        'evolucion': "📈 Evolución por jornada",
+        'evolucion_de': "Mostrar"
+    },
+    'English': {
+        'titulo': "📊 Radar Scouting CONMEBOL - Summary Visualization",
+        'rol': "🔎 Select role",
+        'pais': "🌎 Filter by country",
+        'min': "⏱️ Minimum minutes played",
+        'edad': "🎂 Age range",
+        'top': "🏅 Top players to show",
+        'no_data': "⚠️ No players match the filters.",
+        'tabla': "### 📋 Player Table",
+        'csv': "⬇️ Download table as CSV",
+        'png': "🖼️ Download radar as PNG image",
+        'png_generar': "🖼️ Prepare radar as PNG image",
+        'competicion': "🏆 Competitions",
+        'ambito': "📐 Percentiles",
+        'ambitos': ["Within each competition", "All competitions together"],
+        'referencia': "👥 Percentiles against",
+        'referencias': {'todos': "All players", 'rol': "Players in the same role",
+                        'rol_minutos': "Same role with {minutos}+ minutes"},
+        'base': "🏟️ Baseline league",
+        'base_misma': "The same selection",
+        'similares': "### 🔍 Similar players",
+        'similar_a': "Reference player",
+        'metrica': "Measure",
+        'metricas': {'coseno': "Profile (cosine)", 'euclidea': "Profile and level (euclidean)"},
+        'cantidad': "How many",
+        'similitud': "Similarity",
+        'distancia': "Distance",
+        'ajustar_pesos': "⚖️ Adjust weights (what-if)",
+        'pesos': "Metric weights",
+        'restablecer': "Reset weights",
+        'pesos_base': "Weights cannot be adjusted with an external baseline league.",
+        'pesos_ajustados': "⚖️ Ranking with adjusted weights",
+        'evolucion': "📈 Matchday trend",
+        'evolucion_de': "Show"
+    }
+}